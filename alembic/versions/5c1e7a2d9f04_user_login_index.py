@@ -0,0 +1,42 @@
+"""user login index
+
+Revision ID: 5c1e7a2d9f04
+Revises: 9b2d3f5b9392
+Create Date: 2026-10-19 10:12:41.208113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e7a2d9f04'
+down_revision: Union[str, Sequence[str], None] = '9b2d3f5b9392'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_login_index',
+    sa.Column('key_type', sa.String(length=10), nullable=False),
+    sa.Column('login_key', sa.String(length=64), nullable=False),
+    sa.Column('tenant_db_name', sa.String(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('key_type', 'login_key', 'tenant_db_name')
+    )
+    op.create_index(
+        'ix_user_login_index_tenant_user',
+        'user_login_index',
+        ['tenant_db_name', 'user_id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_login_index_tenant_user', table_name='user_login_index')
+    op.drop_table('user_login_index')
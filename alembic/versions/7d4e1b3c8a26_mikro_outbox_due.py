@@ -0,0 +1,40 @@
+"""mikro outbox due
+
+Revision ID: 7d4e1b3c8a26
+Revises: 5c1e7a2d9f04
+Create Date: 2026-10-19 14:03:12.517204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d4e1b3c8a26'
+down_revision: Union[str, Sequence[str], None] = '5c1e7a2d9f04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('mikro_outbox_due',
+    sa.Column('tenant_db_name', sa.String(), nullable=False),
+    sa.Column('due_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('seq', sa.BigInteger(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('tenant_db_name')
+    )
+    op.create_index(
+        'ix_mikro_outbox_due_due_at',
+        'mikro_outbox_due',
+        ['due_at'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_mikro_outbox_due_due_at', table_name='mikro_outbox_due')
+    op.drop_table('mikro_outbox_due')
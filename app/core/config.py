@@ -1,3 +1,4 @@
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 
 
@@ -10,6 +11,20 @@ class Settings(BaseSettings):
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
     MASTER_DB_NAME: str
+    # tenant DB başına bir engine (connection pool) tutulur; boşta en fazla
+    # cache_size x pool_size bağlantı kalır, fazlası overflow ile açılıp kapanır
+    TENANT_DB_POOL_SIZE: int = 1
+    TENANT_DB_MAX_OVERFLOW: int = 4
+    TENANT_DB_POOL_RECYCLE: int = 1800
+    # en fazla bu kadar tenant engine'i tutulur (LRU); bu kadar saniye
+    # kullanılmayan engine kapatılır
+    TENANT_DB_ENGINE_CACHE_SIZE: int = 64
+    TENANT_DB_ENGINE_IDLE_SECONDS: int = 600
+    # tenant sorgu sonucu cache'i (roller vb.): yazan endpoint generation'ı artırır;
+    # diğer worker'ların / sync'in yazışları en geç TTL sonra görünür
+    QUERY_CACHE_TTL: int = 60
+    QUERY_CACHE_MAX_ENTRIES: int = 5000
+    QUERY_CACHE_MAX_MB: int = 16
 
     # =========================
     # APP
@@ -18,6 +33,120 @@ class Settings(BaseSettings):
     ENV: str = "local"
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
+    # liste endpointleri: sayfa başına varsayılan / en fazla satır (keyset pagination)
+    LIST_PAGE_DEFAULT_LIMIT: int = 100
+    LIST_PAGE_MAX_LIMIT: int = 500
+    # export endpointleri: server-side cursor'dan bir seferde okunan satır
+    EXPORT_BATCH_SIZE: int = 2000
+    # toplu kullanıcı import'u: dosya başına en fazla satır / boyut, paralel bcrypt thread'i
+    USER_IMPORT_MAX_ROWS: int = 20000
+    USER_IMPORT_MAX_MB: int = 10
+    USER_IMPORT_HASH_WORKERS: int = 4
+
+    # =========================
+    # PASSWORD HASHING
+    # =========================
+    # startup'ta yeni hashlerin bcrypt cost'u, tek verify bu süreyi aşmayacak şekilde seçilir
+    PASSWORD_HASH_TARGET_MS: int = 250
+    # MIN_ROUNDS altındaki hashler login'de yeniden hashlenir (ölçümden bağımsız)
+    PASSWORD_BCRYPT_MIN_ROUNDS: int = 10
+    PASSWORD_BCRYPT_MAX_ROUNDS: int = 15
+    # verilirse ölçüm yapılmaz; tüm worker'larda hem cost hem rehash sınırı bu değer
+    PASSWORD_BCRYPT_ROUNDS: Optional[int] = None
+
+    # =========================
+    # MIKRO API
+    # =========================
+    # Mikro günlük şifre hash'i (YYYY-MM-DD şifre) bu saat dilimindeki güne göre üretilir
+    MIKRO_TIMEZONE: str = "Europe/Istanbul"
+    # bağlantı kurma / cevap okuma / toplam (kuyruk beklemesi dahil) süre sınırları (saniye)
+    MIKRO_CONNECT_TIMEOUT: float = 5
+    MIKRO_HTTP_TIMEOUT: int = 30
+    MIKRO_TOTAL_TIMEOUT: float = 40
+    # Mikro sunucusu başına aynı anda yapılabilecek en fazla çağrı (async client)
+    MIKRO_MAX_CONCURRENCY_PER_SERVER: int = 8
+    # bunlardan kaçı kullanıcı (interactive) çağrılarına ayrılır; senkron / outbox
+    # (background) sadece kalanları, interaktif bekleyen yokken kullanır
+    MIKRO_INTERACTIVE_RESERVED_SLOTS: int = 3
+    # background çağrının slot için en fazla bekleyeceği süre (saniye);
+    # + MIKRO_TOTAL_TIMEOUT, MIKRO_OUTBOX_LEASE_SECONDS'tan küçük kalmalı
+    MIKRO_BACKGROUND_QUEUE_TIMEOUT: float = 60
+
+    # cache'lenebilir (salt okunur) Mikro endpointleri ve TTL'leri (saniye)
+    # env: MIKRO_CACHE_TTLS='{"StokListesiV2": 300}'
+    MIKRO_CACHE_TTLS: Dict[str, int] = {
+        "StokListesiV2": 300,
+        "CariListesiV2": 300,
+        "PersonelListesiV2": 600,
+    }
+    # TTL dolduktan sonra bu süre boyunca eski cevap dönülür, arka planda yenilenir
+    MIKRO_CACHE_STALE_SECONDS: int = 600
+    MIKRO_CACHE_MAX_ENTRIES: int = 2000
+    MIKRO_CACHE_MAX_MB: int = 64
+    # aynı anda gelen birebir aynı istekler tek upstream çağrıda birleştirilir.
+    # cache'lenen endpointler zaten dahil; cache'lenmeyen salt okunur endpointler buraya.
+    # yazma yapan endpointler (ör. ...KaydetV2) buraya EKLENMEMELİ.
+    MIKRO_COALESCE_ENDPOINTS: List[str] = []
+    # art arda bu kadar hata -> circuit açılır, istekler beklemeden reddedilir
+    MIKRO_BREAKER_FAILURES: int = 5
+    # açık kalma süresi; sonra tek bir deneme isteği (half-open) geçirilir
+    MIKRO_BREAKER_OPEN_SECONDS: int = 30
+    # batch endpoint: istek başına en fazla kalem / aynı anda çalışacak kalem
+    MIKRO_BATCH_MAX_ITEMS: int = 20
+    MIKRO_BATCH_CONCURRENCY: int = 5
+    # streaming proxy: client'a aktarılan parça boyutu (byte)
+    MIKRO_STREAM_CHUNK_SIZE: int = 65536
+    # Mikro sunucusu başına açık tutulacak en fazla bağlantı
+    MIKRO_HTTP_POOL_MAXSIZE: int = 10
+    # bu süre kullanılmayan Mikro sunucusunun bağlantıları kapatılır (saniye)
+    MIKRO_HTTP_IDLE_TIMEOUT: int = 300
+    # tenant başına firma + Mikro bağlantı ayarları bu süre bellekte tutulur (saniye).
+    # post/put-mikro-info cache'i hemen temizler; süre sadece DB'ye elle yapılan
+    # değişiklikler ve diğer worker'lar için üst sınırdır.
+    MIKRO_SETTINGS_CACHE_TTL: int = 300
+    # personel senkronu: Mikro liste endpointi ve sayfa başına kayıt
+    MIKRO_PERSONEL_ENDPOINT: str = "PersonelListesiV2"
+    MIKRO_SYNC_PAGE_SIZE: int = 500
+    # tam sync: bağlı aktif kullanıcıların bu oranından fazlası listede yoksa
+    # (boş / yarım cevap şüphesi) pasife alma yapılmaz, force=true ile zorlanır
+    MIKRO_SYNC_MAX_DEACTIVATE_RATIO: float = 0.2
+    # yerel replika: Mikro referans listeleri tenant DB'ye kopyalanır, arama yerelden yapılır.
+    # dataset -> endpoint + Mikro alan adları (guid / kod / ad / iptal / lastup)
+    MIKRO_REPLICA_DATASETS: Dict[str, Dict[str, str]] = {
+        "stok": {
+            "endpoint": "StokListesiV2",
+            "guid": "sto_Guid",
+            "kod": "sto_kod",
+            "ad": "sto_isim",
+            "iptal": "sto_iptal",
+            "lastup": "sto_lastup_date",
+        },
+        "cari": {
+            "endpoint": "CariListesiV2",
+            "guid": "cari_Guid",
+            "kod": "cari_kod",
+            "ad": "cari_unvan1",
+            "iptal": "cari_iptal",
+            "lastup": "cari_lastup_date",
+        },
+    }
+    # outbox: Mikro'ya yazma çağrıları arka planda, tekrar denemeli gönderilir
+    # aynı anda en fazla gönderim (toplam / tenant başına) ve işlenen tenant sayısı
+    MIKRO_OUTBOX_CONCURRENCY: int = 8
+    MIKRO_OUTBOX_TENANT_CONCURRENCY: int = 2
+    MIKRO_OUTBOX_MAX_TENANTS: int = 16
+    # outbox DB çağrıları için ayrı thread sayısı (istek threadpool'u kullanılmaz)
+    MIKRO_OUTBOX_DB_THREADS: int = 4
+    MIKRO_OUTBOX_MAX_ATTEMPTS: int = 10
+    # tekrar deneme bekleme süresi: base * 2^(deneme-1), en fazla max (saniye)
+    MIKRO_OUTBOX_BACKOFF_BASE: int = 5
+    MIKRO_OUTBOX_BACKOFF_MAX: int = 1800
+    # gönderilirken worker ölürse kayıt bu süre sonra tekrar alınır (saniye);
+    # MIKRO_BACKGROUND_QUEUE_TIMEOUT + MIKRO_TOTAL_TIMEOUT'tan belirgin büyük olmalı,
+    # yoksa kayıt iki kez gönderilebilir
+    MIKRO_OUTBOX_LEASE_SECONDS: int = 120
+    # master'daki mikro_outbox_due tablosunun en fazla bu aralıkla kontrolü (saniye)
+    MIKRO_OUTBOX_SCAN_SECONDS: int = 30
 
     class Config:
         env_file = ".env"
@@ -5,10 +5,12 @@ from jose import jwt, JWTError
 from datetime import datetime, timedelta
 import secrets
 import string
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 
 from app.core.config import Settings
+from app.core.logger import logger
 
 settings = Settings()
 
@@ -16,24 +18,122 @@ SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
+# =====================================================
+# PASSWORD HASHING (master + tenant ortak)
+# =====================================================
+
 pwd_context = CryptContext(
     schemes=["bcrypt"],
     deprecated="auto"
 )
 
+BCRYPT_MAX_BYTES = 72
+
+
 def _normalize_password(password: str) -> str:
     """
     bcrypt max 72 BYTE sınırı vardır.
     UTF-8 güvenli truncate.
     """
-    return password.encode("utf-8")[:72].decode("utf-8", errors="ignore")
+    return password.encode("utf-8")[:BCRYPT_MAX_BYTES].decode("utf-8", errors="ignore")
+
+
+def configure_password_rounds(rounds: int, floor: int) -> None:
+    """
+    Yeni hashler `rounds` ile üretilir. Sadece `floor` altındaki hashler
+    needs_update olur ve login sırasında yeniden hashlenir; üst sınır yok.
+    Worker'lar farklı kalibre olsa da birbirinin hashini tekrar hashlemez.
+    """
+    pwd_context.update(
+        bcrypt__default_rounds=max(rounds, floor),
+        bcrypt__min_rounds=floor,
+    )
+
+
+def _measure_bcrypt(rounds: int, samples: int = 3) -> float:
+    handler = pwd_context.handler("bcrypt").using(rounds=rounds)
+    best = None
+
+    for _ in range(samples):
+        started = time.perf_counter()
+        handler.hash("winpol-calibration")
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def calibrate_password_hashing() -> int:
+    """
+    Startup'ta çağrılır. bcrypt maliyeti her round'da 2 katına çıktığı için
+    min round ölçülür, hedef süreyi aşmayan en yüksek round seçilir.
+    Ölçüm sadece yeni hashlerin cost'unu belirler; rehash sınırı (floor)
+    deployment geneli sabittir: PASSWORD_BCRYPT_ROUNDS, yoksa MIN_ROUNDS.
+    """
+    min_rounds = settings.PASSWORD_BCRYPT_MIN_ROUNDS
+    max_rounds = settings.PASSWORD_BCRYPT_MAX_ROUNDS
+
+    if settings.PASSWORD_BCRYPT_ROUNDS:
+        rounds = floor = settings.PASSWORD_BCRYPT_ROUNDS
+    else:
+        floor = min_rounds
+        target = settings.PASSWORD_HASH_TARGET_MS / 1000
+        elapsed = _measure_bcrypt(min_rounds)
+        rounds = min_rounds
+
+        while rounds < max_rounds and elapsed * 2 <= target:
+            rounds += 1
+            elapsed *= 2
+
+    configure_password_rounds(rounds, floor)
+    logger.info(f"PASSWORD HASHING | bcrypt rounds={rounds} | rehash below={floor}")
+
+    return rounds
+
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(_normalize_password(password))
 
 
 def verify_password(password: str, hashed: str) -> bool:
-    return pwd_context.verify(_normalize_password(password), hashed)
+    return verify_and_rehash(password, hashed)[0]
+
+
+def verify_and_rehash(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """
+    (doğru mu, yeni hash) döner. Yeni hash sadece cost / şema değiştiyse
+    doluyor; çağıran kaydedip commit etmeli.
+    """
+    try:
+        valid, new_hash = pwd_context.verify_and_update(
+            _normalize_password(password), hashed
+        )
+    except ValueError:
+        # tanınmayan / bozuk hash
+        return False, None
+
+    # eski tenant hashleri 72 byte'ı normalize etmeden kesiyordu
+    if not valid and len(password.encode("utf-8")) > BCRYPT_MAX_BYTES:
+        if pwd_context.verify(password, hashed):
+            return True, hash_password(password)
+
+    return valid, new_hash
+
+
+_dummy_hash: Optional[str] = None
+
+
+def verify_dummy_password(password: str) -> None:
+    """
+    Kullanıcı bulunamadığında da bir bcrypt verify süresi harcanır;
+    cevap süresinden kullanıcının varlığı anlaşılmasın.
+    """
+    global _dummy_hash
+
+    if _dummy_hash is None:
+        _dummy_hash = pwd_context.hash(generate_password())
+
+    pwd_context.verify(_normalize_password(password), _dummy_hash)
 
 
 def create_access_token(data: dict, expires_delta: timedelta):
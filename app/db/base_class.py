@@ -7,5 +7,6 @@ from app.models.master.master import (
     Module,
     CompanyModule,
     SystemLog,
-    License
+    License,
+    UserLoginIndex
 )
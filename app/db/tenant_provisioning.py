@@ -3,6 +3,16 @@ from app.db.base_tenant import TenantBase
 from app.core.config import settings
 from app.models.tenant import * 
 import app.models.tenant 
+from app.services.entity_versions import ENTITY_VERSION_SQL
+from app.services.query_cache import tenant_query_cache
+from app.services.tenant_service import dispose_tenant_engine
+
+# uuid-ossp: uuid_generate_v4(), pg_trgm: Mikro replika arama indexleri
+TENANT_EXTENSIONS_SQL = [
+    'CREATE EXTENSION IF NOT EXISTS "uuid-ossp"',
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+]
+
 
 def _get_admin_engine():
     return create_engine(
@@ -40,13 +50,18 @@ def create_tenant_db(db_name: str):
 
         with tenant_engine.begin() as conn:
             #  EXTENSION → TABLOLARDAN ÖNCE
-            conn.execute(text('CREATE EXTENSION IF NOT EXISTS "uuid-ossp";'))
-            print("[TENANT] uuid-ossp extension ensured")
+            for statement in TENANT_EXTENSIONS_SQL:
+                conn.execute(text(statement))
+            print("[TENANT] extensions ensured")
 
             #  TABLOLAR
             TenantBase.metadata.create_all(bind=conn)
             print("[TENANT] Tables created")
 
+            #  SEQUENCE / TRIGGER (mevcut tenant'lara app.scripts.tenant_migrate ile)
+            for statement in TENANT_UPGRADE_SQL:
+                conn.execute(text(statement))
+
     except Exception as e:
         raise RuntimeError(f"Tenant DB provisioning failed: {db_name}") from e
 
@@ -56,7 +71,86 @@ def create_tenant_db(db_name: str):
             tenant_engine.dispose()
 
 
+# =====================================================
+# MEVCUT TENANT'LARA YENİ TABLOLAR
+# =====================================================
+# Tenant tabloları provisioning'de create_all ile oluşuyor. Sonradan eklenen
+# tablo / kolon / trigger'lar eski tenant'lara deploy sırasında bir kez
+# app.scripts.tenant_migrate ile uygulanır; istek yolunda DDL çalışmaz.
+# Hepsi idempotent.
+
+TENANT_UPGRADE_SQL = [
+    "ALTER TABLE mikro_outbox ADD COLUMN IF NOT EXISTS lease_token UUID",
+    # kullanici_no sequence'i: eski tenant'larda oluşturulur ve MAX'ın gerisindeyse ileri alınır
+    # (hiç geri alınmaz; başka süreçte ayrılmış bloklar çakışmasın)
+    "CREATE SEQUENCE IF NOT EXISTS users_kullanici_no_seq",
+    "ALTER SEQUENCE users_kullanici_no_seq OWNED BY users.kullanici_no",
+    "ALTER TABLE users ALTER COLUMN kullanici_no SET DEFAULT nextval('users_kullanici_no_seq')",
+    "SELECT setval('users_kullanici_no_seq', x.max_no) "
+    "FROM (SELECT MAX(kullanici_no) AS max_no FROM users) x, users_kullanici_no_seq s "
+    "WHERE x.max_no > CASE WHEN s.is_called THEN s.last_value ELSE s.last_value - 1 END",
+    # entity_versions sayaçları (ETag)
+    *ENTITY_VERSION_SQL,
+]
+
+# Eski tenant'lardaki büyük tablolara index: yazmaları kilitlemesin diye
+# CONCURRENTLY (transaction dışında). Yeni tenant'larda create_all oluşturur.
+TENANT_INDEX_SQL = {
+    "ix_users_role_active_name":
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_role_active_name "
+        "ON users (role_id, kullanici_name) WHERE kullanici_pasif = false",
+    "ix_attendance_logs_created_at":
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_attendance_logs_created_at "
+        "ON attendance_logs (created_at)",
+    "ix_audit_logs_created_at":
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_audit_logs_created_at "
+        "ON audit_logs (created_at)",
+}
+
+# yarım kalmış CONCURRENTLY index INVALID kalır; IF NOT EXISTS onu atlar
+INVALID_INDEX_SQL = text("""
+    SELECT 1 FROM pg_index
+    WHERE indexrelid = to_regclass(:name) AND NOT indisvalid
+""")
+
+# kilit bekleyen ALTER, arkasındaki tüm sorguları da bekletir
+MIGRATION_LOCK_TIMEOUT = "5s"
+
+
+def migrate_tenant_schema(db_name: str) -> None:
+    """
+    Tek tenant'a eksik tablo / kolon / trigger / index'leri uygular.
+    Sadece deploy script'inden (app.scripts.tenant_migrate) çağrılır.
+    """
+    tenant_engine = create_engine(
+        f"postgresql://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}"
+        f"@{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{db_name}",
+        pool_pre_ping=True
+    )
+
+    try:
+        with tenant_engine.begin() as conn:
+            conn.execute(text(f"SET LOCAL lock_timeout = '{MIGRATION_LOCK_TIMEOUT}'"))
+            for statement in TENANT_EXTENSIONS_SQL:
+                conn.execute(text(statement))
+            TenantBase.metadata.create_all(bind=conn, checkfirst=True)
+            for statement in TENANT_UPGRADE_SQL:
+                conn.execute(text(statement))
+
+        with tenant_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for name, statement in TENANT_INDEX_SQL.items():
+                if conn.execute(INVALID_INDEX_SQL, {"name": name}).scalar():
+                    conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+                conn.execute(text(statement))
+    finally:
+        tenant_engine.dispose()
+
+
 def drop_tenant_db(db_name: str):
+    # bu süreçteki açık bağlantılar da kapansın
+    dispose_tenant_engine(db_name)
+    tenant_query_cache.invalidate_tenant(db_name)
+
     admin_engine = _get_admin_engine()
 
     try:
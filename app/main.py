@@ -1,18 +1,30 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.security import calibrate_password_hashing
 from app.db.init_master import init_master_db
-from app.routers import auth, companies,tenantdb,mikro_test,mikro_api
+from app.routers import auth, companies,tenantdb,mikro_test,mikro_api,system
+from app.services.mikro_async import mikro_async_client
+from app.services.mikro_outbox import mikro_outbox_dispatcher
+from app.services.tenant_service import dispose_tenant_engines
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_master_db()
+    calibrate_password_hashing()
+    mikro_outbox_dispatcher.start()
     yield
+    await mikro_outbox_dispatcher.stop()
+    await mikro_async_client.aclose()
+    dispose_tenant_engines()
 
 app = FastAPI(
     title="Winpol SaaS Backend",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # response_model'li endpointlerde şema -> orjson; jsonable_encoder + json.dumps'tan hızlı
+    default_response_class=ORJSONResponse,
 )
 
 # BU BLOK OLMAZSA FLUTTER WEB ÇALIŞMAZ
@@ -25,9 +37,12 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    # liste endpointlerinin sonraki sayfa cursor'ı
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 app.include_router(auth.router)
 app.include_router(companies.router)
 app.include_router(tenantdb.router)
 app.include_router(mikro_test.router)
+app.include_router(system.router)
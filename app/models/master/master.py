@@ -1,7 +1,7 @@
 import uuid
 from sqlalchemy import (
-    Column, String, Boolean, Integer,
-    ForeignKey, DateTime, UniqueConstraint, text
+    Column, String, Boolean, Integer, BigInteger,
+    ForeignKey, DateTime, UniqueConstraint, Index, text
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -208,3 +208,44 @@ class License(Base):
     __table_args__ = (
         UniqueConstraint("company_id", "module_id", name="uq_company_module_license"),
     )
+
+
+
+# =====================================================
+# USER LOGIN INDEX
+# =====================================================
+# tenant kullanıcılarının email / kullanıcı adı -> tenant DB eşlemesi.
+# vergi_no göndermeden login için tek bir master sorgusu yeterli olsun diye tutuluyor.
+
+class UserLoginIndex(Base):
+    __tablename__ = "user_login_index"
+
+    key_type = Column(String(10), primary_key=True)         # EMAIL / USERNAME
+    login_key = Column(String(64), primary_key=True)        # normalize edilmiş değer
+    tenant_db_name = Column(String, primary_key=True)       # tenant_dbs.db_name (vergi no)
+
+    user_id = Column(UUID(as_uuid=True), nullable=False)    # users.kullanici_Guid
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_user_login_index_tenant_user", "tenant_db_name", "user_id"),
+    )
+
+
+# =====================================================
+# MIKRO OUTBOX DUE
+# =====================================================
+# bekleyen outbox kaydı olan tenant'lar. dispatcher sadece buradaki,
+# zamanı gelmiş tenant'ların DB'lerine bağlanır; kayıt yoksa tenant taranmaz.
+
+class MikroOutboxDue(Base):
+    __tablename__ = "mikro_outbox_due"
+
+    tenant_db_name = Column(String, primary_key=True)       # tenant_dbs.db_name (vergi no)
+    due_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # her enqueue'da artar; dispatcher işlerken yeni kayıt geldiyse satırı silmez
+    seq = Column(BigInteger, nullable=False, server_default="0")
+
+    __table_args__ = (
+        Index("ix_mikro_outbox_due_due_at", "due_at"),
+    )
@@ -9,5 +9,9 @@ from .tenant import (
     Permission,
     RolePermission,
     AttendanceLog,
-    AuditLog
+    AuditLog,
+    EntityVersion,
+    MikroSyncState,
+    MikroReplicaItem,
+    MikroOutbox
 )   
\ No newline at end of file
@@ -1,9 +1,9 @@
 import uuid
 from sqlalchemy import (
-    CheckConstraint, Column, Identity, String, Boolean, Integer,
-    ForeignKey, DateTime, UniqueConstraint, text, ForeignKeyConstraint
+    BigInteger, CheckConstraint, Column, Identity, Index, String, Boolean, Integer,
+    ForeignKey, DateTime, UniqueConstraint, text, ForeignKeyConstraint, Sequence
 )
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base_tenant import TenantBase
@@ -204,6 +204,11 @@ class RolePermission(TenantBase):
 # USER
 # =====================================================
 
+# kullanici_no: MAX()+1 yerine sequence (eş zamanlı kayıtlar çakışmaz, boşluk olabilir).
+# mevcut tenant'lar TENANT_UPGRADE_SQL ile hizalanır
+USER_NO_SEQUENCE = Sequence("users_kullanici_no_seq")
+
+
 class User(TenantBase):
     __tablename__ = "users"
 
@@ -227,7 +232,12 @@ class User(TenantBase):
     kullanici_lastup_date = Column(DateTime)
 
     # ================= USER CORE =================
-    kullanici_no = Column(Integer, autoincrement=True, unique=True)
+    kullanici_no = Column(
+        Integer,
+        USER_NO_SEQUENCE,
+        server_default=USER_NO_SEQUENCE.next_value(),
+        unique=True
+    )
     kullanici_name = Column(String(20), unique=True, nullable=False)
     kullanici_pw = Column(String(127), nullable=False)
     kullanici_LongName = Column(String(50))
@@ -260,6 +270,16 @@ class User(TenantBase):
         cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        # rol bazında aktif kullanıcı listeleri (kullanici_name sırasıyla sayfalanır)
+        Index(
+            "ix_users_role_active_name",
+            "role_id",
+            "kullanici_name",
+            postgresql_where=text("kullanici_pasif = false"),
+        ),
+    )
+
 
 
 # =====================================================
@@ -276,7 +296,8 @@ class AttendanceLog(TenantBase):
     )
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.kullanici_Guid"))
     check_type = Column(String)  # IN / OUT
-    created_at = Column(DateTime, server_default=func.now())
+    # export: tarih aralığı + sıralama
+    created_at = Column(DateTime, server_default=func.now(), index=True)
 
 
 # =====================================================
@@ -295,7 +316,8 @@ class AuditLog(TenantBase):
     action = Column(String)
     target_type = Column(String)
     target_external_id = Column(String)
-    created_at = Column(DateTime, server_default=func.now())
+    # export: tarih aralığı + sıralama
+    created_at = Column(DateTime, server_default=func.now(), index=True)
 
 
 # =====================================================
@@ -382,8 +404,13 @@ class MikroApiSettings(TenantBase):
         foreign_keys=[firma_Guid]
     )
 
+    # branches'a FK yok: (firma_siraNo, sube_no) -> (sube_bag_firma, sube_no)
     branch = relationship(
         "Branch",
+        primaryjoin=lambda: and_(
+            foreign(MikroApiSettings.firma_siraNo) == Branch.sube_bag_firma,
+            foreign(MikroApiSettings.sube_no) == Branch.sube_no,
+        ),
         viewonly=True
     )
 
@@ -431,3 +458,134 @@ class UserFavorite(TenantBase):
         back_populates="favorites"
     )
 
+
+
+# =====================================================
+# ENTITY VERSIONS
+# =====================================================
+# users / branches / roles ... tablolarına her yazışta trigger ile artan sayaç
+# (bkz. app/services/entity_versions.py). GET cevaplarının ETag'i buradan üretilir.
+
+class EntityVersion(TenantBase):
+    __tablename__ = "entity_versions"
+
+    entity = Column(String(30), primary_key=True)
+    version = Column(BigInteger, nullable=False, server_default="0")
+    changed_at = Column(DateTime, server_default=func.now())
+
+
+# =====================================================
+# MIKRO SYNC STATE
+# =====================================================
+# Mikro'dan çekilen her veri seti (personel vb.) için son senkron bilgisi
+
+class MikroSyncState(TenantBase):
+    __tablename__ = "mikro_sync_state"
+
+    dataset = Column(String(50), primary_key=True)
+
+    # Mikro tarafındaki en son değişiklik zamanı (bir sonraki sync bundan sonrasını ister)
+    last_watermark = Column(DateTime)
+
+    last_started_at = Column(DateTime)
+    last_finished_at = Column(DateTime)
+    last_success_at = Column(DateTime)
+    last_status = Column(String(20))   # SUCCESS / FAILED
+    last_error = Column(String(500))
+
+    # son çalışmanın sayıları
+    last_duration_ms = Column(Integer)
+    rows_fetched = Column(Integer, nullable=False, server_default="0")
+    rows_inserted = Column(Integer, nullable=False, server_default="0")
+    rows_updated = Column(Integer, nullable=False, server_default="0")
+    rows_deactivated = Column(Integer, nullable=False, server_default="0")
+    rows_skipped = Column(Integer, nullable=False, server_default="0")
+
+
+# =====================================================
+# MIKRO REPLICA
+# =====================================================
+# Mikro referans listelerinin (stok, cari ...) yerel kopyası. Arama / lookup
+# Mikro'ya gitmeden buradan yapılır; tazelik mikro_sync_state'te
+# "replica:<dataset>" satırında izlenir.
+
+class MikroReplicaItem(TenantBase):
+    __tablename__ = "mikro_replica_items"
+
+    dataset = Column(String(20), primary_key=True)
+    # Mikro guid'i, yoksa kod
+    row_key = Column(String(64), primary_key=True)
+
+    kod = Column(String(50))
+    ad = Column(String(200))
+    iptal = Column(Boolean, nullable=False, server_default=text("false"))
+    # Mikro tarafındaki son değişiklik zamanı
+    lastup = Column(DateTime)
+    # Mikro satırının tamamı
+    data = Column(JSONB, nullable=False)
+    synced_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_mikro_replica_items_kod", "dataset", "kod"),
+        # ILIKE '%...%' araması (pg_trgm)
+        Index(
+            "ix_mikro_replica_items_kod_trgm",
+            "kod",
+            postgresql_using="gin",
+            postgresql_ops={"kod": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_mikro_replica_items_ad_trgm",
+            "ad",
+            postgresql_using="gin",
+            postgresql_ops={"ad": "gin_trgm_ops"},
+        ),
+    )
+
+
+# =====================================================
+# MIKRO OUTBOX
+# =====================================================
+# Mikro'ya yazma çağrıları: yerel değişiklikle aynı transaction'da eklenir,
+# arka plandaki dispatcher tarafından tekrar denemeli gönderilir.
+
+class MikroOutbox(TenantBase):
+    __tablename__ = "mikro_outbox"
+
+    id = Column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4
+    )
+
+    # aynı işlem iki kez kuyruğa girmesin (Mikro tarafında tekilleştirme yok,
+    # gönderim en az bir kez: lease kaybında aynı kayıt tekrar gönderilebilir)
+    idempotency_key = Column(String(100), unique=True, nullable=False)
+
+    endpoint = Column(String(100), nullable=False)
+    body = Column(JSONB)
+
+    # PENDING / SENDING / SENT / DEAD
+    status = Column(String(20), nullable=False, server_default="PENDING")
+    attempts = Column(Integer, nullable=False, server_default="0")
+    next_attempt_at = Column(DateTime, nullable=False, server_default=func.now())
+    # SENDING iken: bu zamana kadar bir worker'a ait
+    locked_until = Column(DateTime)
+    # her claim'de yenilenir; sonucu sadece kaydı o an tutan worker yazabilir
+    lease_token = Column(UUID(as_uuid=True))
+
+    last_error = Column(String(500))
+    response = Column(JSONB)
+
+    created_user = Column(UUID(as_uuid=True))
+    created_at = Column(DateTime, server_default=func.now())
+    sent_at = Column(DateTime)
+
+    __table_args__ = (
+        # dispatcher sadece bekleyen kayıtları tarar
+        Index(
+            "ix_mikro_outbox_due",
+            "next_attempt_at",
+            postgresql_where=text("status IN ('PENDING', 'SENDING')")
+        ),
+    )
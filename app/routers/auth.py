@@ -1,19 +1,26 @@
-from typing import Generator, Optional
+from typing import Generator, List, Optional
 from zoneinfo import ZoneInfo
 from fastapi import APIRouter, Depends, HTTPException, Query, Response,Request
-from sqlalchemy import text
+from sqlalchemy import select, text
 from sqlalchemy.orm import Session
 from app.core.session import SessionContext
 from app.db.session import SessionLocal
 from app.dependencies.auth import require_master
 from app.models.master.master import AdminUser, Company, License
-from app.core.security import hash_password, verify_password, create_access_token
+from app.core.security import hash_password, verify_and_rehash, create_access_token
 from app.core.logger import logger
 from app.core.auth_context import get_current_token
 from app.core.security import decode_access_token
 from datetime import datetime, timedelta, timezone
 
+from app.services.login_index import (
+    check_login_index,
+    rebuild_all_login_indexes,
+    rebuild_login_index,
+)
+from app.schemas.master import AdminUserOut, CompanyOut, LicenseOut
 from app.services.tenant_service import connect_tenant_by_vergiNo
+from app.utils.db_helpers import PageParams, keyset_page, page_params
 
 
 router = APIRouter(prefix="/admin", tags=["Admin Auth"])
@@ -132,9 +139,17 @@ def admin_login(
     db: Session = Depends(get_db),
 ):
     admin = db.query(AdminUser).filter(AdminUser.email == email).first()
-    if not admin or not verify_password(password, admin.password_hash):
+    if not admin:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    valid, new_hash = verify_and_rehash(password, admin.password_hash)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    # bcrypt cost / şema değiştiyse aynı commit ile yeni hash yazılır
+    if new_hash:
+        admin.password_hash = new_hash
+
     admin.last_login_at = datetime.now(timezone.utc)
     db.commit()
     db.refresh(admin)
@@ -237,37 +252,33 @@ def get_admin_details(
     }
 """
 
-@router.get("/all-companies")
-def get_all_companies(db: Session = Depends(get_db)):
-    companies = db.query(Company).all()
+@router.get("/all-companies", response_model=List[CompanyOut])
+def get_all_companies(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    db: Session = Depends(get_db),
+):
+    companies = keyset_page(db, select(Company), [Company.vergi_no], page, response)
 
-    if not companies:
+    if not companies and not page.cursor:
         raise HTTPException(
             status_code=404,
             detail="No companies found"
         )
 
-    return [
-        {
-            "id": str(company.id),
-            "name": company.name,
-            "vergi_no": company.vergi_no,
-            "company_code": company.company_code,
-            "status": company.status,              # enum / string
-            "status_message": company.status_message,
-            "created_at": company.created_at.isoformat()
-            if company.created_at else None,
-        }
-        for company in companies
-    ]
+    return companies
 
   
       
 
 
-@router.get("/all-users")
-def get_all_adminusers(db: Session = Depends(get_db)):
-    admins = db.query(AdminUser).all()
+@router.get("/all-users", response_model=List[AdminUserOut])
+def get_all_adminusers(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    db: Session = Depends(get_db),
+):
+    admins = keyset_page(db, select(AdminUser), [AdminUser.username], page, response)
     return [
         {
             "id": str(admin.id),
@@ -419,16 +430,66 @@ def admin_firm_init(
         tenant_db.close()
 
 
+# ---------------------------------
+# tenant login index (email / kullanıcı adı -> tenant)
+# ---------------------------------
+
+@router.post("/login-index/rebuild")
+def login_index_rebuild(
+    vergi_no: Optional[str] = None,
+    db: Session = Depends(get_db),
+    session: SessionContext = Depends(require_master),
+):
+    """
+    vergi_no verilirse sadece o tenant, verilmezse tüm tenantlar yeniden indexlenir.
+    Tüm tenantlarda hata veren tenant atlanır, sonuçta "error" alanıyla döner.
+    """
+    try:
+        if vergi_no:
+            return [rebuild_login_index(db, vergi_no)]
+
+        return rebuild_all_login_indexes(db)
+
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"LOGIN INDEX REBUILD FAILED | vergi_no={vergi_no} | {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/login-index/check")
+def login_index_check(
+    vergi_no: str,
+    db: Session = Depends(get_db),
+    session: SessionContext = Depends(require_master),
+):
+    try:
+        return check_login_index(db, vergi_no)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # ---------------------------------
 # licences tablosu CRUD işlemleri
 # ---------------------------------
 
 # GET ALL LICENSE
-@router.get("/get-all-license")
-def get_all_license(db: Session = Depends(get_db)):
-    licenses = db.query(License).all()
+@router.get("/get-all-license", response_model=List[LicenseOut])
+def get_all_license(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    db: Session = Depends(get_db),
+):
+    # uq_company_module_license index'i
+    licenses = keyset_page(
+        db,
+        select(License),
+        [License.company_id, License.module_id],
+        page,
+        response,
+    )
 
-    if not licenses:
+    if not licenses and not page.cursor:
         raise HTTPException(
             status_code=404,
             detail="any licence found"
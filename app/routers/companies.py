@@ -1,5 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from typing import List
 
 from app.db.session import SessionLocal
 from app.dependencies.auth import require_master
@@ -9,6 +11,8 @@ from app.models.master.master import Company
 from app.models.tenant.tenant import User
 from app.services.get_current_user import get_current_user
 from app.services.company_service import create_company
+from app.schemas.master import CompanyOut
+from app.utils.db_helpers import PageParams, keyset_page, page_params
 from sqlalchemy.exc import SQLAlchemyError
 
 
@@ -69,13 +73,15 @@ def create_company_endpoint(
 # =====================================================
 
 
-@router.get("/get-all-companies")
+@router.get("/get-all-companies", response_model=List[CompanyOut])
 def get_all_companies(
+    response: Response,
+    page: PageParams = Depends(page_params),
     db: Session = Depends(get_db)
 ):
-    companies = db.query(Company).all()
+    companies = keyset_page(db, select(Company), [Company.vergi_no], page, response)
 
-    if not companies:
+    if not companies and not page.cursor:
         raise HTTPException(
             status_code=400,
             detail="herhangi bir şirket bulunamadı"
@@ -88,7 +94,7 @@ def get_all_companies(
 # GET COMPANIES BY ID - FİRMA VERGI NO İLE
 # =====================================================
 
-@router.get("/get-companies-by-id")
+@router.get("/get-companies-by-id", response_model=CompanyOut)
 def get_companies_by_id(
     vergi_no:str,
     db: Session = Depends(get_db)
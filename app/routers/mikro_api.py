@@ -1,12 +1,18 @@
+import asyncio
 import json
-import requests
+import httpx
 from fastapi import HTTPException
 
 from typing import Any, Dict, Optional
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 
+from app.core.config import settings as app_settings
 from app.models.tenant.tenant import MikroApiSettings
+from app.services.mikro_async import LANE_INTERACTIVE, MikroQueueTimeout, mikro_async_client
+from app.services.mikro_breaker import CircuitOpenError, mikro_breakers
+from app.services.mikro_cache import canonical_body_hash, mikro_response_cache
+from app.services.mikro_singleflight import mikro_singleflight
 from app.utils.mikro_main_file import build_mikro_request
 
 
@@ -29,14 +35,14 @@ def get_mikro_settings(db: Session, firma_guid):
     return settings
 
 
-def call_mikro_api(
-    *,
-    db: Session,
-    firma_guid,
+def prepare_mikro_call(
+    settings: MikroApiSettings,
     endpoint: str,
-    body: Optional[Dict[str ,Any]] = None
-    ):
-    settings = get_mikro_settings(db, firma_guid)
+    body: Optional[Dict[str, Any]] = None
+):
+    """
+    (server_key, url, payload) döner. Sync ve async client aynı isteği üretir.
+    """
     base_url, mikro_auth = build_mikro_request(settings)
 
     url = f"{base_url}/{endpoint}"
@@ -48,20 +54,232 @@ def call_mikro_api(
     if body:
         payload.update(body)
 
+    # keep-alive: aynı Mikro sunucusuna giden çağrılar bağlantıyı paylaşır
+    server_key = (settings.api_protocol or "http", settings.api_ip, settings.api_port)
+
+    return server_key, url, payload
+
+
+class MikroNotAttempted(HTTPException):
+    """
+    Çağrı Mikro'ya hiç gitmedi (circuit açık / sırada süre doldu).
+    Outbox bunu deneme saymaz, Retry-After sonra tekrar dener.
+    """
+
+
+def circuit_open_exception(e: CircuitOpenError) -> HTTPException:
+    return MikroNotAttempted(
+        status_code=503,
+        detail=(
+            "Mikro sunucusuna şu an ulaşılamıyor, "
+            f"{e.retry_after} sn sonra tekrar denenecek"
+        ),
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+
+def mikro_busy_exception() -> HTTPException:
+    return MikroNotAttempted(
+        status_code=503,
+        detail="Mikro sunucusu meşgul, çağrı sırada beklerken süre doldu",
+        headers={"Retry-After": "5"}
+    )
+
+
+def is_breaker_failure(e: Exception) -> bool:
+    """
+    Bağlantı / timeout / 5xx sunucu hatasıdır; 4xx isteğin kendisiyle ilgili.
+    """
+    response = getattr(e, "response", None)
+
+    if response is not None and getattr(response, "status_code", 500) < 500:
+        return False
+
+    return True
+
+
+async def fetch_mikro_response_async(
+    *,
+    settings: MikroApiSettings,
+    endpoint: str,
+    body: Optional[Dict[str, Any]] = None,
+    tenant: Optional[str] = None,
+    lane: str = LANE_INTERACTIVE
+) -> httpx.Response:
+    """
+    Mikro cevabı beklenirken worker thread tutulmaz.
+    settings önceden (threadpool'da) okunmuş olmalı.
+    lane: senkron / outbox gibi arka plan işleri LANE_BACKGROUND verir.
+    """
+    server_key, url, payload = prepare_mikro_call(settings, endpoint, body)
+    # serileştirme hatası Mikro hatası değil: breaker'a dokunmadan çıkar
+    content = json.dumps(payload)
+
+    breaker = mikro_breakers.get(server_key, tenant)
+
+    try:
+        breaker.before_call()
+    except CircuitOpenError as e:
+        raise circuit_open_exception(e)
+
     try:
-        response = requests.post(
+        response = await mikro_async_client.post(
+            server_key,
             url,
-            data=json.dumps(payload),
+            lane=lane,
+            content=content,
             headers={
                 "Content-Type": "application/json; charset=utf-8"
             },
-            timeout=30
         )
         response.raise_for_status()
-    except requests.RequestException as e:
+    except MikroQueueTimeout:
+        # Mikro'ya gidilmedi, sunucu hatası sayılmaz
+        breaker.abort()
+        raise mikro_busy_exception()
+    except asyncio.TimeoutError:
+        breaker.record_failure("timeout")
+        raise HTTPException(
+            status_code=504,
+            detail="Mikro API çağrısı zaman aşımına uğradı"
+        )
+    except httpx.HTTPError as e:
+        if is_breaker_failure(e):
+            breaker.record_failure(str(e) or type(e).__name__)
+        else:
+            breaker.record_success()
+
+        raise HTTPException(
+            status_code=502,
+            detail=f"Mikro API çağrısı başarısız: {str(e)}"
+        )
+    except asyncio.CancelledError:
+        breaker.abort()
+        raise
+    except Exception as e:
+        # beklenmeyen hata: HALF_OPEN probe'u askıda kalmasın
+        breaker.record_failure(str(e) or type(e).__name__)
+        raise
+
+    breaker.record_success()
+
+    return response
+
+
+async def call_mikro_api_async(
+    *,
+    settings: MikroApiSettings,
+    endpoint: str,
+    body: Optional[Dict[str, Any]] = None,
+    tenant: Optional[str] = None,
+    lane: str = LANE_INTERACTIVE
+):
+    """
+    tenant verilirse:
+    - MIKRO_CACHE_TTLS içindeki endpointler tenant bazında cache'lenir
+    - salt okunur endpointlerde eş zamanlı aynı istekler tek çağrıda birleşir
+    """
+    async def fetch():
+        response = await fetch_mikro_response_async(
+            settings=settings,
+            endpoint=endpoint,
+            body=body,
+            tenant=tenant,
+            lane=lane
+        )
+        return response.json(), len(response.content)
+
+    if tenant is None:
+        data, _ = await fetch()
+        return data
+
+    if is_coalescable_endpoint(endpoint):
+        flight_key = (tenant, endpoint, canonical_body_hash(body))
+        upstream = fetch
+
+        async def fetch():
+            return await mikro_singleflight.do(tenant, flight_key, upstream)
+
+    return await mikro_response_cache.get_or_fetch(tenant, endpoint, body, fetch)
+
+
+async def open_mikro_stream_async(
+    *,
+    settings: MikroApiSettings,
+    endpoint: str,
+    body: Optional[Dict[str, Any]] = None,
+    tenant: Optional[str] = None,
+    lane: str = LANE_INTERACTIVE
+):
+    """
+    Büyük cevaplar için: gövde okunmadan (response, close) döner.
+    close() mutlaka çağrılmalı (bağlantı ve sunucu slotu onu bekler).
+    """
+    server_key, url, payload = prepare_mikro_call(settings, endpoint, body)
+    # serileştirme hatası Mikro hatası değil: breaker'a dokunmadan çıkar
+    content = json.dumps(payload)
+
+    breaker = mikro_breakers.get(server_key, tenant)
+
+    try:
+        breaker.before_call()
+    except CircuitOpenError as e:
+        raise circuit_open_exception(e)
+
+    try:
+        response, close = await mikro_async_client.open_stream(
+            server_key,
+            url,
+            lane=lane,
+            content=content,
+            headers={
+                "Content-Type": "application/json; charset=utf-8"
+            },
+        )
+    except MikroQueueTimeout:
+        # Mikro'ya gidilmedi, sunucu hatası sayılmaz
+        breaker.abort()
+        raise mikro_busy_exception()
+    except asyncio.TimeoutError:
+        breaker.record_failure("timeout")
+        raise HTTPException(
+            status_code=504,
+            detail="Mikro API çağrısı zaman aşımına uğradı"
+        )
+    except httpx.HTTPError as e:
+        breaker.record_failure(str(e) or type(e).__name__)
         raise HTTPException(
             status_code=502,
             detail=f"Mikro API çağrısı başarısız: {str(e)}"
         )
+    except asyncio.CancelledError:
+        breaker.abort()
+        raise
+    except Exception as e:
+        # beklenmeyen hata: HALF_OPEN probe'u askıda kalmasın
+        breaker.record_failure(str(e) or type(e).__name__)
+        raise
+
+    if response.status_code >= 400:
+        await close()
+
+        if response.status_code >= 500:
+            breaker.record_failure(f"HTTP {response.status_code}")
+        else:
+            breaker.record_success()
+
+        raise HTTPException(
+            status_code=502,
+            detail=f"Mikro API çağrısı başarısız: HTTP {response.status_code}"
+        )
 
-    return response.json()
+    breaker.record_success()
+
+    return response, close
+
+
+def is_coalescable_endpoint(endpoint: str) -> bool:
+    return (
+        endpoint in app_settings.MIKRO_CACHE_TTLS
+        or endpoint in app_settings.MIKRO_COALESCE_ENDPOINTS
+    )
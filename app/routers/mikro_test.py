@@ -1,15 +1,28 @@
-from fastapi import APIRouter, Body, Depends, HTTPException
+import asyncio
+import json
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy import select
+from starlette.background import BackgroundTask
 from sqlalchemy.orm import Session
-from typing import Optional, Dict, Any
+from typing import List, Optional, Dict, Any
+from app.core.config import settings
 from app.core.session import SessionContext
 from app.db.master import get_master_db
 from app.db.session import SessionLocal
 from app.db.tenant import get_tenant_db
 from app.dependencies.auth import require_tenant
 from app.models.tenant.tenant import Firm
-from app.routers.mikro_api import call_mikro_api
+from app.routers.mikro_api import (
+    call_mikro_api_async,
+    get_mikro_settings,
+    open_mikro_stream_async,
+)
+from app.schemas.mikro_api import MikroBatchItem, MikroBatchRequest
+from app.services.mikro_settings_cache import resolve_tenant_mikro_settings
 from app.services.tenant_service import connect_tenant_by_vergiNo
+from app.utils.json_stream import JsonArrayItemStream
 
 router = APIRouter(prefix="/test", tags=["Mikro Test"])
 
@@ -22,35 +35,179 @@ def get_db():
 
 
 @router.post("/mikro/{endpoint}")
-def test_mikro_call(
+async def test_mikro_call(
     endpoint: str,
     body: Optional[Dict[str, Any]] = Body(None),
-    tenant_db: Session = Depends(get_tenant_db),
+    session: SessionContext = Depends(require_tenant),
 ):
+    db_name = session.tenant_id
+    mikro_settings = await resolve_tenant_mikro_settings(db_name)
+
     # --------------------------------------------------
-    # Tenant DB'den firma_guid al
-    # boş veri olabileceği için Kilitli olmayanı aldık.
+    # Mikro API çağrısı (event loop üzerinde bekler)
     # --------------------------------------------------
-    firm = tenant_db.execute(
-        select(Firm).where(Firm.firma_kilitli != True) 
-    ).scalar_one_or_none()
+    data = await call_mikro_api_async(
+        settings=mikro_settings,
+        endpoint=endpoint,
+        body=body,
+        tenant=db_name
+    )
 
-    if not firm:
+    # Mikro cevabı zaten JSON tipleri: jsonable_encoder'da satır satır gezilmesin
+    return ORJSONResponse(data)
+
+# --------------------------------------------------
+# BATCH: birden fazla APIMethods çağrısı tek istekte
+# --------------------------------------------------
+
+@router.post("/mikro-batch")
+async def test_mikro_batch(
+    payload: MikroBatchRequest,
+    session: SessionContext = Depends(require_tenant),
+):
+    """
+    Mikro ayarları bir kez okunur, kalemler sınırlı paralellikle çalışır.
+    Bir kalemin hatası diğerlerini etkilemez; sonuçlar istek sırasıyla döner.
+    """
+    if len(payload.items) > settings.MIKRO_BATCH_MAX_ITEMS:
         raise HTTPException(
-            status_code=500,
-            detail="Tenant DB içinde firma kaydı bulunamadı"
+            status_code=400,
+            detail=f"Bir batch içinde en fazla {settings.MIKRO_BATCH_MAX_ITEMS} çağrı olabilir"
         )
 
-    firma_guid = str(firm.firma_Guid)
+    db_name = session.tenant_id
+    mikro_settings = await resolve_tenant_mikro_settings(db_name)
+    fan_out = asyncio.Semaphore(settings.MIKRO_BATCH_CONCURRENCY)
 
-    # --------------------------------------------------
-    # Mikro API çağrısı
-    # --------------------------------------------------
-    return call_mikro_api(
-        db=tenant_db,
-        firma_guid=firma_guid,
+    async def run_item(item: MikroBatchItem):
+        async with fan_out:
+            try:
+                data = await call_mikro_api_async(
+                    settings=mikro_settings,
+                    endpoint=item.endpoint,
+                    body=item.body,
+                    tenant=db_name
+                )
+                return {"endpoint": item.endpoint, "ok": True, "data": data}
+
+            except HTTPException as e:
+                return {
+                    "endpoint": item.endpoint,
+                    "ok": False,
+                    "status_code": e.status_code,
+                    "error": e.detail,
+                }
+
+            except ValueError as e:
+                # Mikro cevabı JSON değil
+                return {
+                    "endpoint": item.endpoint,
+                    "ok": False,
+                    "status_code": 502,
+                    "error": f"Mikro cevabı okunamadı: {str(e)}",
+                }
+
+    results = await asyncio.gather(*(run_item(item) for item in payload.items))
+
+    return ORJSONResponse({
+        "count": len(results),
+        "failed": sum(1 for result in results if not result["ok"]),
+        "results": results,
+    })
+
+# --------------------------------------------------
+# STREAM: büyük Mikro cevaplarını parça parça aktarır
+# --------------------------------------------------
+
+def parse_where(where: List[str]) -> Dict[str, str]:
+    filters = {}
+
+    for condition in where:
+        field, separator, value = condition.partition("=")
+        if not separator or not field:
+            raise HTTPException(
+                status_code=400,
+                detail=f"where parametresi alan=değer biçiminde olmalı: {condition}"
+            )
+        filters[field] = value
+
+    return filters
+
+
+@router.post("/mikro-stream/{endpoint}")
+async def test_mikro_stream(
+    endpoint: str,
+    body: Optional[Dict[str, Any]] = Body(None),
+    array_key: Optional[str] = Query(None, description="Satırların bulunduğu dizi anahtarı, ör. Data"),
+    where: List[str] = Query([], description="alan=değer, birden fazla verilebilir"),
+    fields: Optional[str] = Query(None, description="virgülle ayrılmış alan listesi"),
+    session: SessionContext = Depends(require_tenant),
+):
+    """
+    array_key yoksa Mikro cevabı olduğu gibi (byte byte) aktarılır.
+    array_key verilirse dizi elemanları tek tek parse edilir, where / fields
+    uygulanıp NDJSON olarak aktarılır. Her iki durumda da bellekte tüm
+    cevap tutulmaz.
+    """
+    filters = parse_where(where)
+    projection = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+
+    db_name = session.tenant_id
+    mikro_settings = await resolve_tenant_mikro_settings(db_name)
+
+    response, close = await open_mikro_stream_async(
+        settings=mikro_settings,
         endpoint=endpoint,
-        body=body
+        body=body,
+        tenant=db_name
+    )
+
+    chunk_size = settings.MIKRO_STREAM_CHUNK_SIZE
+
+    async def passthrough():
+        try:
+            async for chunk in response.aiter_bytes(chunk_size):
+                yield chunk
+        finally:
+            await close()
+
+    async def filtered():
+        parser = JsonArrayItemStream(array_key)
+
+        try:
+            async for chunk in response.aiter_bytes(chunk_size):
+                lines = []
+
+                for item in parser.feed(chunk):
+                    if filters and not (
+                        isinstance(item, dict)
+                        and all(str(item.get(field)) == value for field, value in filters.items())
+                    ):
+                        continue
+
+                    if projection and isinstance(item, dict):
+                        item = {field: item.get(field) for field in projection}
+
+                    lines.append(json.dumps(item, ensure_ascii=False, default=str))
+
+                if lines:
+                    yield ("\n".join(lines) + "\n").encode("utf-8")
+        finally:
+            await close()
+
+    # generator hiç başlamazsa (client erken koparsa) finally çalışmaz;
+    # background da close'u çağırır, close idempotent
+    if array_key:
+        return StreamingResponse(
+            filtered(),
+            media_type="application/x-ndjson",
+            background=BackgroundTask(close),
+        )
+
+    return StreamingResponse(
+        passthrough(),
+        media_type=response.headers.get("content-type", "application/json"),
+        background=BackgroundTask(close),
     )
 
 """
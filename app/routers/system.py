@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends
+
+from app.core.session import SessionContext
+from app.dependencies.auth import require_master
+from app.services.mikro_async import mikro_async_client
+from app.services.mikro_breaker import mikro_breakers
+from app.services.mikro_cache import mikro_response_cache
+from app.services.mikro_http import mikro_http_metrics
+from app.services.mikro_outbox import mikro_outbox_dispatcher
+from app.services.mikro_settings_cache import mikro_settings_cache
+from app.services.mikro_singleflight import mikro_singleflight
+from app.services.query_cache import tenant_query_cache
+from app.services.tenant_service import tenant_engine_stats
+
+router = APIRouter(prefix="/system", tags=["System"])
+
+
+# =====================================================
+# MIKRO HTTP METRICS
+# =====================================================
+
+@router.get("/mikro-metrics")
+def mikro_metrics(
+    session: SessionContext = Depends(require_master),
+):
+    return {
+        "async_client": mikro_async_client.stats(),
+        "response_cache": mikro_response_cache.stats(),
+        "settings_cache": mikro_settings_cache.stats(),
+        "coalescing": mikro_singleflight.stats(),
+        "circuit_breakers": mikro_breakers.stats(),
+        "outbox": mikro_outbox_dispatcher.stats(),
+        "connections": mikro_http_metrics.snapshot(),
+        "tenant_engines": tenant_engine_stats(),
+        "query_cache": tenant_query_cache.stats(),
+    }
@@ -1,11 +1,14 @@
-from datetime import date, timedelta
+from datetime import timedelta
 import hashlib
+import json
 import uuid
+from anyio import from_thread
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import UUID, select, text
-from typing import Optional, Generator
-from passlib.context import CryptContext
+from sqlalchemy import UUID, func, select, text
+from typing import List, Optional, Generator
 from sqlalchemy.exc import IntegrityError
 
 from sqlalchemy.exc import SQLAlchemyError
@@ -17,11 +20,51 @@ from app.db.router import get_tenant_db_from_session
 from app.db.session import SessionLocal
 from app.db.tenant_engine import get_engine_by_db_name
 from app.dependencies.auth import require_master, require_tenant
-from app.models.tenant.tenant import Branch, Firm, MikroApiSettings, Role, User, UserFavorite
-from app.schemas.mikro_api import MikroApiUpdateSchema
+from app.models.tenant.tenant import Branch, Firm, MikroApiSettings, MikroOutbox, Role, User, UserFavorite
+from app.schemas.mikro_api import (
+    MikroApiSettingsOut,
+    MikroApiUpdateSchema,
+    MikroOutboxOut,
+    MikroOutboxRequest,
+    MikroSyncStateOut,
+)
+from app.schemas.tenant import (
+    BranchFieldsOut,
+    BranchOut,
+    FirmOut,
+    RoleListOut,
+    UserFavoriteOut,
+    UserFieldsOut,
+    UserOut,
+)
+from app.services.entity_versions import etag_matches, get_entity_versions, make_etag
 from app.services.get_current_user import get_current_user
+from app.services.login_index import index_user, lookup_login, unindex_user
+from app.services.mikro_breaker import mikro_breakers
+from app.services.mikro_cache import mikro_response_cache
+from app.services.mikro_outbox import enqueue_mikro_write, mikro_outbox_dispatcher
+from app.services.mikro_personel_sync import get_sync_states, sync_mikro_personel
+from app.services.mikro_replica import get_replica_states, lookup_replica, refresh_mikro_replica, search_replica
+from app.services.mikro_settings_cache import mikro_settings_cache
+from app.services.query_cache import tenant_query_cache
+from app.services.tenant_export import EXPORT_FORMATS, build_export_query, stream_export
 from app.services.tenant_service import connect_tenant_by_vergiNo
-from app.core.security import create_access_token, decode_access_token
+from app.services.user_import import import_users, read_import_body
+from app.utils.db_helpers import (
+    PageParams,
+    field_selector,
+    keyset_page,
+    page_params,
+    project_rows,
+    select_fields,
+)
+from app.core.security import (
+    create_access_token,
+    decode_access_token,
+    hash_password,
+    verify_and_rehash,
+    verify_dummy_password,
+)
 from fastapi import Depends, HTTPException, status
 from jose import jwt, JWTError
 from datetime import datetime,timezone
@@ -36,20 +79,6 @@ bearer_scheme = HTTPBearer()
 
 router = APIRouter(prefix="/tenant", tags=["Tenant DB"])
 
-# =====================================================
-# api_pw_non_hash kolonunu generate_mikro_md5 
-# =====================================================
-
-def generate_mikro_md5(password: str) -> str:
-    """
-    Node.js karşılığı:
-    CryptoJS.MD5(`${YYYY-MM-DD} ${password}`)
-    """
-    current_date = date.today().strftime("%Y-%m-%d")
-    raw = f"{current_date} {password}"
-    return hashlib.md5(raw.encode("utf-8")).hexdigest()
-
-
 # =====================================================
 # MASTER DB SESSION 
 # =====================================================
@@ -62,31 +91,65 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 # =====================================================
-# PASSWORD HASHING
+# PASSWORD VERIFY (+ gerekirse rehash)
 # =====================================================
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+def verify_tenant_password(tenant_db: Session, user: User, password: str) -> bool:
+    """
+    bcrypt cost / şema değiştiyse başarılı login'de kullanici_pw yeniden hashlenir.
+    """
+    valid, new_hash = verify_and_rehash(password, user.kullanici_pw)
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    if valid and new_hash:
+        try:
+            user.kullanici_pw = new_hash
+            tenant_db.commit()
+        except SQLAlchemyError as e:
+            # Login’i bozma, bir sonraki login'de tekrar denenir
+            tenant_db.rollback()
+            logger.warning(f"PASSWORD REHASH FAILED | user_id={user.kullanici_Guid} | {e}")
 
-# =====================================================
-# PASSWORD VERIFY
-# =====================================================
+    return valid
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+def get_role_id(tenant_db: Session, role_name: str, *, tenant: str):
+    return tenant_query_cache.get_or_load(
+        tenant,
+        "role_id",
+        role_name,
+        ("roles",),
+        lambda: tenant_db.execute(
+            text("SELECT id FROM roles WHERE name = :name"),
+            {"name": role_name}
+        ).scalar(),
+    )
 
-def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
 
 
-def get_role_id(tenant_db: Session, role_name: str):
-    return tenant_db.execute(
-        text("SELECT id FROM roles WHERE name = :name"),
-        {"name": role_name}
-    ).scalar()
+# =====================================================
+# LOGIN INDEX (MASTER)
+# =====================================================
 
+def sync_login_index(master_db: Session, tenant_db_name: str, user: User) -> None:
+    """
+    Kullanıcı tenant DB'de commit edildikten sonra çağrılır.
+    Index yazılamazsa kullanıcı işlemi bozulmaz, tutarsızlık
+    /admin/login-index/check ile görülür ve rebuild ile düzeltilir.
+    """
+    try:
+        index_user(
+            master_db,
+            tenant_db_name=tenant_db_name,
+            user_id=user.kullanici_Guid,
+            email=user.kullanici_EMail,
+            username=user.kullanici_name,
+        )
+        master_db.commit()
+    except SQLAlchemyError as e:
+        master_db.rollback()
+        logger.warning(
+            f"LOGIN INDEX UPDATE FAILED | tenant={tenant_db_name} | user_id={user.kullanici_Guid} | {e}"
+        )
 
 
 # =====================================================
@@ -125,6 +188,39 @@ def get_tenant_db(
         tenant_db.close()
 
 
+# =====================================================
+# ETAG (entity versiyonları)
+# =====================================================
+
+def tenant_etag(*entities: str):
+    """
+    GET endpointleri için dependency. ETag entity sayaçlarından üretilir
+    (tablo verisi okunmaz); If-None-Match güncelse endpoint çalışmadan 304 döner.
+    Salt okunur: entity_versions tablosu ve trigger'lar provisioning'de oluşur.
+    """
+    def dependency(
+        request: Request,
+        response: Response,
+        tenant_db: Session = Depends(get_tenant_db),
+        session: SessionContext = Depends(require_tenant),
+    ) -> str:
+        etag = make_etag(
+            get_entity_versions(tenant_db, entities),
+            request.url.path,
+            "&".join(sorted(f"{key}={value}" for key, value in request.query_params.multi_items())),
+            str(session.user_id),
+        )
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=304, headers=headers)
+
+        response.headers.update(headers)
+        return etag
+
+    return dependency
+
+
 # =====================================================
 # yardımcı fonk.
 # =====================================================
@@ -667,7 +763,11 @@ def insert_firm(
 # TENANT ALL FİRM LİSTESİ - FİRMA VERGİ NO İLE
 # =====================================================
 
-@router.get("/get-all-firmsby-vergiNo")
+@router.get(
+    "/get-all-firmsby-vergiNo",
+    response_model=FirmOut,
+    dependencies=[Depends(tenant_etag("firms"))],
+)
 def Get_All_Firms(
     #vergiNo: str, # 10 haneli olacak ve required olacak
     tenant_db: Session = Depends(get_tenant_db)
@@ -710,6 +810,7 @@ def user_register_to_firm(
     longName: Optional[str] = None,
     cepTel: Optional[str] = None,
     email: Optional[str] = None,
+    master_db: Session = Depends(get_db),
 ):
     tenant_db: Session = connect_tenant_by_vergiNo(vergi_no)
 
@@ -725,17 +826,6 @@ def user_register_to_firm(
                 detail="Bu vergi numarasına ait firma bulunamadı."
             )
 
-        # Yeni kullanıcı numarası
-        user_no = tenant_db.execute(
-            text("SELECT COALESCE(MAX(kullanici_no), 0) + 1 FROM users")
-        ).scalar()
-
-        if not user_no:
-            raise HTTPException(
-                status_code=500,
-                detail="Kullanıcı numarası üretilemedi."
-            )
-
         # Kullanıcı oluştur
         new_user = User(
             kullanici_Guid=uuid.uuid4(),
@@ -747,7 +837,6 @@ def user_register_to_firm(
             kullanici_LongName=longName,
             kullanici_EMail=email,
             kullanici_Ceptel=cepTel,
-            kullanici_no=user_no,
             kullanici_create_user=None,  # REGISTER → SYSTEM
         )
 
@@ -755,6 +844,8 @@ def user_register_to_firm(
         tenant_db.commit()
         tenant_db.refresh(new_user)
 
+        sync_login_index(master_db, vergi_no, new_user)
+
         return {
             "user_id": str(new_user.kullanici_Guid),
             "username": new_user.kullanici_name,
@@ -773,6 +864,38 @@ def user_register_to_firm(
     finally:
         tenant_db.close()
 
+# =====================================================
+# TOPLU KULLANICI IMPORT
+# =====================================================
+
+@router.post("/user-bulk-import")
+async def user_bulk_import(
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format", pattern="^(csv|ndjson)$"),
+    dry_run: bool = Query(False, description="sadece doğrula, kaydetme"),
+    session: SessionContext = Depends(require_tenant),
+):
+    """
+    Body: CSV (başlıklı) veya NDJSON dosyasının kendisi; kolonlar
+    username, password, email (zorunlu), longName, cepTel, role, kimlik_no.
+    Geçerli satırlar eklenir, hatalı satırlar "errors" içinde satır / alan bazında döner.
+    format verilmezse Content-Type'tan anlaşılır (varsayılan csv).
+    """
+    if fmt is None:
+        content_type = request.headers.get("content-type", "")
+        fmt = "ndjson" if "json" in content_type else "csv"
+
+    body = await read_import_body(request)
+
+    return await run_in_threadpool(
+        import_users,
+        session.tenant_id,
+        body,
+        fmt=fmt,
+        dry_run=dry_run,
+        created_user=session.user_id,
+    )
+
 # =====================================================
 # TENANT-MIKRO USER REGISTER 
 # =====================================================
@@ -789,8 +912,9 @@ def user_register_with_mikro(
     cepTel: Optional[str] = None,
     email: Optional[str] = None,
     tenant_db: Session = Depends(get_tenant_db),
+    master_db: Session = Depends(get_db),
+    session: SessionContext = Depends(require_tenant),
 ):
-
     if not mikroPersonelGuid and not mikroPersonelKod:
         raise HTTPException(
             status_code=400,
@@ -847,17 +971,6 @@ def user_register_with_mikro(
                 detail="Bu firma bulunamadı."
             )
 
-        # Yeni kullanıcı numarası
-        user_no = tenant_db.execute(
-            text("SELECT COALESCE(MAX(kullanici_no), 0) + 1 FROM users")
-        ).scalar()
-
-        if not user_no:
-            raise HTTPException(
-                status_code=500,
-                detail="Kullanıcı numarası üretilemedi."
-            )
-
         # Kullanıcı oluştur
         new_user = User(
         kullanici_Guid=uuid.uuid4(),
@@ -869,7 +982,6 @@ def user_register_with_mikro(
         kullanici_LongName=longName,
         kullanici_EMail=email,
         kullanici_Ceptel=cepTel,
-        kullanici_no=user_no,
         kullanici_create_user=None,
         mikro_personel_guid=parsed_mikro_guid,
         mikro_personel_kod=mikroPersonelKod,
@@ -881,6 +993,8 @@ def user_register_with_mikro(
         tenant_db.commit()
         tenant_db.refresh(new_user)
 
+        sync_login_index(master_db, session.tenant_id, new_user)
+
         return {
             "user_id": str(new_user.kullanici_Guid),
             "username": new_user.kullanici_name,
@@ -960,7 +1074,8 @@ def user_update_to_firmby_vergino(
     longName: Optional[str] = None, # isteğe bağlı
     cepTel: Optional[str] = None,  # isteğe bağlı ama bunu number olarak alıp sonra str olarak kaydet
     email: Optional[str] = None,  # isteğe bağlı
-    session: SessionContext = Depends(require_tenant)
+    session: SessionContext = Depends(require_tenant),
+    master_db: Session = Depends(get_db),
 ):
     tenant_db: Session = connect_tenant_by_vergiNo(vergi_no)
 
@@ -975,16 +1090,6 @@ def user_update_to_firmby_vergino(
                 status_code=404,
                 detail="Bu vergi numarasına ait firma bulunamadı."
             )
-        
-        user_no = tenant_db.execute(
-            text("SELECT COALESCE(MAX(kullanici_no), 0) + 1 FROM users")
-        ).scalar()  
-
-        if not user_no: 
-            raise HTTPException(
-                status_code=404,
-                detail="Kullanıcı numarası bulunamadı."
-            )
 
         # Kullanıcı oluştur
         new_user = User(
@@ -996,7 +1101,6 @@ def user_update_to_firmby_vergino(
             kullanici_LongName=longName,
             kullanici_EMail=email,
             kullanici_Ceptel=cepTel,
-            kullanici_no=user_no,
             kullanici_lastup_user=session.user_id,
             kullanici_lastup_date=datetime.now(timezone.utc),
             kullanici_SifreDegisim_date=datetime.now(timezone.utc)
@@ -1006,6 +1110,8 @@ def user_update_to_firmby_vergino(
         tenant_db.commit()
         tenant_db.refresh(new_user)
 
+        sync_login_index(master_db, vergi_no, new_user)
+
         return {
             "user_id": str(new_user.kullanici_Guid),
             "username": new_user.kullanici_name,
@@ -1025,6 +1131,59 @@ def user_update_to_firmby_vergino(
         tenant_db.close()
 
 
+# =====================================================
+# TENANT USER DELETE
+# =====================================================
+
+@router.delete("/user-delete/{user_id}")
+def user_delete(
+    user_id: str,
+    tenant_db: Session = Depends(get_tenant_db),
+    master_db: Session = Depends(get_db),
+    session: SessionContext = Depends(require_tenant),
+):
+    try:
+        parsed_user_id = uuid.UUID(user_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="user_id geçerli bir UUID değil"
+        )
+
+    user = tenant_db.get(User, parsed_user_id)
+
+    if not user:
+        raise HTTPException(
+            status_code=404,
+            detail="Kullanıcı bulunamadı."
+        )
+
+    try:
+        tenant_db.delete(user)
+        tenant_db.commit()
+
+    except IntegrityError:
+        tenant_db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail="Kullanıcıya bağlı kayıtlar var, silmek yerine pasife alınmalı."
+        )
+
+    try:
+        unindex_user(master_db, tenant_db_name=session.tenant_id, user_id=parsed_user_id)
+        master_db.commit()
+    except SQLAlchemyError as e:
+        master_db.rollback()
+        logger.warning(
+            f"LOGIN INDEX DELETE FAILED | tenant={session.tenant_id} | user_id={user_id} | {e}"
+        )
+
+    return {
+        "message": "Kullanıcı silindi",
+        "user_id": user_id,
+    }
+
+
 # =====================================================
 # ROLE INSERT FİRMA VERGİ NO İLE
 # =====================================================
@@ -1034,6 +1193,7 @@ def role_insert_vergino(
     name: str,
     description: str,
     tenant_db: Session = Depends(get_tenant_db),
+    session: SessionContext = Depends(require_tenant),
 ):
     try:
         new_role = Role(
@@ -1044,6 +1204,7 @@ def role_insert_vergino(
 
         tenant_db.add(new_role)
         tenant_db.commit()
+        tenant_query_cache.invalidate(session.tenant_id, "roles")
         tenant_db.refresh(new_role)
 
         return {
@@ -1080,26 +1241,38 @@ def role_insert_vergino(
 # ALL ROLES 
 # =====================================================
 
-@router.get("/get-all-roles")
+@router.get(
+    "/get-all-roles",
+    response_model=RoleListOut,
+    dependencies=[Depends(tenant_etag("roles"))],
+)
 def get_all_roles(
     tenantdb: Session = Depends(get_tenant_db),
+    session: SessionContext = Depends(require_tenant),
 ):
 
-    try:
+    def load_roles():
         roles = tenantdb.execute(
             select(Role)
         ).scalars().all()
 
+        return [
+            {
+                "id": str(role.id),
+                "name": role.name,
+                "description": role.description,
+            }
+            for role in roles
+        ]
+
+    try:
+        roles = tenant_query_cache.get_or_load(
+            session.tenant_id, "all_roles", None, ("roles",), load_roles
+        )
+
         return {
             "count": len(roles),
-            "roles": [
-                {
-                    "id": str(role.id),
-                    "name": role.name,
-                    "description": role.description,
-                }
-                for role in roles
-            ]
+            "roles": roles,
         }
     except Exception as e:
         raise HTTPException(
@@ -1134,7 +1307,7 @@ def user_login_to_firmby_vergino(
         if not user:
             raise HTTPException(status_code=401, detail="Invalid credentials")
 
-        if not verify_password(password, user.kullanici_pw):
+        if not verify_tenant_password(tenant_db, user, password):
             raise HTTPException(status_code=401, detail="Invalid credentials")
 
         #token = create_access_token({"sub": str(user.kullanici_Guid)})
@@ -1182,7 +1355,7 @@ def user_login_to_firmby_vergino2(
         if not user:
             raise HTTPException(status_code=401, detail="Invalid credentials")
 
-        if not verify_password(password, user.kullanici_pw):
+        if not verify_tenant_password(tenant_db, user, password):
             raise HTTPException(status_code=401, detail="Invalid credentials")
 
         # ================= TOKEN =================
@@ -1196,24 +1369,6 @@ def user_login_to_firmby_vergino2(
             expires_delta=timedelta(days=3)
         )
 
-        # ================= MIKRO API PASSWORD HASH =================
-        try:
-            mikro = tenant_db.execute(
-                select(MikroApiSettings).limit(1)
-            ).scalar_one_or_none()
-
-            if mikro and mikro.api_pw_non_hash:
-                api_pw = generate_mikro_md5(mikro.api_pw_non_hash)
-
-                mikro.api_pw = api_pw
-
-                tenant_db.commit()
-
-        except Exception as e:
-            # Login’i ASLA bozma
-            tenant_db.rollback()
-            print("Mikro API hash update failed:", str(e))
-
         # ================= RESPONSE =================
         return {
             "access_token": token,
@@ -1225,6 +1380,85 @@ def user_login_to_firmby_vergino2(
     finally:
         tenant_db.close()
 
+# =====================================================
+# user login (vergi no olmadan - master login index)
+# =====================================================
+
+@router.post("/user-login")
+def user_login(
+    login: str,
+    password: str,
+    master_db: Session = Depends(get_db),
+):
+    """
+    login: email veya kullanıcı adı.
+    Tenant, master'daki user_login_index'ten bulunur (1 master + eşleşen tenant sorguları).
+    Şifre her adayda doğrulanır; kullanıcı yok / pasif / şifre yanlış aynı 401'i döner.
+    409 sadece şifre birden fazla firmadaki kullanıcıyla eşleşirse döner.
+    """
+    entries = lookup_login(master_db, login)
+    matches = []
+
+    for entry in entries:
+        tenant_db: Session = connect_tenant_by_vergiNo(entry.tenant_db_name)
+
+        try:
+            user = tenant_db.execute(
+                select(User).where(
+                    User.kullanici_Guid == entry.user_id,
+                    User.kullanici_pasif == False
+                )
+            ).scalar_one_or_none()
+
+            if not user:
+                verify_dummy_password(password)
+                continue
+
+            if verify_tenant_password(tenant_db, user, password):
+                matches.append({
+                    "user_id": str(user.kullanici_Guid),
+                    "username": user.kullanici_name,
+                    "role_id": str(user.role_id) if user.role_id else None,
+                    "vergi_no": entry.tenant_db_name,
+                })
+
+        finally:
+            tenant_db.close()
+
+    if not entries:
+        verify_dummy_password(password)
+
+    if not matches:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    if len(matches) > 1:
+        raise HTTPException(
+            status_code=409,
+            detail="Bu kullanıcı birden fazla firmada kayıtlı, vergi_no ile giriş yapılmalı."
+        )
+
+    match = matches[0]
+
+    # ================= TOKEN =================
+    token = create_access_token(
+        {
+            "sub": match["user_id"],
+            "domain": "tenant",
+            "tenant_id": match["vergi_no"],
+            "role_id": match["role_id"]
+        },
+        expires_delta=timedelta(days=3)
+    )
+
+    # ================= RESPONSE =================
+    return {
+        "access_token": token,
+        "token_type": "bearer",
+        "user_id": match["user_id"],
+        "username": match["username"],
+        "vergi_no": match["vergi_no"]
+    }
+
 ## =====================================================
 # get all admin personel 
 # =====================================================
@@ -1260,96 +1494,213 @@ def tenant_logout(
 # get all admin personel 
 # =====================================================
 
-@router.get("/get-all-admins")
+@router.get(
+    "/get-all-admins",
+    response_model=List[UserFieldsOut],
+    response_model_exclude_unset=True,
+    dependencies=[Depends(tenant_etag("users", "roles"))],
+)
 def get_admin_users(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    fields: Optional[List[str]] = Depends(field_selector(UserOut)),
     tenant_db: Session = Depends(get_tenant_db),
     session: SessionContext = Depends(require_tenant),
 ):
-    admin_role_id = get_role_id(tenant_db, "ADMIN")
+    admin_role_id = get_role_id(tenant_db, "ADMIN", tenant=session.tenant_id)
 
     if not admin_role_id:
         return []
 
-    users = tenant_db.execute(
-        select(User).where(
+    users = keyset_page(
+        tenant_db,
+        select_fields(User, fields, [User.kullanici_name]).where(
             User.role_id == admin_role_id,
             User.kullanici_pasif == False
-        )
-    ).scalars().all()
+        ),
+        [User.kullanici_name],
+        page,
+        response,
+        scalars=fields is None,
+    )
 
-    return users
+    return project_rows(users, fields)
 
 # =====================================================
 # get all worker personel 
 # =====================================================
 
-@router.get("/get-all-workers")
+@router.get(
+    "/get-all-workers",
+    response_model=List[UserFieldsOut],
+    response_model_exclude_unset=True,
+    dependencies=[Depends(tenant_etag("users", "roles"))],
+)
 def get_worker_users(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    fields: Optional[List[str]] = Depends(field_selector(UserOut)),
     tenant_db: Session = Depends(get_tenant_db),
     session: SessionContext = Depends(require_tenant),
 ):
-    worker_role_id = get_role_id(tenant_db, "WORKER")
+    worker_role_id = get_role_id(tenant_db, "WORKER", tenant=session.tenant_id)
 
     if not worker_role_id:
         return []
     
-    workers = tenant_db.execute(
-        select(User).where(
+    workers = keyset_page(
+        tenant_db,
+        select_fields(User, fields, [User.kullanici_name]).where(
             User.role_id == worker_role_id,
             User.kullanici_pasif == False
-        )
-    ).scalars().all()
+        ),
+        [User.kullanici_name],
+        page,
+        response,
+        scalars=fields is None,
+    )
 
-    return workers
+    return project_rows(workers, fields)
 
 # =====================================================
 # get all worker personel 
 # =====================================================
 
-@router.get("/get-all-users")
+@router.get(
+    "/get-all-users",
+    response_model=List[UserFieldsOut],
+    response_model_exclude_unset=True,
+    dependencies=[Depends(tenant_etag("users"))],
+)
 def get_all_users(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    fields: Optional[List[str]] = Depends(field_selector(UserOut)),
     tenant_db: Session = Depends(get_tenant_db),
     session: SessionContext = Depends(require_tenant),
 ):
-    users = tenant_db.execute(
-        select(User)
-    ).scalars().all()
+    users = keyset_page(
+        tenant_db,
+        select_fields(User, fields, [User.kullanici_name]),
+        [User.kullanici_name],
+        page,
+        response,
+        scalars=fields is None,
+    )
 
-    if not users:
+    if not users and not page.cursor:
         raise HTTPException(
             status_code=404,
             detail="herhangi bir kullanıcı bulunamadı."
         )
 
-    return users
+    return project_rows(users, fields)
+
+
+# =====================================================
+# get user by guid
+# =====================================================
+
+@router.get(
+    "/get-user-by-guid",
+    response_model=UserFieldsOut,
+    response_model_exclude_unset=True,
+    dependencies=[Depends(tenant_etag("users"))],
+)
+def get_user_by_guid(
+    kullanici_Guid: uuid.UUID,
+    fields: Optional[List[str]] = Depends(field_selector(UserOut)),
+    tenant_db: Session = Depends(get_tenant_db),
+    session: SessionContext = Depends(require_tenant),
+):
+    result = tenant_db.execute(
+        select_fields(User, fields).where(User.kullanici_Guid == kullanici_Guid)
+    )
+    user = result.scalar_one_or_none() if fields is None else result.one_or_none()
+
+    if not user:
+        raise HTTPException(
+            status_code=404,
+            detail="kullanıcı bulunamadı."
+        )
+
+    return project_rows([user], fields)[0]
 
 
 # =====================================================
 # get all branches 
 # =====================================================
 
-@router.get("/get-all-branches")
+@router.get(
+    "/get-all-branches",
+    response_model=List[BranchFieldsOut],
+    response_model_exclude_unset=True,
+    dependencies=[Depends(tenant_etag("branches"))],
+)
 def get_all_branches(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    fields: Optional[List[str]] = Depends(field_selector(BranchOut)),
     tenant_db: Session = Depends(get_tenant_db),
     session: SessionContext = Depends(require_tenant),
 ):
-    branches = tenant_db.execute(
-        select(Branch)
-    ).scalars().all()
+    # uq_branch_firma_sube_no index'i
+    order_by = [Branch.sube_bag_firma, Branch.sube_no]
+    branches = keyset_page(
+        tenant_db,
+        select_fields(Branch, fields, order_by),
+        order_by,
+        page,
+        response,
+        scalars=fields is None,
+    )
 
-    if not branches:
+    if not branches and not page.cursor:
         raise HTTPException(
             status_code=404,
             detail="herhangi bir şube bulunamadı."
         )
 
-    return branches
+    return project_rows(branches, fields)
+
+# =====================================================
+# get branch by guid
+# =====================================================
+
+@router.get(
+    "/get-branch-by-guid",
+    response_model=BranchFieldsOut,
+    response_model_exclude_unset=True,
+    dependencies=[Depends(tenant_etag("branches"))],
+)
+def get_branch_by_guid(
+    sube_Guid: uuid.UUID,
+    fields: Optional[List[str]] = Depends(field_selector(BranchOut)),
+    tenant_db: Session = Depends(get_tenant_db),
+    session: SessionContext = Depends(require_tenant),
+):
+    result = tenant_db.execute(
+        select_fields(Branch, fields).where(Branch.sube_Guid == sube_Guid)
+    )
+    branch = result.scalar_one_or_none() if fields is None else result.one_or_none()
+
+    if not branch:
+        raise HTTPException(
+            status_code=404,
+            detail="şube bulunamadı."
+        )
+
+    return project_rows([branch], fields)[0]
 
 # =====================================================
 # get MikroAPI Info 
 # =====================================================
 
-@router.get("/get-all-mikro-info")
+@router.get(
+    "/get-all-mikro-info",
+    response_model=List[MikroApiSettingsOut],
+    dependencies=[Depends(tenant_etag("mikro_api_settings"))],
+)
 def get_API_Info(
     tenant_db: Session = Depends(get_tenant_db),
     session: SessionContext = Depends(require_tenant),
@@ -1379,18 +1730,29 @@ def get_API_Info(
 # GET ALL user_favorites 
 # =====================================================
 
-@router.get("/get-all-favorites")
+@router.get(
+    "/get-all-favorites",
+    response_model=List[UserFavoriteOut],
+    dependencies=[Depends(tenant_etag("user_favorites"))],
+)
 def get_all_favorites( 
+    response: Response,
+    page: PageParams = Depends(page_params),
     tenant_db: Session = Depends(get_tenant_db),
     session: SessionContext = Depends(require_tenant),
     ):
    
    try:
-       favorite_list = tenant_db.execute(
-           select(UserFavorite)
-       ).scalars().all()
+       # uq_user_favorites_user_module index'i
+       favorite_list = keyset_page(
+           tenant_db,
+           select(UserFavorite),
+           [UserFavorite.user_id, UserFavorite.module_key],
+           page,
+           response,
+       )
 
-       if not favorite_list:
+       if not favorite_list and not page.cursor:
            raise HTTPException(
                status_code=status.HTTP_404_NOT_FOUND,
                detail="favori bilgileri yok."
@@ -1407,7 +1769,11 @@ def get_all_favorites(
 # GET ALL user_favorites BY ID
 # =====================================================
 
-@router.get("/get-favorite-by-id")
+@router.get(
+    "/get-favorite-by-id",
+    response_model=UserFavoriteOut,
+    dependencies=[Depends(tenant_etag("user_favorites"))],
+)
 def get_favorite_by_id(
     module_key:str,
     current_user: User = Depends(get_current_user),
@@ -1437,6 +1803,25 @@ def get_favorite_by_id(
             detail="veritabanı hatası"
         )
     
+# =====================================================
+# mikro_api_settings değişince bellek cache'leri
+# =====================================================
+
+def invalidate_mikro_caches(tenant_db_name: str) -> None:
+    """
+    Ayarlar (sunucu / firma / kullanıcı) değişti: eski ayarlar ve eski
+    sunucudan gelmiş cevaplar kullanılmasın. Sync endpointten çağrılır;
+    response cache event loop'a ait olduğu için orada temizlenir.
+    """
+    mikro_settings_cache.invalidate(tenant_db_name)
+
+    try:
+        from_thread.run_sync(mikro_response_cache.invalidate_tenant, tenant_db_name)
+    except RuntimeError:
+        # event loop dışı (script vb.)
+        mikro_response_cache.invalidate_tenant(tenant_db_name)
+
+
 # =====================================================
 # INSERT mikro_api_settings
 # =====================================================
@@ -1446,6 +1831,7 @@ def post_mikro_infos(
     payload: MikroApiUpdateSchema,
     request: Request,
     tenant_db: Session = Depends(get_tenant_db),
+    session: SessionContext = Depends(require_tenant),
 ):
     
     if payload.sube_no is None:
@@ -1472,10 +1858,9 @@ def post_mikro_infos(
             detail="Bu firma için Mikro API bilgileri zaten mevcut."
         )
 
-    current_date = datetime.now().strftime("%Y-%m-%d")
-    hash_input = f"{current_date} {payload.api_pw_non_hash}"
-    hashed_pw = hashlib.md5(hash_input.encode("utf-8")).hexdigest()
-
+    # günlük hash build_mikro_request içinde api_pw_non_hash'ten üretilir.
+    # api_pw (günlük hash) yazılmaz: ertesi gün geçersiz olur; sadece
+    # api_pw_non_hash'i olmayan eski kayıtlarda fallback olarak okunur.
     new_mikro = MikroApiSettings(
         firma_Guid=firm.firma_Guid,
         firma_siraNo=firm.firma_sirano, 
@@ -1486,7 +1871,7 @@ def post_mikro_infos(
         api_firmakodu=payload.api_firmakodu,
         api_calismayili=payload.api_calismayili,
         api_kullanici=payload.api_kullanici,
-        api_pw=hashed_pw,
+        api_pw=None,
         api_pw_non_hash=payload.api_pw_non_hash,
         api_key=payload.api_key,
         #api_firmano=payload.api_firmano, # --> bu değeri default olarak alması gerekiyor
@@ -1498,6 +1883,8 @@ def post_mikro_infos(
     tenant_db.commit()
     tenant_db.refresh(new_mikro)
 
+    invalidate_mikro_caches(session.tenant_id)
+
     return {
         "message": "Mikro API Bilgileri başarıyla kaydedildi",
     }
@@ -1512,6 +1899,7 @@ def push_mikro_infos(
     payload: MikroApiUpdateSchema,
     request: Request,
     tenant_db: Session = Depends(get_tenant_db),
+    session: SessionContext = Depends(require_tenant),
 ):
     print("==== DEBUG AUTH ====")
     print("Authorization header:", request.headers.get("authorization"))
@@ -1550,17 +1938,15 @@ def push_mikro_infos(
     """
 
     # ===== MD5 ŞİFRELEME =====
-    current_date = datetime.now().strftime("%Y-%m-%d")
-    hash_input = f"{current_date} {payload.api_pw_non_hash}"
-    hashed_pw = hashlib.md5(hash_input.encode("utf-8")).hexdigest()
-
+    # günlük hash build_mikro_request içinde api_pw_non_hash'ten üretilir;
+    # eski günün hash'i kalmasın diye api_pw temizlenir
     mikro.api_ip = payload.api_ip    
     mikro.api_port = payload.api_port
     mikro.api_protocol = payload.api_protocol
     mikro.api_firmakodu = payload.api_firmakodu
     mikro.api_calismayili = payload.api_calismayili
     mikro.api_kullanici = payload.api_kullanici
-    mikro.api_pw = hashed_pw 
+    mikro.api_pw = None
     mikro.api_pw_non_hash = payload.api_pw_non_hash
     mikro.api_key = payload.api_key
     mikro.api_firmano = firm.firma_sirano
@@ -1573,6 +1959,8 @@ def push_mikro_infos(
     tenant_db.commit()
     tenant_db.refresh(mikro) 
 
+    invalidate_mikro_caches(session.tenant_id)
+
     return {
         "message": "Mikro API Bilgileri başarıyla güncellendi",
     }
@@ -1581,7 +1969,11 @@ def push_mikro_infos(
 # GET mikro_api_settings
 # =====================================================
 
-@router.get("/get-mikro-info")
+@router.get(
+    "/get-mikro-info",
+    response_model=MikroApiSettingsOut,
+    dependencies=[Depends(tenant_etag("mikro_api_settings"))],
+)
 def get_mikro_info(
     tenant_db: Session = Depends(get_tenant_db),
     session: SessionContext = Depends(require_tenant),
@@ -1598,3 +1990,340 @@ def get_mikro_info(
 
     return mikro_info   
 
+
+
+# =====================================================
+# SESSION BOOTSTRAP
+# =====================================================
+# login sonrası client'ın ayrı ayrı çağırdığı
+# roles / branches / mikro-info / favorites / firma bilgileri
+# tek sorgu (tek round trip) ile döner.
+
+SESSION_BOOTSTRAP_SQL = text("""
+    SELECT json_build_object(
+        'user', (
+            SELECT json_build_object(
+                'id', u."kullanici_Guid",
+                'no', u.kullanici_no,
+                'username', u.kullanici_name,
+                'long_name', u."kullanici_LongName",
+                'email', u."kullanici_EMail",
+                'cep_tel', u."kullanici_Ceptel",
+                'role_id', u.role_id,
+                'firma_siraNo', u."firma_siraNo",
+                'mikro_personel_kod', u.mikro_personel_kod
+            )
+            FROM users u
+            WHERE u."kullanici_Guid" = :user_id
+        ),
+        'role', (
+            SELECT json_build_object(
+                'id', r.id,
+                'name', r.name,
+                'description', r.description
+            )
+            FROM users u
+            JOIN roles r ON r.id = u.role_id
+            WHERE u."kullanici_Guid" = :user_id
+        ),
+        'roles', (
+            SELECT COALESCE(json_agg(json_build_object(
+                'id', r.id,
+                'name', r.name,
+                'description', r.description
+            ) ORDER BY r.name), '[]'::json)
+            FROM roles r
+        ),
+        'firm', (
+            SELECT json_build_object(
+                'guid', f."firma_Guid",
+                'sirano', f.firma_sirano,
+                'unvan', f.firma_unvan,
+                'unvan2', f.firma_unvan2,
+                'vergi_no', f."firma_FVergiNo"
+            )
+            FROM firms f
+            WHERE f.firma_kilitli IS NOT TRUE
+            ORDER BY f.firma_sirano
+            LIMIT 1
+        ),
+        'branches', (
+            SELECT COALESCE(json_agg(json_build_object(
+                'guid', b."sube_Guid",
+                'no', b.sube_no,
+                'adi', b.sube_adi,
+                'kodu', b.sube_kodu,
+                'il', b."sube_Il",
+                'ilce', b."sube_Ilce",
+                'kilitli', b.sube_kilitli
+            ) ORDER BY b.sube_no), '[]'::json)
+            FROM branches b
+        ),
+        'mikro', (
+            SELECT json_build_object(
+                'guid', m."api_Guid",
+                'sube_no', m.sube_no,
+                'protocol', m.api_protocol,
+                'ip', m.api_ip,
+                'port', m.api_port,
+                'firmakodu', m.api_firmakodu,
+                'calismayili', m.api_calismayili,
+                'kullanici', m.api_kullanici
+            )
+            FROM mikro_api_settings m
+            WHERE m.api_kilitli IS NOT TRUE
+            LIMIT 1
+        ),
+        'favorites', (
+            SELECT COALESCE(json_agg(fav.module_key ORDER BY fav.created_at), '[]'::json)
+            FROM user_favorites fav
+            WHERE fav.user_id = :user_id
+        )
+    )
+""")
+
+
+@router.get(
+    "/session-bootstrap",
+    dependencies=[Depends(tenant_etag(
+        "users", "roles", "firms", "branches", "mikro_api_settings", "user_favorites"
+    ))],
+)
+def session_bootstrap(
+    tenant_db: Session = Depends(get_tenant_db),
+    session: SessionContext = Depends(require_tenant),
+):
+    """
+    Mobil uygulama açılışı için tek çağrı.
+    version: payload değişmediyse aynı kalır, client cache kontrolü için kullanılabilir.
+    """
+    try:
+        payload = tenant_db.execute(
+            SESSION_BOOTSTRAP_SQL,
+            {"user_id": session.user_id}
+        ).scalar()
+
+    except SQLAlchemyError:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="veritabanı hatası"
+        )
+
+    if not payload or not payload.get("user"):
+        raise HTTPException(
+            status_code=404,
+            detail="Kullanıcı bulunamadı."
+        )
+
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    payload["version"] = hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:16]
+
+    return payload
+
+
+# =====================================================
+# MIKRO CIRCUIT BREAKER DURUMU
+# =====================================================
+
+@router.get("/mikro-breaker-state")
+def get_mikro_breaker_state(
+    tenant_db: Session = Depends(get_tenant_db),
+    session: SessionContext = Depends(require_tenant),
+):
+    """
+    Tenant'ın Mikro sunucusu için circuit durumu (CLOSED / OPEN / HALF_OPEN).
+    """
+    mikro = tenant_db.execute(
+        select(
+            MikroApiSettings.api_protocol,
+            MikroApiSettings.api_ip,
+            MikroApiSettings.api_port,
+        ).where(MikroApiSettings.api_kilitli == False).limit(1)
+    ).first()
+
+    if not mikro:
+        raise HTTPException(
+            status_code=404,
+            detail="Mikro API bilgileri bulunamadı."
+        )
+
+    return mikro_breakers.state_for(
+        (mikro.api_protocol or "http", mikro.api_ip, mikro.api_port)
+    )
+
+
+# =====================================================
+# MIKRO PERSONEL SYNC
+# =====================================================
+
+@router.post("/mikro-personel-sync")
+async def mikro_personel_sync(
+    full: bool = Query(False, description="true: tüm liste, listede olmayan bağlı kullanıcılar pasife alınır"),
+    force: bool = Query(False, description="true: boş / çok eksik listede de pasife alma yapılır"),
+    session: SessionContext = Depends(require_tenant),
+):
+    """
+    Mikro personelini users tablosuna toplu yansıtır (ekleme / güncelleme / pasife alma).
+    Varsayılan: sadece son senkrondan sonra değişenler.
+    """
+    return await sync_mikro_personel(session.tenant_id, full=full, force=force)
+
+
+@router.get("/mikro-sync-state", response_model=List[MikroSyncStateOut])
+def get_mikro_sync_state(
+    session: SessionContext = Depends(require_tenant),
+):
+    return get_sync_states(session.tenant_id)
+
+
+# =====================================================
+# MIKRO REPLIKA (stok / cari listeleri yerelde)
+# =====================================================
+
+@router.post("/mikro-replica/{dataset}/refresh")
+async def mikro_replica_refresh(
+    dataset: str,
+    full: bool = Query(False, description="true: tüm liste, listede olmayanlar replikadan silinir"),
+    session: SessionContext = Depends(require_tenant),
+):
+    """
+    Replikayı Mikro'dan yeniler. Varsayılan: sadece son yenilemeden sonra değişenler.
+    """
+    return await refresh_mikro_replica(session.tenant_id, dataset, full=full)
+
+
+@router.get("/mikro-replica-state")
+def mikro_replica_state(
+    session: SessionContext = Depends(require_tenant),
+):
+    return get_replica_states(session.tenant_id)
+
+
+@router.get("/mikro-replica/{dataset}")
+def mikro_replica_search(
+    dataset: str,
+    q: Optional[str] = Query(None, max_length=100, description="kod / ad içinde arama"),
+    include_iptal: bool = Query(False),
+    limit: int = Query(50, ge=1, le=500),
+    tenant_db: Session = Depends(get_tenant_db),
+    session: SessionContext = Depends(require_tenant),
+):
+    """
+    Mikro'ya gitmeden replikadan arama.
+    """
+    return search_replica(tenant_db, dataset, q=q, limit=limit, include_iptal=include_iptal)
+
+
+@router.get("/mikro-replica/{dataset}/items/{kod}")
+def mikro_replica_item(
+    dataset: str,
+    kod: str,
+    tenant_db: Session = Depends(get_tenant_db),
+    session: SessionContext = Depends(require_tenant),
+):
+    return lookup_replica(tenant_db, dataset, kod)
+
+
+# =====================================================
+# MIKRO OUTBOX (yazma çağrıları)
+# =====================================================
+
+@router.post("/mikro-outbox", status_code=202)
+def mikro_outbox_enqueue(
+    payload: MikroOutboxRequest,
+    tenant_db: Session = Depends(get_tenant_db),
+    session: SessionContext = Depends(require_tenant),
+):
+    """
+    Mikro'ya yazma isteğini kuyruğa alır, Mikro'yu beklemeden döner.
+    Gönderim arka planda tekrar denemeli yapılır; durum /mikro-outbox'tan izlenir.
+    """
+    outbox_id, created = enqueue_mikro_write(
+        tenant_db,
+        tenant_db_name=session.tenant_id,
+        endpoint=payload.endpoint,
+        body=payload.body,
+        idempotency_key=payload.idempotency_key,
+        created_user=session.user_id,
+    )
+    tenant_db.commit()
+
+    return {
+        "id": str(outbox_id),
+        "duplicate": not created,
+    }
+
+
+@router.get("/mikro-outbox", response_model=List[MikroOutboxOut])
+def mikro_outbox_list(
+    status: Optional[str] = Query(None, description="PENDING / SENDING / SENT / DEAD"),
+    limit: int = Query(50, ge=1, le=500),
+    tenant_db: Session = Depends(get_tenant_db),
+    session: SessionContext = Depends(require_tenant),
+):
+    query = select(MikroOutbox).order_by(MikroOutbox.created_at.desc()).limit(limit)
+    if status:
+        query = query.where(MikroOutbox.status == status.upper())
+
+    return tenant_db.execute(query).scalars().all()
+
+
+@router.post("/mikro-outbox/{outbox_id}/retry")
+def mikro_outbox_retry(
+    outbox_id: uuid.UUID,
+    tenant_db: Session = Depends(get_tenant_db),
+    session: SessionContext = Depends(require_tenant),
+):
+    """
+    DEAD kaydı deneme sayacı sıfırlanmış olarak tekrar kuyruğa alır.
+    """
+    item = tenant_db.get(MikroOutbox, outbox_id)
+
+    if not item:
+        raise HTTPException(status_code=404, detail="Outbox kaydı bulunamadı")
+
+    if item.status != "DEAD":
+        raise HTTPException(status_code=409, detail="Sadece DEAD kayıtlar tekrar denenebilir")
+
+    item.status = "PENDING"
+    item.attempts = 0
+    item.next_attempt_at = func.now()
+    item.last_error = None
+    item.lease_token = None
+    tenant_db.commit()
+
+    mikro_outbox_dispatcher.notify(session.tenant_id)
+
+    return {"id": str(item.id), "status": item.status}
+
+
+# =====================================================
+# EXPORT (NDJSON / CSV stream)
+# =====================================================
+
+@router.get("/export/{table}")
+def export_table(
+    table: str,
+    fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    compress: bool = Query(False, alias="gzip", description="true ise .gz dosyası"),
+    since: Optional[datetime] = Query(None, description="bu tarih dahil sonrası"),
+    until: Optional[datetime] = Query(None, description="bu tarihten öncesi"),
+    session: SessionContext = Depends(require_tenant),
+):
+    """
+    users / attendance_logs / audit_logs tablosunun tamamı (veya tarih aralığı).
+    Satırlar DB'den parti parti okunup yazılır; tablo büyüklüğü bellek kullanımını etkilemez.
+    """
+    query = build_export_query(table, since=since, until=until)
+    media_type, extension = EXPORT_FORMATS[fmt]
+    filename = f"{table}.{extension}"
+
+    if compress:
+        media_type = "application/gzip"
+        filename += ".gz"
+
+    return StreamingResponse(
+        stream_export(session.tenant_id, table, query, fmt=fmt, gzip=compress),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,26 @@
+from typing import Optional, Type
+
+from pydantic import BaseModel, ConfigDict, create_model
+
+
+class OrmSchema(BaseModel):
+    """
+    ORM nesnesinden (from_attributes) okunan response şemalarının tabanı.
+    Sadece şemada tanımlı alanlar döner (şifre / anahtar kolonları sızmaz).
+    """
+    model_config = ConfigDict(from_attributes=True)
+
+
+def partial_schema(schema: Type[OrmSchema]) -> Type[OrmSchema]:
+    """
+    fields= destekleyen endpointler için: tüm alanlar opsiyonel kopya.
+    response_model_exclude_unset ile sadece seçilen (okunan) alanlar döner.
+    """
+    return create_model(
+        f"{schema.__name__}Fields",
+        __base__=OrmSchema,
+        **{
+            name: (Optional[field.annotation], None)
+            for name, field in schema.model_fields.items()
+        },
+    )
@@ -0,0 +1,30 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.schemas.base import OrmSchema
+
+
+class CompanyOut(OrmSchema):
+    id: uuid.UUID
+    vergi_no: str
+    company_code: str
+    name: str
+    status: Optional[str] = None
+    status_message: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+class AdminUserOut(BaseModel):
+    id: str
+    email: str
+    username: str
+
+
+class LicenseOut(BaseModel):
+    id: str
+    company_id: str
+    # "aktif" / "aktif değil"
+    is_active: str
@@ -1,7 +1,11 @@
+import uuid
+from datetime import datetime
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from typing_extensions import Annotated
 
+from app.schemas.base import OrmSchema
+
 class MikroApiUpdateSchema(BaseModel):
     api_ip: Annotated[str, Field(max_length=64)]
     api_port: int
@@ -13,3 +17,72 @@ class MikroApiUpdateSchema(BaseModel):
     api_key: Optional[Annotated[str, Field(max_length=255)]]
     #api_firmano: Optional[Annotated[str, Field(max_length=20)]]
     sube_no: Optional[int]
+
+
+class MikroBatchItem(BaseModel):
+    endpoint: Annotated[str, Field(min_length=1, max_length=100)]
+    body: Optional[Dict[str, Any]] = None
+
+
+class MikroBatchRequest(BaseModel):
+    items: Annotated[List[MikroBatchItem], Field(min_length=1)]
+
+
+class MikroOutboxRequest(BaseModel):
+    endpoint: Annotated[str, Field(min_length=1, max_length=100)]
+    body: Optional[Dict[str, Any]] = None
+    # client tekrar gönderirse aynı işlem ikinci kez kuyruğa girmez
+    idempotency_key: Optional[Annotated[str, Field(min_length=1, max_length=100)]] = None
+
+
+class MikroApiSettingsOut(OrmSchema):
+    # api_pw / api_pw_non_hash / api_key dönmez
+    api_Guid: uuid.UUID
+    firma_Guid: uuid.UUID
+    firma_siraNo: int
+    sube_no: int
+    api_kilitli: bool
+    api_ip: str
+    api_port: int
+    api_protocol: str
+    api_firmakodu: str
+    api_calismayili: str
+    api_kullanici: Optional[str] = None
+    api_firmano: Optional[str] = None
+    api_veritabani: Optional[str] = None
+    api_create_user: Optional[uuid.UUID] = None
+    api_create_date: Optional[datetime] = None
+    api_lastup_user: Optional[uuid.UUID] = None
+    api_lastup_date: Optional[datetime] = None
+
+
+class MikroOutboxOut(OrmSchema):
+    # lease_token / locked_until (dispatcher iç durumu) dönmez
+    id: uuid.UUID
+    idempotency_key: str
+    endpoint: str
+    body: Optional[Any] = None
+    status: str
+    attempts: int
+    next_attempt_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    response: Optional[Any] = None
+    created_user: Optional[uuid.UUID] = None
+    created_at: Optional[datetime] = None
+    sent_at: Optional[datetime] = None
+
+
+class MikroSyncStateOut(OrmSchema):
+    dataset: str
+    last_watermark: Optional[datetime] = None
+    last_started_at: Optional[datetime] = None
+    last_finished_at: Optional[datetime] = None
+    last_success_at: Optional[datetime] = None
+    last_status: Optional[str] = None
+    last_error: Optional[str] = None
+    last_duration_ms: Optional[int] = None
+    rows_fetched: int
+    rows_inserted: int
+    rows_updated: int
+    rows_deactivated: int
+    rows_skipped: int
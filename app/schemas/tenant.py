@@ -0,0 +1,105 @@
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+from app.schemas.base import OrmSchema, partial_schema
+
+
+# =====================================================
+# USER
+# =====================================================
+
+class UserOut(OrmSchema):
+    # kullanici_pw dönmez
+    kullanici_Guid: uuid.UUID
+    firma_siraNo: int
+    kullanici_no: Optional[int] = None
+    kullanici_name: str
+    kullanici_LongName: Optional[str] = None
+    kullanici_EMail: str
+    kullanici_Ceptel: Optional[str] = None
+    kullanici_pasif: Optional[bool] = None
+    role_id: Optional[uuid.UUID] = None
+    kullanici_create_user: Optional[uuid.UUID] = None
+    kullanici_create_date: Optional[datetime] = None
+    kullanici_lastup_user: Optional[int] = None
+    kullanici_lastup_date: Optional[datetime] = None
+    kullanici_SifreTipi: Optional[int] = None
+    kullanici_SifreDegisim_date: Optional[datetime] = None
+    mikro_personel_guid: Optional[uuid.UUID] = None
+    mikro_personel_kod: Optional[str] = None
+    mikro_last_sync: Optional[datetime] = None
+
+
+# ?fields= ile seçilen kolonlar
+UserFieldsOut = partial_schema(UserOut)
+
+
+# =====================================================
+# FIRM / BRANCH
+# =====================================================
+
+class FirmOut(OrmSchema):
+    firma_Guid: uuid.UUID
+    firma_sirano: int
+    firma_kilitli: bool
+    firma_unvan: Optional[str] = None
+    firma_unvan2: Optional[str] = None
+    firma_TCkimlik: Optional[str] = None
+    firma_FVergiNo: str
+    firma_FVergiDaire: Optional[str] = None
+    firma_web_sayfasi: Optional[str] = None
+    firma_create_user: Optional[uuid.UUID] = None
+    firma_create_date: Optional[datetime] = None
+    firma_lastup_user: Optional[uuid.UUID] = None
+    firma_lastup_date: Optional[datetime] = None
+
+
+class BranchOut(OrmSchema):
+    sube_Guid: uuid.UUID
+    sube_bag_firma: int
+    sube_no: int
+    sube_kilitli: Optional[bool] = None
+    sube_adi: Optional[str] = None
+    sube_kodu: Optional[str] = None
+    sube_MersisNo: Optional[str] = None
+    sube_Cadde: Optional[str] = None
+    sube_Mahalle: Optional[str] = None
+    sube_Sokak: Optional[str] = None
+    sube_Semt: Optional[str] = None
+    sube_Apt_No: Optional[str] = None
+    sube_Daire_No: Optional[str] = None
+    sube_Posta_Kodu: Optional[str] = None
+    sube_Ilce: Optional[str] = None
+    sube_Il: Optional[str] = None
+    sube_Ulke: Optional[str] = None
+    sube_TelNo1: Optional[str] = None
+    sube_create_user: Optional[int] = None
+    sube_create_date: Optional[datetime] = None
+    sube_lastup_user: Optional[int] = None
+    sube_lastup_date: Optional[datetime] = None
+
+
+BranchFieldsOut = partial_schema(BranchOut)
+
+
+# =====================================================
+# ROLE / FAVORITE
+# =====================================================
+
+class RoleOut(OrmSchema):
+    id: uuid.UUID
+    name: str
+    description: Optional[str] = None
+
+
+class RoleListOut(OrmSchema):
+    count: int
+    roles: List[RoleOut]
+
+
+class UserFavoriteOut(OrmSchema):
+    id: uuid.UUID
+    user_id: uuid.UUID
+    module_key: str
+    created_at: Optional[datetime] = None
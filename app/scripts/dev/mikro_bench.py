@@ -0,0 +1,197 @@
+"""
+/test/mikro/{endpoint} üzerinden uçtan uca Mikro benchmark'ı.
+
+    # 1) stub
+    python -m app.scripts.dev.mikro_stub --port 8094 --latency-ms 50
+    # 2) uygulama (tenant'ın mikro_api_settings kaydı stub'ı göstermeli)
+    uvicorn app.main:app --port 8000
+    # 3) benchmark
+    python -m app.scripts.dev.mikro_bench --db-name 1234567890 \\
+        --endpoint StokListesiV2 --concurrency 32 --requests 2000 \\
+        --stub-url http://127.0.0.1:8094 --pid $(pgrep -f "uvicorn app.main")
+
+Throughput, p50/p90/p99 gecikme, HTTP durum dağılımı; --pid verilirse
+uygulamanın thread sayısı, --stub-url verilirse Mikro tarafında kullanılan
+bağlantı sayısı ve en yüksek eş zamanlı istek raporlanır.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import httpx
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return round(ordered[index], 2)
+
+
+def read_threads(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("Threads:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def count_sockets(pid: int) -> Optional[int]:
+    try:
+        fd_dir = f"/proc/{pid}/fd"
+        return sum(
+            1 for fd in os.listdir(fd_dir)
+            if os.readlink(os.path.join(fd_dir, fd)).startswith("socket:")
+        )
+    except OSError:
+        return None
+
+
+async def sample_process(pid: int, samples: Dict[str, List[int]], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        threads = read_threads(pid)
+        sockets = count_sockets(pid)
+        if threads is not None:
+            samples["threads"].append(threads)
+        if sockets is not None:
+            samples["sockets"].append(sockets)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=0.2)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run(args) -> Dict:
+    url = f"{args.base_url.rstrip('/')}/test/mikro/{args.endpoint}"
+    body = json.loads(args.body) if args.body else None
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    timeout = httpx.Timeout(args.timeout)
+
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    samples: Dict[str, List[int]] = {"threads": [], "sockets": []}
+
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        if args.stub_url:
+            await client.post(f"{args.stub_url.rstrip('/')}/stub/reset")
+
+        async def one_call(record: bool) -> None:
+            started = time.perf_counter()
+            try:
+                response = await client.post(url, params={"db_name": args.db_name}, json=body)
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+
+            if record:
+                latencies.append((time.perf_counter() - started) * 1000)
+                statuses[status] += 1
+
+        # ısınma: bağlantılar / cache / ayarlar
+        await asyncio.gather(*(one_call(False) for _ in range(args.warmup)))
+
+        stop = asyncio.Event()
+        sampler = (
+            asyncio.create_task(sample_process(args.pid, samples, stop))
+            if args.pid else None
+        )
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for _ in range(args.requests):
+            queue.put_nowait(None)
+
+        async def worker() -> None:
+            while True:
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await one_call(True)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+        stop.set()
+        if sampler:
+            await sampler
+
+        stub_stats = None
+        if args.stub_url:
+            stub_stats = (await client.get(f"{args.stub_url.rstrip('/')}/stub/stats")).json()["stats"]
+
+        app_metrics = None
+        if args.token:
+            response = await client.get(
+                f"{args.base_url.rstrip('/')}/system/mikro-metrics",
+                headers={"Authorization": f"Bearer {args.token}"},
+            )
+            if response.status_code == 200:
+                app_metrics = response.json()
+
+    ok = statuses.get(200, 0)
+
+    report = {
+        "url": url,
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(args.requests / elapsed, 1) if elapsed else None,
+        "ok": ok,
+        "statuses": {str(status): count for status, count in statuses.items()},
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies), 2) if latencies else None,
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": round(max(latencies), 2) if latencies else None,
+        },
+    }
+
+    if args.pid:
+        report["app_process"] = {
+            "threads_max": max(samples["threads"], default=None),
+            "threads_avg": round(statistics.fmean(samples["threads"]), 1) if samples["threads"] else None,
+            "sockets_max": max(samples["sockets"], default=None),
+        }
+
+    if stub_stats:
+        report["mikro_stub"] = stub_stats
+
+    if app_metrics:
+        report["app_mikro_metrics"] = app_metrics
+
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mikro uçtan uca benchmark")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--db-name", required=True, help="tenant DB adı (vergi no)")
+    parser.add_argument("--endpoint", default="StokListesiV2")
+    parser.add_argument("--body", default=None, help="JSON gövde")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--stub-url", default=None, help="ör. http://127.0.0.1:8094")
+    parser.add_argument("--pid", type=int, default=None, help="uygulama süreci (thread / socket örneklemesi)")
+    parser.add_argument("--token", default=None, help="master token (/system/mikro-metrics)")
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
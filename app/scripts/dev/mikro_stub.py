@@ -0,0 +1,282 @@
+"""
+Yerel Mikro APIMethods taklidi (yük testi / benchmark için).
+
+    python -m app.scripts.dev.mikro_stub --port 8094 --password 1234 --latency-ms 50
+
+Tenant'ın mikro_api_settings kaydı bu sunucuyu göstermeli
+(api_ip=127.0.0.1, api_port=8094, api_pw_non_hash=--password, diğerleri aynı).
+
+Çalışırken ayar değiştirmek / sayaçları sıfırlamak:
+    curl -X POST localhost:8094/stub/config -d '{"error_rate": 0.1}'
+    curl localhost:8094/stub/stats
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Set, Tuple
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel
+
+from app.utils.mikro_main_file import generate_mikro_md5, mikro_today
+
+
+# =====================================================
+# AYARLAR
+# =====================================================
+
+class StubConfig(BaseModel):
+    # build_mikro_request'in gönderdiği Mikro bloğu bunlarla doğrulanır
+    firma_kodu: str = "STUB"
+    calisma_yili: str = mikro_today()[:4]
+    kullanici: str = "SRV"
+    password: str = "1234"
+    api_key: str = "STUB-KEY"
+    check_auth: bool = True
+
+    # gecikme: latency_ms ± jitter_ms
+    latency_ms: int = 20
+    jitter_ms: int = 10
+    # HTTP 500 oranı / HTTP 200 + IsError oranı
+    error_rate: float = 0.0
+    mikro_error_rate: float = 0.0
+    # liste endpointlerinde dönülecek satır sayısı ve satır başına yaklaşık boyut
+    rows: int = 50
+    row_bytes: int = 200
+    # slow-loris: cevap gövdesi bu kadar parçada, parçalar arası bu beklemeyle gönderilir
+    slow_chunks: int = 0
+    slow_chunk_delay_ms: int = 0
+
+
+class PartialStubConfig(BaseModel):
+    firma_kodu: Optional[str] = None
+    calisma_yili: Optional[str] = None
+    kullanici: Optional[str] = None
+    password: Optional[str] = None
+    api_key: Optional[str] = None
+    check_auth: Optional[bool] = None
+    latency_ms: Optional[int] = None
+    jitter_ms: Optional[int] = None
+    error_rate: Optional[float] = None
+    mikro_error_rate: Optional[float] = None
+    rows: Optional[int] = None
+    row_bytes: Optional[int] = None
+    slow_chunks: Optional[int] = None
+    slow_chunk_delay_ms: Optional[int] = None
+
+
+config = StubConfig()
+
+
+class StubStats:
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.requests = 0
+        self.auth_failures = 0
+        self.errors = 0
+        self.mikro_errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        # (client ip, client port): aynı port = aynı (keep-alive) bağlantı
+        self.connections: Set[Tuple[str, int]] = set()
+        self.started = time.monotonic()
+
+    def snapshot(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "auth_failures": self.auth_failures,
+            "errors": self.errors,
+            "mikro_errors": self.mikro_errors,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "distinct_connections": len(self.connections),
+            "uptime_s": round(time.monotonic() - self.started, 1),
+        }
+
+
+stats = StubStats()
+app = FastAPI(title="Mikro API Stub")
+
+
+# =====================================================
+# CEVAPLAR
+# =====================================================
+
+def mikro_result(data: Any = None, error: Optional[str] = None) -> Dict:
+    return {
+        "result": [{
+            "StatusCode": 200 if error is None else 400,
+            "IsError": error is not None,
+            "ErrorMessage": error,
+            "Data": data if data is not None else [],
+        }]
+    }
+
+
+def check_auth(mikro: Any) -> Optional[str]:
+    if not isinstance(mikro, dict):
+        return "Mikro bloğu yok"
+
+    expected = {
+        "FirmaKodu": config.firma_kodu,
+        "CalismaYili": config.calisma_yili,
+        "KullaniciKodu": config.kullanici,
+        "ApiKey": config.api_key,
+    }
+
+    for field, value in expected.items():
+        if str(mikro.get(field)) != value:
+            return f"{field} hatalı"
+
+    # gün, uygulama gibi MIKRO_TIMEZONE'a göre; gün dönümünde dünün hash'i de kabul edilir
+    today = datetime.strptime(mikro_today(), "%Y-%m-%d")
+    valid = {
+        generate_mikro_md5(config.password, day.strftime("%Y-%m-%d"))
+        for day in (today, today - timedelta(days=1))
+    }
+
+    if mikro.get("Sifre") not in valid:
+        return "Sifre hatalı"
+
+    return None
+
+
+def _filler(size: int) -> str:
+    return hashlib.sha256(str(size).encode()).hexdigest() * (size // 64 + 1)
+
+
+def personel_rows(index: int, size: int):
+    """
+    PersonelListesiV2 için mikro_personel_sync'in okuduğu alanlar.
+    Guid'ler kod'dan türetilir, her çağrıda aynı personel döner.
+    """
+    start = index * size
+    now = datetime.now().replace(microsecond=0)
+
+    for number in range(start, min(start + size, config.rows)):
+        kod = f"P{number:05d}"
+        yield {
+            "per_Guid": str(uuid.uuid5(uuid.NAMESPACE_OID, kod)),
+            "per_kod": kod,
+            "per_adi": f"Ad{number}",
+            "per_soyadi": f"Soyad{number}",
+            "per_iptal": False,
+            "per_cikis_tar": "1899-12-30T00:00:00",
+            "per_lastup_date": now.isoformat(),
+        }
+
+
+def generic_rows(endpoint: str):
+    filler = _filler(config.row_bytes)[: max(config.row_bytes - 60, 0)]
+
+    for number in range(config.rows):
+        yield {"endpoint": endpoint, "no": number, "kod": f"K{number:06d}", "text": filler}
+
+
+async def slow_body(payload: bytes):
+    chunk_size = max(len(payload) // config.slow_chunks, 1)
+
+    for start in range(0, len(payload), chunk_size):
+        yield payload[start:start + chunk_size]
+        await asyncio.sleep(config.slow_chunk_delay_ms / 1000)
+
+
+# =====================================================
+# ENDPOINTS
+# =====================================================
+
+@app.post("/Api/APIMethods/{endpoint}")
+async def api_methods(endpoint: str, request: Request):
+    stats.requests += 1
+    stats.in_flight += 1
+    stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+    if request.client:
+        stats.connections.add((request.client.host, request.client.port))
+
+    try:
+        body = await request.json()
+
+        delay = config.latency_ms + random.uniform(-config.jitter_ms, config.jitter_ms)
+        await asyncio.sleep(max(delay, 0) / 1000)
+
+        if config.check_auth:
+            error = check_auth(body.get("Mikro"))
+            if error:
+                stats.auth_failures += 1
+                return JSONResponse(mikro_result(error=error))
+
+        if random.random() < config.error_rate:
+            stats.errors += 1
+            return JSONResponse({"Message": "stub: simulated server error"}, status_code=500)
+
+        if random.random() < config.mikro_error_rate:
+            stats.mikro_errors += 1
+            return JSONResponse(mikro_result(error="stub: simulated Mikro error"))
+
+        if endpoint.startswith("Personel"):
+            size = int(body.get("Size") or config.rows)
+            data = list(personel_rows(int(body.get("Index") or 0), size))
+        else:
+            data = list(generic_rows(endpoint))
+
+        payload = JSONResponse(mikro_result(data)).body
+
+        if config.slow_chunks > 0:
+            return StreamingResponse(slow_body(payload), media_type="application/json")
+
+        return Response(payload, media_type="application/json")
+
+    finally:
+        stats.in_flight -= 1
+
+
+@app.get("/stub/stats")
+def stub_stats():
+    return {"config": config.model_dump(), "stats": stats.snapshot()}
+
+
+@app.post("/stub/config")
+def stub_config(update: PartialStubConfig):
+    global config
+    config = config.model_copy(update=update.model_dump(exclude_none=True))
+    stats.reset()
+    return config
+
+
+@app.post("/stub/reset")
+def stub_reset():
+    stats.reset()
+    return stats.snapshot()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mikro APIMethods stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8094)
+
+    for name, field in StubConfig.model_fields.items():
+        option = "--" + name.replace("_", "-")
+        if field.annotation is bool:
+            parser.add_argument(option, type=lambda v: v.lower() in ("1", "true", "yes"), default=field.default)
+        else:
+            parser.add_argument(option, type=field.annotation, default=field.default)
+
+    args = vars(parser.parse_args())
+    host, port = args.pop("host"), args.pop("port")
+
+    global config
+    config = StubConfig(**args)
+
+    uvicorn.run(app, host=host, port=port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Liste cevaplarının serileştirme benchmark'ı (DB gerekmez).
+
+    python -m app.scripts.dev.serialization_bench --rows 10000 --repeat 5
+
+Aynı User / Branch satırları için karşılaştırır:
+- eski yol: ORM nesnesi -> jsonable_encoder -> JSONResponse (json.dumps)
+- yeni yol: response şeması (from_attributes) -> ORJSONResponse
+- fields: ?fields= ile seçilen kolonlar (partial şema, exclude_unset)
+Süre (ms, en iyi tekrar) ve cevap boyutu raporlanır.
+"""
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+from app.models.tenant.tenant import Branch, User
+from app.schemas.tenant import BranchFieldsOut, BranchOut, UserFieldsOut, UserOut
+from app.utils.db_helpers import project_rows
+
+
+def loaded(model, **values):
+    """
+    DB'den okunmuş gibi: tüm kolonlar dolu (verilmeyenler None).
+    """
+    for column in model.__table__.columns:
+        values.setdefault(column.key, None)
+    return model(**values)
+
+
+def make_users(count: int) -> List[User]:
+    now = datetime.now().replace(microsecond=0)
+
+    return [
+        loaded(
+            User,
+            kullanici_Guid=uuid.uuid4(),
+            firma_siraNo=1,
+            kullanici_no=number,
+            kullanici_name=f"user{number}",
+            kullanici_pw="$2b$12$" + "x" * 53,
+            kullanici_LongName=f"Kullanıcı {number}",
+            kullanici_EMail=f"user{number}@example.com",
+            kullanici_Ceptel="5550000000",
+            kullanici_pasif=False,
+            role_id=uuid.uuid4(),
+            kullanici_create_date=now - timedelta(days=number % 365),
+            mikro_personel_kod=f"P{number:05d}",
+        )
+        for number in range(count)
+    ]
+
+
+def make_branches(count: int) -> List[Branch]:
+    return [
+        loaded(
+            Branch,
+            sube_Guid=uuid.uuid4(),
+            sube_bag_firma=1,
+            sube_no=number,
+            sube_adi=f"Şube {number}",
+            sube_kodu=f"S{number:04d}",
+            sube_Il="İstanbul",
+            sube_Ilce="Kadıköy",
+            sube_Ulke="Türkiye",
+        )
+        for number in range(count)
+    ]
+
+
+def old_path(rows) -> bytes:
+    # response_model'siz endpoint: FastAPI jsonable_encoder ile ORM'i gezer
+    return JSONResponse(jsonable_encoder(rows)).body
+
+
+def new_path(adapter: TypeAdapter) -> Callable:
+    # response_model'li endpoint: validate (from_attributes) + serialize + orjson
+    def run(rows) -> bytes:
+        value = adapter.validate_python(rows)
+        return ORJSONResponse(adapter.dump_python(value, mode="json")).body
+
+    return run
+
+
+def fields_path(adapter: TypeAdapter, fields: List[str]) -> Callable:
+    # ?fields=: DB sadece bu kolonları döner, şema sadece gelenleri yazar
+    def run(rows) -> bytes:
+        value = adapter.validate_python(project_rows(rows, fields))
+        return ORJSONResponse(adapter.dump_python(value, mode="json", exclude_unset=True)).body
+
+    return run
+
+
+def measure(fn: Callable, rows, repeat: int) -> Dict:
+    timings = []
+    body = b""
+
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn(rows)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    return {"best_ms": round(min(timings), 2), "bytes": len(body)}
+
+
+def bench(
+    name: str,
+    rows,
+    adapter: TypeAdapter,
+    fields_adapter: TypeAdapter,
+    fields: List[str],
+    repeat: int,
+) -> Dict:
+    old = measure(old_path, rows, repeat)
+    new = measure(new_path(adapter), rows, repeat)
+    sparse = measure(fields_path(fields_adapter, fields), rows, repeat)
+
+    return {
+        "dataset": name,
+        "rows": len(rows),
+        "jsonable_encoder+json": old,
+        "schema+orjson": new,
+        f"fields={','.join(fields)}": sparse,
+        "speedup": round(old["best_ms"] / new["best_ms"], 2) if new["best_ms"] else None,
+        "size_ratio": round(new["bytes"] / old["bytes"], 3) if old["bytes"] else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Liste serileştirme benchmark'ı")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    report = [
+        bench(
+            "users",
+            make_users(args.rows),
+            TypeAdapter(List[UserOut]),
+            TypeAdapter(List[UserFieldsOut]),
+            ["kullanici_Guid", "kullanici_name", "kullanici_LongName"],
+            args.repeat,
+        ),
+        bench(
+            "branches",
+            make_branches(args.rows),
+            TypeAdapter(List[BranchOut]),
+            TypeAdapter(List[BranchFieldsOut]),
+            ["sube_Guid", "sube_no", "sube_adi"],
+            args.repeat,
+        ),
+    ]
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+"""
+Tek seferlik: tüm aktif tenant'ları outbox dispatcher'ı için bir kez
+taranacak şekilde işaretler. master'da mikro_outbox_due tablosu eklenmeden
+önce kuyruğa girmiş (PENDING) kayıtlar için bir kez çalıştırılır.
+
+    python -m app.scripts.mikro_outbox_mark_due
+
+Bekleyen kaydı olmayan tenant'ların satırı ilk taramada silinir.
+"""
+from app.services.mikro_outbox import mark_all_tenants_due
+
+
+if __name__ == "__main__":
+    print(f"{mark_all_tenants_due()} tenant işaretlendi")
@@ -0,0 +1,50 @@
+"""
+Deploy sırasında, uygulama yeni sürüme geçmeden önce çalıştırılır: mevcut
+tenant DB'lerine sonradan eklenen tablo / kolon / sequence / trigger / index'leri
+uygular (TENANT_UPGRADE_SQL, TENANT_INDEX_SQL). İstek yolunda DDL çalışmaz;
+çalıştırılmamış tenant'larda yeni endpointler tablo bulamaz.
+
+    python -m app.scripts.tenant_migrate              # tüm aktif tenant'lar
+    python -m app.scripts.tenant_migrate 1234567890   # sadece verilen tenant'lar
+
+Idempotent; tekrar çalıştırmak güvenli. Bir tenant'taki hata diğerlerini
+durdurmaz, hatalı tenant'lar sonda listelenir (çıkış kodu 1).
+"""
+import sys
+
+from sqlalchemy import select
+
+from app.db.session import SessionLocal
+from app.db.tenant_provisioning import migrate_tenant_schema
+from app.models.master.master import TenantDB
+
+
+def active_tenant_names():
+    master_db = SessionLocal()
+
+    try:
+        return list(
+            master_db.execute(
+                select(TenantDB.db_name).where(TenantDB.is_active != False)
+            ).scalars()
+        )
+    finally:
+        master_db.close()
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or active_tenant_names()
+    failed = {}
+
+    for name in names:
+        try:
+            migrate_tenant_schema(name)
+            print(f"[MIGRATE] {name} OK")
+        except Exception as e:
+            failed[name] = str(e).splitlines()[0] if str(e) else type(e).__name__
+            print(f"[MIGRATE] {name} FAILED: {failed[name]}")
+
+    print(f"{len(names) - len(failed)}/{len(names)} tenant güncellendi")
+    if failed:
+        print("Hatalı tenant'lar: " + ", ".join(failed))
+        sys.exit(1)
@@ -0,0 +1,91 @@
+import hashlib
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.tenant.tenant import EntityVersion
+
+
+# =====================================================
+# TABLO -> ENTITY
+# =====================================================
+# Bu tablolara yazan her statement (endpoint, Mikro sync, elle SQL) entity
+# sayacını bir artırır. Statement bazlı: toplu işlemde satır başına değil bir kez.
+
+ENTITY_TABLES: Dict[str, str] = {
+    "users": "users",
+    "branches": "branches",
+    "roles": "roles",
+    "firms": "firms",
+    "mikro_api_settings": "mikro_api_settings",
+    "user_favorites": "user_favorites",
+}
+
+ENTITY_VERSION_SQL: List[str] = [
+    """
+    CREATE OR REPLACE FUNCTION bump_entity_version() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        INSERT INTO entity_versions (entity, version, changed_at)
+        VALUES (TG_ARGV[0], 1, now())
+        ON CONFLICT (entity) DO UPDATE
+            SET version = entity_versions.version + 1,
+                changed_at = now();
+        RETURN NULL;
+    END
+    $$
+    """,
+] + [
+    f"""
+    CREATE OR REPLACE TRIGGER trg_{table}_entity_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_entity_version('{entity}')
+    """
+    for entity, table in ENTITY_TABLES.items()
+]
+
+
+# =====================================================
+# OKUMA
+# =====================================================
+
+def get_entity_versions(tenant_db: Session, entities: Iterable[str]) -> Dict[str, int]:
+    """
+    Hiç yazılmamış entity 0 döner. Tablo verisine dokunmaz (entity_versions küçük).
+    """
+    entities = list(entities)
+    rows = tenant_db.execute(
+        select(EntityVersion.entity, EntityVersion.version)
+        .where(EntityVersion.entity.in_(entities))
+    ).all()
+    versions = dict(rows)
+
+    return {entity: versions.get(entity, 0) for entity in entities}
+
+
+def make_etag(versions: Dict[str, int], *parts: Optional[str]) -> str:
+    """
+    Weak ETag: entity versiyonları + cevabı değiştiren diğer girdiler
+    (path, query, kullanıcı).
+    """
+    key = "|".join(
+        [f"{entity}:{version}" for entity, version in sorted(versions.items())]
+        + [part or "" for part in parts]
+    )
+    return 'W/"' + hashlib.sha1(key.encode("utf-8")).hexdigest()[:20] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    # weak karşılaştırma: W/ öneki yok sayılır
+    def opaque(tag: str) -> str:
+        tag = tag.strip()
+        return tag[2:] if tag.startswith("W/") else tag
+
+    return opaque(etag) in {opaque(tag) for tag in if_none_match.split(",")}
@@ -0,0 +1,312 @@
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.master.master import TenantDB, UserLoginIndex
+from app.models.tenant.tenant import User
+from app.services.tenant_service import connect_tenant_by_vergiNo
+
+logger = logging.getLogger("uvicorn.error")
+
+KEY_EMAIL = "EMAIL"
+KEY_USERNAME = "USERNAME"
+
+# rebuild sırasında master'a kaç satırlık paketlerle yazılacak
+REBUILD_BATCH_SIZE = 1000
+
+
+# =====================================================
+# NORMALIZE
+# =====================================================
+
+def normalize_login(value: Optional[str]) -> Optional[str]:
+    """
+    Email / kullanıcı adı karşılaştırması büyük-küçük harf ve boşluk duyarsız.
+    """
+    if not value:
+        return None
+
+    normalized = value.strip().casefold()
+    return normalized or None
+
+
+def login_key_type(login: str) -> str:
+    return KEY_EMAIL if "@" in login else KEY_USERNAME
+
+
+def _user_keys(email: Optional[str], username: Optional[str]) -> List[Tuple[str, str]]:
+    keys = []
+
+    email_key = normalize_login(email)
+    if email_key:
+        keys.append((KEY_EMAIL, email_key))
+
+    username_key = normalize_login(username)
+    if username_key:
+        keys.append((KEY_USERNAME, username_key))
+
+    return keys
+
+
+# =====================================================
+# USER CREATE / UPDATE / DELETE
+# =====================================================
+
+def index_user(
+    master_db: Session,
+    *,
+    tenant_db_name: str,
+    user_id: UUID,
+    email: Optional[str],
+    username: Optional[str],
+) -> None:
+    """
+    Kullanıcının index kayıtlarını günceller (eski email / kullanıcı adı silinir).
+    Anahtar aynı tenant'ta başka kullanıcıda ise (büyük-küçük harf farkı)
+    üzerine yazılmaz; çakışma check_login_index'te raporlanır.
+    Commit çağırana aittir.
+    """
+    master_db.execute(
+        delete(UserLoginIndex).where(
+            UserLoginIndex.tenant_db_name == tenant_db_name,
+            UserLoginIndex.user_id == user_id,
+        )
+    )
+
+    rows = [
+        {
+            "key_type": key_type,
+            "login_key": login_key,
+            "tenant_db_name": tenant_db_name,
+            "user_id": user_id,
+        }
+        for key_type, login_key in _user_keys(email, username)
+    ]
+
+    if not rows:
+        return
+
+    master_db.execute(
+        insert(UserLoginIndex).values(rows).on_conflict_do_nothing(
+            index_elements=["key_type", "login_key", "tenant_db_name"],
+        )
+    )
+
+
+def index_new_users(
+    master_db: Session,
+    *,
+    tenant_db_name: str,
+    users: Iterable[Tuple[UUID, Optional[str], Optional[str]]],
+) -> int:
+    """
+    Toplu eklenen (yeni) kullanıcılar için: (user_id, email, username).
+    Silme yapılmaz, paketler halinde yazılır; mevcut anahtarın üzerine
+    yazılmaz (bkz. index_user). Commit çağırana aittir.
+    """
+    total = 0
+    batch = []
+
+    def flush():
+        master_db.execute(
+            insert(UserLoginIndex).values(batch).on_conflict_do_nothing(
+                index_elements=["key_type", "login_key", "tenant_db_name"],
+            )
+        )
+
+    for user_id, email, username in users:
+        for key_type, login_key in _user_keys(email, username):
+            batch.append({
+                "key_type": key_type,
+                "login_key": login_key,
+                "tenant_db_name": tenant_db_name,
+                "user_id": user_id,
+            })
+
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            flush()
+            total += len(batch)
+            batch = []
+
+    if batch:
+        flush()
+        total += len(batch)
+
+    return total
+
+
+def unindex_user(master_db: Session, *, tenant_db_name: str, user_id: UUID) -> None:
+    master_db.execute(
+        delete(UserLoginIndex).where(
+            UserLoginIndex.tenant_db_name == tenant_db_name,
+            UserLoginIndex.user_id == user_id,
+        )
+    )
+
+
+# =====================================================
+# LOOKUP
+# =====================================================
+
+def lookup_login(master_db: Session, login: str) -> List[UserLoginIndex]:
+    """
+    Tek master sorgusu. Aynı email birden fazla tenant'ta olabilir,
+    bu yüzden liste döner.
+    """
+    login_key = normalize_login(login)
+    if not login_key:
+        return []
+
+    return list(
+        master_db.execute(
+            select(UserLoginIndex).where(
+                UserLoginIndex.key_type == login_key_type(login_key),
+                UserLoginIndex.login_key == login_key,
+            )
+        ).scalars()
+    )
+
+
+# =====================================================
+# BULK REBUILD / CONSISTENCY CHECK
+# =====================================================
+
+def _expected_entries(tenant_db_name: str) -> Iterable[Dict]:
+    tenant_db = connect_tenant_by_vergiNo(tenant_db_name)
+
+    try:
+        result = tenant_db.execute(
+            select(User.kullanici_Guid, User.kullanici_EMail, User.kullanici_name)
+            .execution_options(yield_per=REBUILD_BATCH_SIZE)
+        )
+
+        for user_id, email, username in result:
+            for key_type, login_key in _user_keys(email, username):
+                yield {
+                    "key_type": key_type,
+                    "login_key": login_key,
+                    "tenant_db_name": tenant_db_name,
+                    "user_id": user_id,
+                }
+    finally:
+        tenant_db.close()
+
+
+def rebuild_login_index(master_db: Session, tenant_db_name: str) -> Dict:
+    """
+    Tenant'ın index kayıtlarını tenant users tablosundan baştan üretir.
+    Normalize edilince aynı olan anahtarlarda ilk kullanıcı kalır,
+    diğerleri collisions olarak sayılır.
+    """
+    master_db.execute(
+        delete(UserLoginIndex).where(UserLoginIndex.tenant_db_name == tenant_db_name)
+    )
+
+    total = 0
+    collisions = 0
+    seen = set()
+    batch = []
+
+    for entry in _expected_entries(tenant_db_name):
+        key = (entry["key_type"], entry["login_key"])
+        if key in seen:
+            collisions += 1
+            continue
+
+        seen.add(key)
+        batch.append(entry)
+
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            master_db.execute(insert(UserLoginIndex), batch)
+            total += len(batch)
+            batch = []
+
+    if batch:
+        master_db.execute(insert(UserLoginIndex), batch)
+        total += len(batch)
+
+    master_db.commit()
+
+    return {"tenant_db_name": tenant_db_name, "indexed": total, "collisions": collisions}
+
+
+def rebuild_all_login_indexes(master_db: Session) -> List[Dict]:
+    """
+    Her tenant kendi transaction'ında; hata veren tenant geri alınır ve
+    sonuçta "error" ile raporlanır, diğerleri devam eder.
+    """
+    db_names = master_db.execute(
+        select(TenantDB.db_name).where(TenantDB.is_active != False)
+    ).scalars().all()
+
+    results = []
+
+    for db_name in db_names:
+        try:
+            results.append(rebuild_login_index(master_db, db_name))
+        except Exception as e:
+            master_db.rollback()
+            logger.warning(f"LOGIN INDEX REBUILD FAILED | tenant={db_name} | {e}")
+            results.append({"tenant_db_name": db_name, "error": str(e) or type(e).__name__})
+
+    return results
+
+
+def check_login_index(master_db: Session, tenant_db_name: str, sample_size: int = 20) -> Dict:
+    """
+    Index ile tenant users tablosunu karşılaştırır, hiçbir şeyi değiştirmez.
+    - missing : tenant'ta var, index'te yok
+    - stale   : index'te var ama başka kullanıcıyı gösteriyor
+    - orphaned: index'te var, tenant'ta yok
+    - collisions: tenant'ta normalize edilince aynı olan email / kullanıcı adı
+      (ör. "Ali" ve "ali"); index bunlardan sadece birini gösterebilir
+    """
+    indexed = {
+        (row.key_type, row.login_key): row.user_id
+        for row in master_db.execute(
+            select(
+                UserLoginIndex.key_type,
+                UserLoginIndex.login_key,
+                UserLoginIndex.user_id,
+            ).where(UserLoginIndex.tenant_db_name == tenant_db_name)
+        )
+    }
+
+    expected: Dict[Tuple[str, str], set] = {}
+
+    for entry in _expected_entries(tenant_db_name):
+        expected.setdefault((entry["key_type"], entry["login_key"]), set()).add(entry["user_id"])
+
+    missing, stale, collisions = [], [], []
+
+    for key, user_ids in expected.items():
+        if len(user_ids) > 1:
+            collisions.append(key)
+
+        user_id = indexed.pop(key, None)
+
+        if user_id is None:
+            missing.append(key)
+        elif user_id not in user_ids:
+            stale.append(key)
+
+    orphaned = list(indexed.keys())
+
+    return {
+        "tenant_db_name": tenant_db_name,
+        "consistent": not (missing or stale or orphaned or collisions),
+        "missing": len(missing),
+        "stale": len(stale),
+        "orphaned": len(orphaned),
+        "collisions": len(collisions),
+        "samples": {
+            "missing": [login_key for _, login_key in missing[:sample_size]],
+            "stale": [login_key for _, login_key in stale[:sample_size]],
+            "orphaned": [login_key for _, login_key in orphaned[:sample_size]],
+            "collisions": [login_key for _, login_key in collisions[:sample_size]],
+        },
+    }
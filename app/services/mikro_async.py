@@ -0,0 +1,413 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict
+
+import httpx
+
+from app.core.config import settings
+from app.services.mikro_http import MikroServerKey, mikro_http_metrics, server_label
+
+
+# =====================================================
+# ÖNCELİK ŞERİTLERİ
+# =====================================================
+
+# kullanıcının beklediği çağrılar
+LANE_INTERACTIVE = "interactive"
+# senkron / outbox: sadece interaktif için ayrılmayan boş slotları kullanır
+LANE_BACKGROUND = "background"
+
+LANES = (LANE_INTERACTIVE, LANE_BACKGROUND)
+
+
+class MikroQueueTimeout(asyncio.TimeoutError):
+    """
+    Sunucu slotu beklenirken süre doldu; Mikro'ya hiç gidilmedi.
+    """
+
+
+class LaneWaitStats:
+    def __init__(self):
+        self.acquired = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, waited: float) -> None:
+        self.acquired += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+
+    def snapshot(self) -> Dict:
+        return {
+            "acquired": self.acquired,
+            "queue_timeouts": self.timeouts,
+            "avg_wait_ms": round(self.total_wait / self.acquired * 1000, 2) if self.acquired else 0,
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+        }
+
+
+class ServerSlots:
+    """
+    Bir Mikro sunucusunun eş zamanlı çağrı slotları.
+    - interactive her boş slotu kullanabilir, bekleyen varsa önce o alır
+    - background en fazla background_limit slot kullanır, interaktif bekleyen varken başlamaz
+    Bekleyenler şerit içinde FIFO.
+    """
+
+    def __init__(self, capacity: int, background_limit: int):
+        self.capacity = capacity
+        self.background_limit = background_limit
+        self.in_flight: Dict[str, int] = {lane: 0 for lane in LANES}
+        self.waiters: Dict[str, Deque[asyncio.Future]] = {lane: deque() for lane in LANES}
+        self.waits: Dict[str, LaneWaitStats] = {lane: LaneWaitStats() for lane in LANES}
+
+    @property
+    def busy(self) -> int:
+        return sum(self.in_flight.values())
+
+    def _can_start(self, lane: str) -> bool:
+        if self.busy >= self.capacity:
+            return False
+
+        if lane == LANE_BACKGROUND:
+            return (
+                not self.waiters[LANE_INTERACTIVE]
+                and self.in_flight[LANE_BACKGROUND] < self.background_limit
+            )
+
+        return True
+
+    def _wake(self) -> None:
+        for lane in LANES:
+            waiters = self.waiters[lane]
+
+            while waiters and self._can_start(lane):
+                future = waiters.popleft()
+                if future.done():
+                    # beklerken iptal edildi
+                    continue
+                self.in_flight[lane] += 1
+                future.set_result(None)
+
+    async def acquire(self, lane: str) -> float:
+        """
+        Slot alınınca kuyrukta beklenen süreyi (sn) döner.
+        """
+        started = time.monotonic()
+
+        if not self.waiters[lane] and self._can_start(lane):
+            self.in_flight[lane] += 1
+            self.waits[lane].record(0.0)
+            return 0.0
+
+        future = asyncio.get_running_loop().create_future()
+        self.waiters[lane].append(future)
+
+        try:
+            await future
+        except BaseException:
+            if future.done() and not future.cancelled():
+                # slot verildiği anda iptal geldi: geri bırak
+                self.release(lane)
+            else:
+                future.cancel()
+                try:
+                    self.waiters[lane].remove(future)
+                except ValueError:
+                    pass
+                # sıradaki (ör. başka şeritteki) bekleyen artık başlayabilir
+                self._wake()
+            raise
+
+        waited = time.monotonic() - started
+        self.waits[lane].record(waited)
+        return waited
+
+    def release(self, lane: str) -> None:
+        self.in_flight[lane] -= 1
+        self._wake()
+
+    def idle(self) -> bool:
+        return not self.busy and not any(self.waiters.values())
+
+    def snapshot(self) -> Dict:
+        return {
+            "in_flight": self.busy,
+            "available_slots": self.capacity - self.busy,
+            "lanes": {
+                lane: {
+                    "in_flight": self.in_flight[lane],
+                    "waiting": len(self.waiters[lane]),
+                    **self.waits[lane].snapshot(),
+                }
+                for lane in LANES
+            },
+        }
+
+
+# =====================================================
+# ASYNC MIKRO CLIENT
+# =====================================================
+
+class AsyncMikroClient:
+    """
+    Mikro çağrıları event loop üzerinde bekler, worker thread tutmaz.
+    - sunucu başına bir keep-alive httpx.AsyncClient
+    - sunucu başına slot sınırı: yavaş bir müşteri sunucusu diğerlerini etkilemez
+    - slotlar öncelik şeritleriyle paylaşılır (ServerSlots), arka plan işleri
+      kullanıcı çağrılarının önüne geçmez
+    - connect / read timeout httpx'te, total timeout burada
+      (interactive: kuyruk beklemesi dahil, background: kuyruk ayrı background_queue_timeout ile)
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrency: int,
+        interactive_reserved: int,
+        background_queue_timeout: float,
+        max_connections: int,
+        connect_timeout: float,
+        read_timeout: float,
+        total_timeout: float,
+        idle_timeout: int,
+    ):
+        self.max_concurrency = max_concurrency
+        # en az bir slot arka plana kalır
+        self.background_limit = max(max_concurrency - interactive_reserved, 1)
+        self.background_queue_timeout = background_queue_timeout
+        self.max_connections = max_connections
+        self.total_timeout = total_timeout
+        self.idle_timeout = idle_timeout
+
+        self._timeout = httpx.Timeout(
+            connect=connect_timeout,
+            read=read_timeout,
+            write=read_timeout,
+            pool=total_timeout,
+        )
+
+        self._clients: Dict[MikroServerKey, httpx.AsyncClient] = {}
+        self._slots: Dict[MikroServerKey, ServerSlots] = {}
+        self._last_used: Dict[MikroServerKey, float] = {}
+        self._last_sweep = time.monotonic()
+
+        self.timeouts = 0
+        # süreç boyunca, sunucudan bağımsız şerit bazında kuyruk bekleme
+        self.lane_waits: Dict[str, LaneWaitStats] = {lane: LaneWaitStats() for lane in LANES}
+
+    def _client(self, key: MikroServerKey) -> httpx.AsyncClient:
+        client = self._clients.get(key)
+
+        if client is None:
+            client = httpx.AsyncClient(
+                timeout=self._timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=self.idle_timeout,
+                ),
+            )
+            self._clients[key] = client
+
+        return client
+
+    def _server_slots(self, key: MikroServerKey) -> ServerSlots:
+        slots = self._slots.get(key)
+
+        if slots is None:
+            slots = ServerSlots(self.max_concurrency, self.background_limit)
+            self._slots[key] = slots
+
+        return slots
+
+    def _queue_timeout(self, lane: str) -> float:
+        return self.background_queue_timeout if lane == LANE_BACKGROUND else self.total_timeout
+
+    async def _acquire(self, key: MikroServerKey, lane: str) -> ServerSlots:
+        if lane not in LANES:
+            raise ValueError(f"Bilinmeyen Mikro şeridi: {lane}")
+
+        slots = self._server_slots(key)
+
+        try:
+            waited = await asyncio.wait_for(slots.acquire(lane), timeout=self._queue_timeout(lane))
+        except asyncio.TimeoutError:
+            slots.waits[lane].timeouts += 1
+            self.lane_waits[lane].timeouts += 1
+            raise MikroQueueTimeout() from None
+
+        self.lane_waits[lane].record(waited)
+        return slots
+
+    async def _evict_idle(self, now: float) -> None:
+        self._last_sweep = now
+
+        expired = [
+            key for key, last_used in self._last_used.items()
+            if now - last_used > self.idle_timeout
+            # uçuşta / kuyrukta istek yoksa
+            and (key not in self._slots or self._slots[key].idle())
+        ]
+
+        for key in expired:
+            self._last_used.pop(key)
+            self._slots.pop(key, None)
+            client = self._clients.pop(key, None)
+            if client is not None:
+                await client.aclose()
+
+    def _trace(self, label: str):
+        # TLS varsa handshake start_tls bitince tamamlanmış sayılır
+        done_event = (
+            "connection.start_tls.complete"
+            if label.startswith("https")
+            else "connection.connect_tcp.complete"
+        )
+        started = {}
+
+        async def trace(event_name: str, info: Dict) -> None:
+            if event_name == "connection.connect_tcp.started":
+                started["at"] = time.perf_counter()
+
+            elif event_name == done_event and "at" in started:
+                mikro_http_metrics.record_connect(
+                    label, time.perf_counter() - started.pop("at")
+                )
+
+        return trace
+
+    async def _send(self, key: MikroServerKey, method: str, url: str, **kwargs) -> httpx.Response:
+        label = server_label(*key)
+        mikro_http_metrics.record_request(label)
+
+        return await self._client(key).request(
+            method,
+            url,
+            extensions={"trace": self._trace(label)},
+            **kwargs,
+        )
+
+    async def post(
+        self,
+        key: MikroServerKey,
+        url: str,
+        *,
+        lane: str = LANE_INTERACTIVE,
+        **kwargs,
+    ) -> httpx.Response:
+        now = time.monotonic()
+        if now - self._last_sweep > self.idle_timeout / 2:
+            await self._evict_idle(now)
+
+        self._last_used[key] = now
+
+        try:
+            slots = await self._acquire(key, lane)
+        except MikroQueueTimeout:
+            self.timeouts += 1
+            raise
+
+        try:
+            timeout = self.total_timeout
+            if lane == LANE_INTERACTIVE:
+                # kullanıcı açısından toplam süre kuyruk beklemesini de kapsar
+                timeout = max(self.total_timeout - (time.monotonic() - now), 0.001)
+
+            return await asyncio.wait_for(
+                self._send(key, "POST", url, **kwargs),
+                timeout=timeout,
+            )
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            slots.release(lane)
+
+    async def open_stream(
+        self,
+        key: MikroServerKey,
+        url: str,
+        *,
+        lane: str = LANE_INTERACTIVE,
+        **kwargs,
+    ):
+        """
+        Cevap gövdesi okunmadan döner: (response, close).
+        Sunucu slotu close() çağrılana kadar tutulur; close() idempotent.
+        total timeout sadece header'lar gelene kadar uygulanır, gövde read timeout ile sınırlı.
+        """
+        label = server_label(*key)
+        self._last_used[key] = time.monotonic()
+
+        slots = await self._acquire(key, lane)
+
+        try:
+            mikro_http_metrics.record_request(label)
+            client = self._client(key)
+            request = client.build_request(
+                "POST",
+                url,
+                extensions={"trace": self._trace(label)},
+                **kwargs,
+            )
+            response = await asyncio.wait_for(
+                client.send(request, stream=True),
+                timeout=self.total_timeout,
+            )
+        except BaseException:
+            slots.release(lane)
+            raise
+
+        closed = False
+
+        async def close() -> None:
+            # generator finally'si ve StreamingResponse background'u ikisi de
+            # çağırabilir; slot sadece bir kez bırakılır
+            nonlocal closed
+            if closed:
+                return
+            closed = True
+
+            try:
+                await response.aclose()
+            finally:
+                slots.release(lane)
+
+        return response, close
+
+    async def aclose(self) -> None:
+        clients = list(self._clients.values())
+        self._clients.clear()
+        self._slots.clear()
+        self._last_used.clear()
+
+        for client in clients:
+            await client.aclose()
+
+    def stats(self) -> Dict:
+        return {
+            "open_servers": len(self._clients),
+            "max_concurrency_per_server": self.max_concurrency,
+            "background_limit_per_server": self.background_limit,
+            "total_timeouts": self.timeouts,
+            "lanes": {lane: stats.snapshot() for lane, stats in self.lane_waits.items()},
+            "servers": {
+                server_label(*key): slots.snapshot()
+                for key, slots in self._slots.items()
+            },
+        }
+
+
+mikro_async_client = AsyncMikroClient(
+    max_concurrency=settings.MIKRO_MAX_CONCURRENCY_PER_SERVER,
+    interactive_reserved=settings.MIKRO_INTERACTIVE_RESERVED_SLOTS,
+    background_queue_timeout=settings.MIKRO_BACKGROUND_QUEUE_TIMEOUT,
+    max_connections=settings.MIKRO_HTTP_POOL_MAXSIZE,
+    connect_timeout=settings.MIKRO_CONNECT_TIMEOUT,
+    read_timeout=settings.MIKRO_HTTP_TIMEOUT,
+    total_timeout=settings.MIKRO_TOTAL_TIMEOUT,
+    idle_timeout=settings.MIKRO_HTTP_IDLE_TIMEOUT,
+)
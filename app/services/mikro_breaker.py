@@ -0,0 +1,160 @@
+import threading
+import time
+from typing import Dict, Optional, Set
+
+from app.core.config import settings
+from app.services.mikro_http import MikroServerKey, server_label
+
+CLOSED = "CLOSED"
+OPEN = "OPEN"
+HALF_OPEN = "HALF_OPEN"
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, label: str, retry_after: int):
+        self.label = label
+        self.retry_after = retry_after
+        super().__init__(f"{label} için circuit açık")
+
+
+# =====================================================
+# CIRCUIT BREAKER (Mikro sunucusu başına)
+# =====================================================
+
+class CircuitBreaker:
+    """
+    CLOSED   : istekler geçer, art arda hatalar sayılır
+    OPEN     : istekler hiç denenmeden reddedilir (fail fast)
+    HALF_OPEN: open_seconds dolunca tek bir deneme isteği geçer;
+               başarılıysa CLOSED, değilse tekrar OPEN
+    """
+
+    def __init__(self, label: str, *, failure_threshold: int, open_seconds: int):
+        self.label = label
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe_in_flight = False
+
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+
+    def before_call(self) -> None:
+        """
+        Circuit açıksa CircuitOpenError fırlatır.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return
+
+            elapsed = time.monotonic() - self.opened_at
+
+            if self.state == OPEN and elapsed >= self.open_seconds:
+                self.state = HALF_OPEN
+
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+
+            self.rejected += 1
+            raise CircuitOpenError(
+                self.label,
+                retry_after=max(int(self.open_seconds - elapsed), 1)
+            )
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self, error: str) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            self.last_error = error
+
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+            self._probe_in_flight = False
+
+    def abort(self) -> None:
+        """
+        Çağrı sonuçlanmadan iptal edildi (client koptu vb.), sayılmaz.
+        """
+        with self._lock:
+            self._probe_in_flight = False
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "open_for_s": (
+                    round(time.monotonic() - self.opened_at, 1)
+                    if self.opened_at else None
+                ),
+                "rejected": self.rejected,
+                "last_error": self.last_error,
+            }
+
+
+class MikroBreakerRegistry:
+    def __init__(self, *, failure_threshold: int, open_seconds: int):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._tenants: Dict[str, Set[str]] = {}
+
+    def get(self, key: MikroServerKey, tenant: Optional[str] = None) -> CircuitBreaker:
+        label = server_label(*key)
+
+        with self._lock:
+            breaker = self._breakers.get(label)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    label,
+                    failure_threshold=self.failure_threshold,
+                    open_seconds=self.open_seconds,
+                )
+                self._breakers[label] = breaker
+
+            if tenant:
+                self._tenants.setdefault(label, set()).add(tenant)
+
+            return breaker
+
+    def state_for(self, key: MikroServerKey) -> Dict:
+        label = server_label(*key)
+
+        with self._lock:
+            breaker = self._breakers.get(label)
+
+        if breaker is None:
+            return {"server": label, "state": CLOSED, "consecutive_failures": 0}
+
+        return {"server": label, **breaker.snapshot()}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            breakers = dict(self._breakers)
+            tenants = {label: sorted(names) for label, names in self._tenants.items()}
+
+        return {
+            label: {**breaker.snapshot(), "tenants": tenants.get(label, [])}
+            for label, breaker in breakers.items()
+        }
+
+
+mikro_breakers = MikroBreakerRegistry(
+    failure_threshold=settings.MIKRO_BREAKER_FAILURES,
+    open_seconds=settings.MIKRO_BREAKER_OPEN_SECONDS,
+)
@@ -0,0 +1,186 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.utils.mikro_main_file import mikro_response_error
+
+logger = logging.getLogger("uvicorn.error")
+
+# fetch: (parse edilmiş cevap, ham cevap byte boyutu)
+MikroFetch = Callable[[], Awaitable[Tuple[Any, int]]]
+
+
+def canonical_body_hash(body: Optional[Dict[str, Any]]) -> str:
+    """
+    Anahtar sırası / boşluk farkı aynı isteği farklı saymasın.
+    """
+    canonical = json.dumps(body or {}, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _CacheEntry:
+    tenant: str
+    data: Any
+    size: int
+    fresh_until: float
+    stale_until: float
+    refreshing: bool = False
+
+
+# =====================================================
+# MIKRO RESPONSE CACHE (TTL + stale-while-revalidate)
+# =====================================================
+
+class MikroResponseCache:
+    """
+    (tenant, endpoint, body) başına Mikro cevabı.
+    - sadece ttls içindeki endpointler cache'lenir (allowlist)
+    - TTL içinde: cache'ten döner
+    - TTL + stale penceresinde: eski cevap hemen döner, arka planda yenilenir
+    - max_entries / max_bytes aşılınca en eski kullanılan (LRU) silinir
+    - Mikro'nun HTTP 200 ile döndüğü hata cevapları (IsError) cache'lenmez,
+      yenilemede de eski (başarılı) cevabın yerine yazılmaz
+    """
+
+    def __init__(self, *, ttls: Dict[str, int], stale_seconds: int, max_entries: int, max_bytes: int):
+        self.ttls = ttls
+        self.stale_seconds = stale_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[Tuple[str, str, str], _CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._refresh_tasks = set()
+
+        self.stats_by_tenant: Dict[str, Dict[str, int]] = {}
+        self.evictions = 0
+
+    def ttl_for(self, endpoint: str) -> Optional[int]:
+        return self.ttls.get(endpoint)
+
+    def _count(self, tenant: str, name: str) -> None:
+        tenant_stats = self.stats_by_tenant.setdefault(
+            tenant,
+            {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0},
+        )
+        tenant_stats[name] += 1
+
+    def _remove(self, key) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _store(self, key, tenant: str, data: Any, size: int, ttl: int) -> None:
+        if key in self._entries:
+            self._remove(key)
+
+        # tek başına limitten büyük cevap cache'lenmez
+        if size > self.max_bytes:
+            return
+
+        now = time.monotonic()
+        self._entries[key] = _CacheEntry(
+            tenant=tenant,
+            data=data,
+            size=size,
+            fresh_until=now + ttl,
+            stale_until=now + ttl + self.stale_seconds,
+        )
+        self._bytes += size
+
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def _refresh(self, key, tenant: str, ttl: int, fetch: MikroFetch) -> None:
+        try:
+            data, size = await fetch()
+
+            error = mikro_response_error(data)
+            if error:
+                raise ValueError(f"Mikro hata döndü: {error}")
+
+            self._store(key, tenant, data, size, ttl)
+            self._count(tenant, "refreshes")
+        except Exception as e:
+            self._count(tenant, "refresh_errors")
+            logger.warning(f"MIKRO CACHE REFRESH FAILED | tenant={tenant} | endpoint={key[1]} | {e}")
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.refreshing = False
+
+    def _schedule_refresh(self, key, entry: _CacheEntry, ttl: int, fetch: MikroFetch) -> None:
+        if entry.refreshing:
+            return
+
+        entry.refreshing = True
+        task = asyncio.create_task(self._refresh(key, entry.tenant, ttl, fetch))
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def get_or_fetch(
+        self,
+        tenant: str,
+        endpoint: str,
+        body: Optional[Dict[str, Any]],
+        fetch: MikroFetch,
+    ) -> Any:
+        ttl = self.ttl_for(endpoint)
+
+        if not ttl:
+            data, _ = await fetch()
+            return data
+
+        key = (tenant, endpoint, canonical_body_hash(body))
+        entry = self._entries.get(key)
+        now = time.monotonic()
+
+        if entry is not None and now < entry.stale_until:
+            self._entries.move_to_end(key)
+
+            if now < entry.fresh_until:
+                self._count(tenant, "hits")
+            else:
+                self._count(tenant, "stale_hits")
+                self._schedule_refresh(key, entry, ttl, fetch)
+
+            return entry.data
+
+        self._count(tenant, "misses")
+        data, size = await fetch()
+
+        if mikro_response_error(data) is None:
+            self._store(key, tenant, data, size, ttl)
+
+        return data
+
+    def invalidate_tenant(self, tenant: str) -> None:
+        for key in [key for key in self._entries if key[0] == tenant]:
+            self._remove(key)
+
+    def stats(self) -> Dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "tenants": self.stats_by_tenant,
+        }
+
+
+mikro_response_cache = MikroResponseCache(
+    ttls=settings.MIKRO_CACHE_TTLS,
+    stale_seconds=settings.MIKRO_CACHE_STALE_SECONDS,
+    max_entries=settings.MIKRO_CACHE_MAX_ENTRIES,
+    max_bytes=settings.MIKRO_CACHE_MAX_MB * 1024 * 1024,
+)
@@ -0,0 +1,81 @@
+import threading
+from typing import Dict, Tuple
+
+# (protocol, api_ip, api_port)
+MikroServerKey = Tuple[str, str, int]
+
+
+def server_label(protocol: str, host: str, port: int) -> str:
+    return f"{protocol}://{host}:{port}"
+
+
+# =====================================================
+# METRICS
+# =====================================================
+
+class MikroHttpMetrics:
+    """
+    Mikro sunucusu başına istek / yeni bağlantı sayısı ve handshake süresi.
+    reuse_rate = bağlantı açmadan (keep-alive ile) giden isteklerin oranı.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._servers: Dict[str, Dict] = {}
+
+    def _server(self, label: str) -> Dict:
+        server = self._servers.get(label)
+        if server is None:
+            server = {
+                "requests": 0,
+                "new_connections": 0,
+                "handshake_total_ms": 0.0,
+                "handshake_max_ms": 0.0,
+            }
+            self._servers[label] = server
+        return server
+
+    def record_request(self, label: str) -> None:
+        with self._lock:
+            self._server(label)["requests"] += 1
+
+    def record_connect(self, label: str, elapsed: float) -> None:
+        elapsed_ms = elapsed * 1000
+
+        with self._lock:
+            server = self._server(label)
+            server["new_connections"] += 1
+            server["handshake_total_ms"] += elapsed_ms
+            server["handshake_max_ms"] = max(server["handshake_max_ms"], elapsed_ms)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            servers = {label: dict(values) for label, values in self._servers.items()}
+
+        totals = {"requests": 0, "new_connections": 0, "handshake_total_ms": 0.0}
+
+        for values in servers.values():
+            for key in totals:
+                totals[key] += values[key]
+            _add_rates(values)
+
+        _add_rates(totals)
+
+        return {"total": totals, "servers": servers}
+
+
+def _add_rates(values: Dict) -> None:
+    requests_count = values["requests"]
+    connections = values["new_connections"]
+
+    values["reuse_rate"] = (
+        round(max(requests_count - connections, 0) / requests_count, 4)
+        if requests_count else None
+    )
+    values["handshake_avg_ms"] = (
+        round(values["handshake_total_ms"] / connections, 2)
+        if connections else None
+    )
+
+
+mikro_http_metrics = MikroHttpMetrics()
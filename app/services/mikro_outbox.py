@@ -0,0 +1,662 @@
+import asyncio
+import json
+import logging
+import random
+import uuid
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+import anyio
+import anyio.to_thread
+from fastapi import HTTPException
+from sqlalchemy import event, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.master.master import TenantDB
+from app.models.tenant.tenant import MikroOutbox
+from app.routers.mikro_api import MikroNotAttempted, fetch_mikro_response_async
+from app.services.mikro_async import LANE_BACKGROUND
+from app.services.mikro_settings_cache import resolve_tenant_mikro_settings
+from app.services.tenant_service import connect_tenant_by_vergiNo
+from app.utils.mikro_main_file import mikro_response_error
+
+logger = logging.getLogger("uvicorn.error")
+
+# bu boyuttan büyük Mikro cevabı outbox kaydına yazılmaz
+MAX_STORED_RESPONSE_BYTES = 65536
+
+
+# =====================================================
+# ENQUEUE (yerel değişiklikle aynı transaction)
+# =====================================================
+
+def enqueue_mikro_write(
+    tenant_db: Session,
+    *,
+    tenant_db_name: str,
+    endpoint: str,
+    body: Optional[Dict[str, Any]] = None,
+    idempotency_key: Optional[str] = None,
+    created_user: Optional[UUID] = None,
+) -> Tuple[UUID, bool]:
+    """
+    Kaydı session'a ekler, commit çağırana aittir. (id, yeni_mi) döner;
+    aynı idempotency_key ile daha önce eklenmişse mevcut kaydın id'si döner.
+    Commit sonrası dispatcher uyandırılır.
+    """
+    outbox_id = tenant_db.execute(
+        insert(MikroOutbox)
+        .values(
+            id=uuid.uuid4(),
+            idempotency_key=idempotency_key or str(uuid.uuid4()),
+            endpoint=endpoint,
+            body=body,
+            created_user=created_user,
+        )
+        .on_conflict_do_nothing(index_elements=["idempotency_key"])
+        .returning(MikroOutbox.id)
+    ).scalar_one_or_none()
+
+    if outbox_id is None:
+        existing_id = tenant_db.execute(
+            select(MikroOutbox.id).where(MikroOutbox.idempotency_key == idempotency_key)
+        ).scalar_one()
+        return existing_id, False
+
+    # commit'ten önce: süreç commit ile notify arasında ölse bile tenant
+    # scan_seconds sonra işlenir. commit'ten sonra: hemen işlenir.
+    mark_tenant_due(tenant_db_name, delay=settings.MIKRO_OUTBOX_SCAN_SECONDS)
+
+    event.listen(
+        tenant_db,
+        "after_commit",
+        lambda _: mikro_outbox_dispatcher.notify(tenant_db_name),
+        once=True,
+    )
+
+    return outbox_id, True
+
+
+# =====================================================
+# MASTER: ZAMANI GELEN TENANT'LAR
+# =====================================================
+
+MARK_DUE_SQL = text("""
+    INSERT INTO mikro_outbox_due (tenant_db_name, due_at, seq)
+    VALUES (:tenant, now() + make_interval(secs => :delay), 1)
+    ON CONFLICT (tenant_db_name) DO UPDATE SET
+        due_at = LEAST(mikro_outbox_due.due_at, EXCLUDED.due_at),
+        seq = mikro_outbox_due.seq + 1
+""")
+
+# zamanı gelen tenant'ları lease süresi kadar bu worker'a ayırır
+CLAIM_TENANTS_SQL = text("""
+    UPDATE mikro_outbox_due d SET
+        due_at = now() + make_interval(secs => :lease_seconds)
+    WHERE d.tenant_db_name IN (
+        SELECT tenant_db_name FROM mikro_outbox_due
+        WHERE due_at <= now()
+          AND NOT (tenant_db_name = ANY(:running))
+        ORDER BY due_at
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING d.tenant_db_name, d.seq
+""")
+
+NEXT_TENANT_DUE_SQL = text("""
+    SELECT EXTRACT(EPOCH FROM (MIN(due_at) - now()))
+    FROM mikro_outbox_due
+    WHERE NOT (tenant_db_name = ANY(:running))
+""")
+
+# bekleyen kayıt yok: işlerken yeni enqueue olmadıysa (seq aynı) satır silinir
+FINISH_TENANT_EMPTY_SQL = text("""
+    DELETE FROM mikro_outbox_due
+    WHERE tenant_db_name = :tenant AND seq = :seq
+""")
+
+FINISH_TENANT_LATER_SQL = text("""
+    UPDATE mikro_outbox_due SET
+        due_at = CASE
+            WHEN seq = :seq THEN now() + make_interval(secs => :delay)
+            ELSE LEAST(due_at, now() + make_interval(secs => :delay))
+        END
+    WHERE tenant_db_name = :tenant
+""")
+
+
+def _execute_master(statement, params: Dict, *, fetch: bool = False):
+    master_db = SessionLocal()
+
+    try:
+        result = master_db.execute(statement, params)
+        rows = result.all() if fetch else None
+        master_db.commit()
+        return rows
+    except Exception:
+        master_db.rollback()
+        raise
+    finally:
+        master_db.close()
+
+
+def mark_tenant_due(tenant_db_name: str, *, delay: float = 0) -> None:
+    _execute_master(MARK_DUE_SQL, {"tenant": tenant_db_name, "delay": delay})
+
+
+def claim_due_tenants(limit: int, lease_seconds: int, running: List[str]) -> Tuple[List, Optional[float]]:
+    """
+    (zamanı gelen tenant'lar, sıradaki tenant'ın zamanına kalan saniye) döner.
+    """
+    master_db = SessionLocal()
+
+    try:
+        rows = []
+        if limit > 0:
+            rows = master_db.execute(
+                CLAIM_TENANTS_SQL,
+                {"limit": limit, "lease_seconds": lease_seconds, "running": running},
+            ).all()
+            master_db.commit()
+
+        claimed = running + [row.tenant_db_name for row in rows]
+        next_in = master_db.execute(NEXT_TENANT_DUE_SQL, {"running": claimed}).scalar()
+        master_db.commit()
+
+        return rows, None if next_in is None else max(float(next_in), 0.0)
+    except Exception:
+        master_db.rollback()
+        raise
+    finally:
+        master_db.close()
+
+
+def finish_tenant(tenant_db_name: str, seq: int, due_in: Optional[float]) -> None:
+    if due_in is None:
+        _execute_master(FINISH_TENANT_EMPTY_SQL, {"tenant": tenant_db_name, "seq": seq})
+    else:
+        _execute_master(
+            FINISH_TENANT_LATER_SQL,
+            {"tenant": tenant_db_name, "seq": seq, "delay": due_in},
+        )
+
+
+def mark_all_tenants_due() -> int:
+    """
+    Tek seferlik: master'da satırı olmayan tüm aktif tenant'ları bir kez
+    taranacak şekilde işaretler (due tablosundan önce eklenmiş kayıtlar için).
+    """
+    master_db = SessionLocal()
+
+    try:
+        names = list(
+            master_db.execute(
+                select(TenantDB.db_name).where(TenantDB.is_active != False)
+            ).scalars()
+        )
+        for name in names:
+            master_db.execute(MARK_DUE_SQL, {"tenant": name, "delay": 0})
+        master_db.commit()
+        return len(names)
+    finally:
+        master_db.close()
+
+
+# =====================================================
+# TENANT: KAYITLAR
+# =====================================================
+
+# zamanı gelmiş bekleyen kayıtlar + süresi dolmuş SENDING (worker öldüyse).
+# her claim yeni lease_token alır; sonucu sadece bu token'ı tutan yazabilir.
+CLAIM_SQL = text("""
+    UPDATE mikro_outbox o SET
+        status = 'SENDING',
+        attempts = o.attempts + 1,
+        locked_until = now() + make_interval(secs => :lease_seconds),
+        lease_token = uuid_generate_v4()
+    WHERE o.id IN (
+        SELECT id FROM mikro_outbox
+        WHERE status IN ('PENDING', 'SENDING')
+          AND next_attempt_at <= now()
+          AND (locked_until IS NULL OR locked_until < now())
+        ORDER BY next_attempt_at
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING o.id, o.endpoint, o.body, o.attempts, o.lease_token
+""")
+
+MARK_SENT_SQL = text("""
+    UPDATE mikro_outbox SET
+        status = 'SENT',
+        sent_at = now(),
+        locked_until = NULL,
+        lease_token = NULL,
+        last_error = NULL,
+        response = CAST(:response AS JSONB)
+    WHERE id = :id AND status = 'SENDING' AND lease_token = :lease_token
+    RETURNING id
+""")
+
+MARK_FAILED_SQL = text("""
+    UPDATE mikro_outbox SET
+        status = CASE WHEN attempts >= :max_attempts THEN 'DEAD' ELSE 'PENDING' END,
+        next_attempt_at = now() + make_interval(secs => :delay),
+        locked_until = NULL,
+        lease_token = NULL,
+        last_error = :error
+    WHERE id = :id AND status = 'SENDING' AND lease_token = :lease_token
+    RETURNING status
+""")
+
+# Mikro'ya gidilmedi (circuit açık / meşgul): claim'de artan deneme geri alınır,
+# uzun bir kesinti kayıtları DEAD'e taşımaz
+MARK_DEFERRED_SQL = text("""
+    UPDATE mikro_outbox SET
+        status = 'PENDING',
+        attempts = GREATEST(attempts - 1, 0),
+        next_attempt_at = now() + make_interval(secs => :delay),
+        locked_until = NULL,
+        lease_token = NULL,
+        last_error = :error
+    WHERE id = :id AND status = 'SENDING' AND lease_token = :lease_token
+    RETURNING id
+""")
+
+NEXT_DUE_SQL = text("""
+    SELECT EXTRACT(EPOCH FROM (
+        MIN(GREATEST(next_attempt_at, COALESCE(locked_until, next_attempt_at))) - now()
+    ))
+    FROM mikro_outbox
+    WHERE status IN ('PENDING', 'SENDING')
+""")
+
+
+def _execute(tenant_db_name: str, statement, params: Dict, *, fetch: bool = False):
+    tenant_db = connect_tenant_by_vergiNo(tenant_db_name)
+
+    try:
+        result = tenant_db.execute(statement, params)
+        rows = result.all() if fetch else None
+        tenant_db.commit()
+        return rows
+    except Exception:
+        tenant_db.rollback()
+        raise
+    finally:
+        tenant_db.close()
+
+
+def claim_batch(tenant_db_name: str, limit: int, lease_seconds: int) -> List:
+    return _execute(
+        tenant_db_name,
+        CLAIM_SQL,
+        {"limit": limit, "lease_seconds": lease_seconds},
+        fetch=True,
+    )
+
+
+def next_due_in(tenant_db_name: str) -> Optional[float]:
+    tenant_db = connect_tenant_by_vergiNo(tenant_db_name)
+
+    try:
+        seconds = tenant_db.execute(NEXT_DUE_SQL).scalar()
+        return None if seconds is None else max(float(seconds), 0.0)
+    finally:
+        tenant_db.close()
+
+
+def json_dumps(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+# =====================================================
+# DISPATCHER
+# =====================================================
+
+class MikroOutboxDispatcher:
+    """
+    Tenant outbox'larını arka planda boşaltır.
+    - sadece master'daki mikro_outbox_due satırı zamanı gelmiş tenant'lara bağlanılır;
+      bekleyen kaydı kalmayan tenant'ın satırı silinir, bir daha taranmaz
+    - her tenant bağımsız bir task'ta işlenir, aynı anda en fazla `max_tenants`;
+      yavaş / kapalı bir Mikro sunucusu diğer tenant'ları bekletmez
+    - aynı anda en fazla `concurrency` gönderim, tenant başına `tenant_concurrency`;
+      kayıt sadece boş gönderim slotu kadar alınır (alınan her kayıt hemen gönderilir,
+      lease beklemede dolmaz)
+    - kayıtlar / tenant'lar FOR UPDATE SKIP LOCKED ile alındığı için birden fazla
+      worker / süreç güvenle çalışır; sonuç sadece kaydın güncel lease_token'ı ile yazılır
+    - gönderim en az bir kezdir: lease dolduktan sonra (ör. worker öldü) kayıt tekrar
+      gönderilebilir, Mikro tarafında tekilleştirme yoktur
+    - hata: üstel bekleme (jitter'lı), max_attempts sonra DEAD; circuit açık /
+      sunucu meşgul (Mikro'ya gidilmedi) deneme sayılmaz, Retry-After sonra tekrar denenir
+    - DB çağrıları ayrı, sınırlı bir thread havuzunda (istek threadpool'unu doldurmaz)
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency: int,
+        tenant_concurrency: int,
+        max_tenants: int,
+        db_threads: int,
+        max_attempts: int,
+        backoff_base: int,
+        backoff_max: int,
+        lease_seconds: int,
+        scan_seconds: int,
+    ):
+        self.concurrency = concurrency
+        self.tenant_concurrency = tenant_concurrency
+        self.max_tenants = max_tenants
+        self.db_threads = db_threads
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease_seconds = lease_seconds
+        self.scan_seconds = scan_seconds
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._slots_changed: Optional[asyncio.Condition] = None
+        self._db_limiter: Optional[anyio.CapacityLimiter] = None
+
+        self._free_slots = concurrency
+        # tenant -> işleyen task
+        self._tenant_tasks: Dict[str, asyncio.Task] = {}
+
+        self.stats_by_tenant: Dict[str, Dict[str, int]] = {}
+        self.lost_leases = 0
+
+    def _count(self, tenant: str, name: str) -> None:
+        tenant_stats = self.stats_by_tenant.setdefault(
+            tenant, {"sent": 0, "failed_attempts": 0, "deferred": 0, "dead": 0}
+        )
+        tenant_stats[name] += 1
+
+    def backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_base * 2 ** max(attempts - 1, 0), self.backoff_max)
+        return round(delay * random.uniform(0.8, 1.2), 3)
+
+    async def _db(self, func, *args, **kwargs):
+        return await anyio.to_thread.run_sync(
+            partial(func, *args, **kwargs), limiter=self._db_limiter
+        )
+
+    # ---------------------------------------------
+    # yaşam döngüsü
+    # ---------------------------------------------
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._slots_changed = asyncio.Condition()
+        self._db_limiter = anyio.CapacityLimiter(self.db_threads)
+        self._free_slots = self.concurrency
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        self._loop = None
+
+        if task is None:
+            return
+
+        # yarıda kalan gönderimler lease süresi dolunca tekrar alınır
+        tasks = [task, *self._tenant_tasks.values()]
+        for pending in tasks:
+            pending.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tenant_tasks.clear()
+
+    def notify(self, tenant: str) -> None:
+        """
+        Thread-safe, sync endpointlerin commit'inden sonra çağrılır:
+        tenant master'da hemen işlenecek olarak işaretlenir, döngü uyandırılır.
+        """
+        try:
+            mark_tenant_due(tenant)
+        except Exception as e:
+            # commit'ten önce gecikmeli işaretlendi; en geç scan_seconds sonra işlenir
+            logger.warning(f"MIKRO OUTBOX MARK DUE FAILED | tenant={tenant} | {e}")
+
+        self._wake_up()
+
+    def _wake_up(self) -> None:
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake.set)
+
+    # ---------------------------------------------
+    # döngü
+    # ---------------------------------------------
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            next_in = self.scan_seconds
+
+            try:
+                rows, due_in = await self._db(
+                    claim_due_tenants,
+                    self.max_tenants - len(self._tenant_tasks),
+                    self.lease_seconds,
+                    list(self._tenant_tasks),
+                )
+                for row in rows:
+                    self._tenant_tasks[row.tenant_db_name] = asyncio.create_task(
+                        self._process_tenant(row.tenant_db_name, row.seq)
+                    )
+                if due_in is not None:
+                    next_in = min(next_in, due_in)
+            except Exception as e:
+                logger.warning(f"MIKRO OUTBOX SCAN FAILED | {e}")
+
+            try:
+                # yeni enqueue / biten tenant task'ı döngüyü erken uyandırır
+                await asyncio.wait_for(self._wake.wait(), timeout=max(next_in, 0.05))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _acquire_slots(self, want: int) -> int:
+        async with self._slots_changed:
+            await self._slots_changed.wait_for(lambda: self._free_slots > 0)
+            taken = min(want, self._free_slots)
+            self._free_slots -= taken
+            return taken
+
+    async def _release_slots(self, count: int) -> None:
+        if count <= 0:
+            return
+        async with self._slots_changed:
+            self._free_slots += count
+            self._slots_changed.notify_all()
+
+    async def _process_tenant(self, tenant: str, seq: int) -> None:
+        due_in: Optional[float] = self.scan_seconds
+
+        try:
+            mikro_settings = None
+
+            while True:
+                slots = await self._acquire_slots(self.tenant_concurrency)
+                try:
+                    rows = await self._db(claim_batch, tenant, slots, self.lease_seconds)
+                except BaseException:
+                    await self._release_slots(slots)
+                    raise
+
+                # kullanılmayan slotlar hemen geri verilir
+                await self._release_slots(slots - len(rows))
+
+                if not rows:
+                    break
+
+                if mikro_settings is None:
+                    try:
+                        mikro_settings = await resolve_tenant_mikro_settings(tenant)
+                    except HTTPException as e:
+                        await asyncio.gather(*(
+                            self._failed(tenant, row, f"Mikro ayarları okunamadı: {e.detail}")
+                            for row in rows
+                        ))
+                        await self._release_slots(len(rows))
+                        continue
+
+                await asyncio.gather(*(
+                    self._deliver(tenant, row, mikro_settings) for row in rows
+                ))
+
+            due_in = await self._db(next_due_in, tenant)
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"MIKRO OUTBOX TENANT FAILED | tenant={tenant} | {e}")
+
+        finally:
+            if self._tenant_tasks.get(tenant) is asyncio.current_task():
+                del self._tenant_tasks[tenant]
+
+        try:
+            await self._db(finish_tenant, tenant, seq, due_in)
+        except Exception as e:
+            # satır lease_seconds sonra tekrar zamanı gelmiş sayılır
+            logger.warning(f"MIKRO OUTBOX FINISH FAILED | tenant={tenant} | {e}")
+
+        self._wake.set()
+
+    async def _deliver(self, tenant: str, row, mikro_settings) -> None:
+        try:
+            try:
+                response = await fetch_mikro_response_async(
+                    settings=mikro_settings,
+                    endpoint=row.endpoint,
+                    body=row.body,
+                    tenant=tenant,
+                    lane=LANE_BACKGROUND,
+                )
+            finally:
+                await self._release_slots(1)
+        except MikroNotAttempted as e:
+            # circuit açık / sırada süre doldu: Retry-After kadar bekle, deneme sayılmaz
+            delay = float((e.headers or {}).get("Retry-After", 0)) or self.backoff(1)
+            await self._deferred(tenant, row, str(e.detail), delay)
+            return
+        except HTTPException as e:
+            await self._failed(tenant, row, str(e.detail))
+            return
+        except Exception as e:
+            await self._failed(tenant, row, str(e) or type(e).__name__)
+            return
+
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+
+        error = mikro_response_error(data)
+        if error:
+            await self._failed(tenant, row, error)
+            return
+
+        stored = data if len(response.content) <= MAX_STORED_RESPONSE_BYTES else None
+
+        result = await self._db(
+            _execute,
+            tenant,
+            MARK_SENT_SQL,
+            {"id": row.id, "lease_token": row.lease_token, "response": json_dumps(stored)},
+            fetch=True,
+        )
+
+        if not result:
+            self._lost_lease(tenant, row)
+            return
+
+        self._count(tenant, "sent")
+
+    async def _failed(self, tenant: str, row, error: str, delay: Optional[float] = None) -> None:
+        result = await self._db(
+            _execute,
+            tenant,
+            MARK_FAILED_SQL,
+            {
+                "id": row.id,
+                "lease_token": row.lease_token,
+                "error": error[:500],
+                "max_attempts": self.max_attempts,
+                "delay": delay or self.backoff(row.attempts),
+            },
+            fetch=True,
+        )
+
+        if not result:
+            self._lost_lease(tenant, row)
+            return
+
+        self._count(tenant, "failed_attempts")
+
+        if result[0].status == "DEAD":
+            self._count(tenant, "dead")
+            logger.warning(
+                f"MIKRO OUTBOX DEAD | tenant={tenant} | id={row.id} | "
+                f"endpoint={row.endpoint} | attempts={row.attempts} | {error}"
+            )
+
+    async def _deferred(self, tenant: str, row, error: str, delay: float) -> None:
+        result = await self._db(
+            _execute,
+            tenant,
+            MARK_DEFERRED_SQL,
+            {
+                "id": row.id,
+                "lease_token": row.lease_token,
+                "error": error[:500],
+                "delay": delay,
+            },
+            fetch=True,
+        )
+
+        if not result:
+            self._lost_lease(tenant, row)
+            return
+
+        self._count(tenant, "deferred")
+
+    def _lost_lease(self, tenant: str, row) -> None:
+        # gönderim lease süresinden uzun sürdü, kayıt başka bir worker'da
+        self.lost_leases += 1
+        logger.warning(
+            f"MIKRO OUTBOX LEASE LOST | tenant={tenant} | id={row.id} | endpoint={row.endpoint}"
+        )
+
+    def stats(self) -> Dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "concurrency": self.concurrency,
+            "free_slots": self._free_slots,
+            "active_tenants": sorted(self._tenant_tasks),
+            "max_tenants": self.max_tenants,
+            "lost_leases": self.lost_leases,
+            "tenants": self.stats_by_tenant,
+        }
+
+
+mikro_outbox_dispatcher = MikroOutboxDispatcher(
+    concurrency=settings.MIKRO_OUTBOX_CONCURRENCY,
+    tenant_concurrency=settings.MIKRO_OUTBOX_TENANT_CONCURRENCY,
+    max_tenants=settings.MIKRO_OUTBOX_MAX_TENANTS,
+    db_threads=settings.MIKRO_OUTBOX_DB_THREADS,
+    max_attempts=settings.MIKRO_OUTBOX_MAX_ATTEMPTS,
+    backoff_base=settings.MIKRO_OUTBOX_BACKOFF_BASE,
+    backoff_max=settings.MIKRO_OUTBOX_BACKOFF_MAX,
+    lease_seconds=settings.MIKRO_OUTBOX_LEASE_SECONDS,
+    scan_seconds=settings.MIKRO_OUTBOX_SCAN_SECONDS,
+)
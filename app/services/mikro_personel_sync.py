@@ -0,0 +1,617 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Boolean, Column, DateTime, Integer, MetaData, String, Table, select, text
+from sqlalchemy.dialects.postgresql import UUID, insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.tenant.tenant import Firm, MikroSyncState
+from app.routers.mikro_api import call_mikro_api_async
+from app.services.login_index import index_new_users
+from app.services.mikro_async import LANE_BACKGROUND
+from app.services.mikro_settings_cache import MikroSettingsSnapshot, resolve_tenant_mikro_settings
+from app.services.tenant_service import connect_tenant_by_vergiNo
+from app.utils.mikro_main_file import clean_mikro_str, mikro_response_error, parse_mikro_datetime
+
+logger = logging.getLogger("uvicorn.error")
+
+DATASET = "personel"
+
+# Mikro PERSONELLER alanları -> users
+PERSONEL_FIELDS = {
+    "guid": "per_Guid",
+    "kod": "per_kod",
+    "adi": "per_adi",
+    "soyadi": "per_soyadi",
+    "email": "per_mail",
+    "ceptel": "per_cep_tel",
+    "iptal": "per_iptal",
+    "cikis_tarihi": "per_cikis_tar",
+    "lastup": "per_lastup_date",
+}
+
+# Mikro'dan gelip login'i olmayan kullanıcılar: şifre hash'i tanınmaz, login olamaz
+UNUSABLE_PASSWORD = "!"
+PLACEHOLDER_EMAIL_DOMAIN = "personel.invalid"
+# raporda dönülen atlanan personel kodu sayısı
+MAX_REPORTED_SKIPPED_KEYS = 100
+
+# tenant başına aynı anda tek sync
+_sync_locks: Dict[str, asyncio.Lock] = {}
+
+
+# =====================================================
+# MIKRO -> SATIRLAR
+# =====================================================
+
+def extract_mikro_rows(data: Any) -> List[Dict]:
+    """
+    Mikro V2 liste cevabı: {"result": [{"Data": [...], "IsError": false, ...}]}
+    """
+    error = mikro_response_error(data)
+    if error:
+        raise HTTPException(
+            status_code=502,
+            detail=f"Mikro hata döndü: {error}"
+        )
+
+    if isinstance(data, dict) and isinstance(data.get("result"), list) and data["result"]:
+        data = data["result"][0]
+
+    if isinstance(data, dict):
+        data = data.get("Data", data.get("data"))
+
+    if not isinstance(data, list):
+        raise HTTPException(
+            status_code=502,
+            detail="Mikro personel listesi okunamadı"
+        )
+
+    return data
+
+
+def parse_personel_row(row: Dict) -> Optional[Dict]:
+    """
+    Mikro satırını stage satırına çevirir. Guid ve kod ikisi de yoksa None.
+    """
+    per_guid = None
+    raw_guid = row.get(PERSONEL_FIELDS["guid"])
+
+    if raw_guid:
+        try:
+            per_guid = uuid.UUID(str(raw_guid))
+        except ValueError:
+            per_guid = None
+
+    per_kod = clean_mikro_str(row.get(PERSONEL_FIELDS["kod"]), 20)
+
+    if not per_guid and not per_kod:
+        return None
+
+    long_name = " ".join(
+        part for part in (
+            clean_mikro_str(row.get(PERSONEL_FIELDS["adi"]), 50),
+            clean_mikro_str(row.get(PERSONEL_FIELDS["soyadi"]), 50),
+        ) if part
+    )
+
+    return {
+        "per_guid": per_guid,
+        "per_kod": per_kod,
+        "long_name": long_name[:50] or None,
+        "email": clean_mikro_str(row.get(PERSONEL_FIELDS["email"]), 50),
+        "ceptel": clean_mikro_str(row.get(PERSONEL_FIELDS["ceptel"]), 11),
+        "pasif": bool(row.get(PERSONEL_FIELDS["iptal"]))
+                 or parse_mikro_datetime(row.get(PERSONEL_FIELDS["cikis_tarihi"])) is not None,
+        "lastup": parse_mikro_datetime(row.get(PERSONEL_FIELDS["lastup"])),
+    }
+
+
+def mikro_page_body(page: int, lastup_field: str, watermark: Optional[datetime]) -> Dict:
+    body = {
+        "Index": page,
+        "Size": settings.MIKRO_SYNC_PAGE_SIZE,
+        "Sort": lastup_field,
+    }
+
+    # aynı saniyede değişen kayıtlar kaçmasın diye >= (tekrar gelen satır no-op olur)
+    if watermark:
+        body["Where"] = f"{lastup_field} >= '{watermark:%Y-%m-%d %H:%M:%S}'"
+
+    return body
+
+
+def personel_page_body(page: int, watermark: Optional[datetime]) -> Dict:
+    return mikro_page_body(page, PERSONEL_FIELDS["lastup"], watermark)
+
+
+async def fetch_personel(
+    mikro_settings: MikroSettingsSnapshot,
+    watermark: Optional[datetime],
+) -> Dict:
+    """
+    Sayfa sayfa çeker; guid (yoksa kod) başına en son satır kalır.
+    """
+    by_key: Dict[Any, Dict] = {}
+    fetched = 0
+    skipped = 0
+    page = 0
+
+    while True:
+        data = await call_mikro_api_async(
+            settings=mikro_settings,
+            endpoint=settings.MIKRO_PERSONEL_ENDPOINT,
+            body=personel_page_body(page, watermark),
+            lane=LANE_BACKGROUND,
+        )
+        rows = extract_mikro_rows(data)
+        fetched += len(rows)
+
+        for row in rows:
+            parsed = parse_personel_row(row) if isinstance(row, dict) else None
+
+            if parsed is None:
+                skipped += 1
+                continue
+
+            by_key[parsed["per_guid"] or parsed["per_kod"]] = parsed
+
+        if len(rows) < settings.MIKRO_SYNC_PAGE_SIZE:
+            break
+
+        page += 1
+
+    # aynı kod iki farklı guid ile gelirse sonuncusu
+    by_kod = {}
+    for parsed in by_key.values():
+        by_kod[parsed["per_kod"] or parsed["per_guid"]] = parsed
+
+    stage_rows = list(by_kod.values())
+    for row_no, parsed in enumerate(stage_rows, start=1):
+        parsed["row_no"] = row_no
+
+    return {"rows": stage_rows, "fetched": fetched, "skipped": skipped}
+
+
+# =====================================================
+# SET-BASED APPLY (tek transaction)
+# =====================================================
+
+_stage = Table(
+    "mikro_personel_stage",
+    MetaData(),
+    Column("row_no", Integer, primary_key=True, autoincrement=False),
+    Column("per_guid", UUID(as_uuid=True)),
+    Column("per_kod", String(20)),
+    Column("long_name", String(50)),
+    Column("email", String(50)),
+    Column("ceptel", String(11)),
+    Column("pasif", Boolean, nullable=False),
+    Column("lastup", DateTime),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+
+# stage satırı -> mevcut kullanıcı: önce guid, guid'i olmayan kullanıcılarda kod
+_MATCHED_CTE = """
+    matched AS (
+        SELECT DISTINCT ON (s.row_no)
+            u."kullanici_Guid" AS user_id,
+            u.kullanici_pasif AS was_pasif,
+            s.*
+        FROM mikro_personel_stage s
+        JOIN users u
+          ON (s.per_guid IS NOT NULL AND u.mikro_personel_guid = s.per_guid)
+          OR (
+                u.mikro_personel_guid IS NULL
+            AND s.per_kod IS NOT NULL
+            AND u.mikro_personel_kod = s.per_kod
+            AND NOT EXISTS (
+                SELECT 1 FROM users x WHERE x.mikro_personel_guid = s.per_guid
+            )
+          )
+        ORDER BY s.row_no, (u.mikro_personel_guid IS NOT NULL) DESC, u.kullanici_no
+    )
+"""
+
+UPDATE_MATCHED_SQL = text(f"""
+    WITH {_MATCHED_CTE},
+    changed AS (
+        UPDATE users u SET
+            mikro_personel_guid = COALESCE(m.per_guid, u.mikro_personel_guid),
+            mikro_personel_kod = COALESCE(m.per_kod, u.mikro_personel_kod),
+            "kullanici_LongName" = COALESCE(m.long_name, u."kullanici_LongName"),
+            "kullanici_Ceptel" = COALESCE(m.ceptel, u."kullanici_Ceptel"),
+            kullanici_pasif = m.pasif,
+            mikro_last_sync = :now,
+            kullanici_lastup_date = :now
+        FROM matched m
+        WHERE u."kullanici_Guid" = m.user_id
+          AND (
+                u.mikro_personel_guid IS DISTINCT FROM COALESCE(m.per_guid, u.mikro_personel_guid)
+             OR u.mikro_personel_kod IS DISTINCT FROM COALESCE(m.per_kod, u.mikro_personel_kod)
+             OR u."kullanici_LongName" IS DISTINCT FROM COALESCE(m.long_name, u."kullanici_LongName")
+             OR u."kullanici_Ceptel" IS DISTINCT FROM COALESCE(m.ceptel, u."kullanici_Ceptel")
+             OR u.kullanici_pasif IS DISTINCT FROM m.pasif
+          )
+        RETURNING m.was_pasif, u.kullanici_pasif
+    )
+    SELECT
+        (SELECT count(*) FROM matched) AS matched,
+        (SELECT COALESCE(array_agg(row_no), '{{}}') FROM matched) AS matched_rows,
+        count(*) AS updated,
+        count(*) FILTER (WHERE kullanici_pasif AND NOT COALESCE(was_pasif, false)) AS deactivated
+    FROM changed
+""")
+
+# eşleşmeyen, aktif personel -> yeni kullanıcı (kullanıcı adı = per_kod)
+INSERT_NEW_SQL = text(f"""
+    WITH {_MATCHED_CTE}
+    INSERT INTO users (
+        "kullanici_Guid", "firma_siraNo", kullanici_no, kullanici_name, kullanici_pw,
+        "kullanici_LongName", "kullanici_EMail", "kullanici_Ceptel", kullanici_pasif,
+        mikro_personel_guid, mikro_personel_kod, mikro_last_sync, kullanici_create_date
+    )
+    SELECT
+        uuid_generate_v4(),
+        :firma_sirano,
+        nextval('users_kullanici_no_seq'),
+        s.per_kod,
+        :unusable_pw,
+        s.long_name,
+        COALESCE(s.email, lower(s.per_kod) || '@' || :email_domain),
+        s.ceptel,
+        false,
+        s.per_guid,
+        s.per_kod,
+        :now,
+        :now
+    FROM mikro_personel_stage s
+    WHERE NOT s.pasif
+      AND s.per_kod IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM matched m WHERE m.row_no = s.row_no)
+      AND NOT EXISTS (SELECT 1 FROM users x WHERE x.mikro_personel_kod = s.per_kod)
+    ON CONFLICT DO NOTHING
+    RETURNING "kullanici_Guid", "kullanici_EMail", kullanici_name, mikro_personel_kod
+""")
+
+# tam sync: Mikro listesinde artık olmayan bağlı kullanıcılar pasife alınır
+_MISSING_WHERE = """
+    (u.mikro_personel_guid IS NOT NULL OR u.mikro_personel_kod IS NOT NULL)
+    AND u.kullanici_pasif IS NOT TRUE
+"""
+
+DEACTIVATE_CHECK_SQL = text(f"""
+    SELECT
+        count(*) AS linked,
+        count(*) FILTER (
+            WHERE NOT EXISTS (
+                SELECT 1 FROM mikro_personel_stage s
+                WHERE s.per_guid = u.mikro_personel_guid
+                   OR s.per_kod = u.mikro_personel_kod
+            )
+        ) AS missing
+    FROM users u
+    WHERE {_MISSING_WHERE}
+""")
+
+DEACTIVATE_MISSING_SQL = text(f"""
+    UPDATE users u SET
+        kullanici_pasif = true,
+        mikro_last_sync = :now,
+        kullanici_lastup_date = :now
+    WHERE {_MISSING_WHERE}
+      AND NOT EXISTS (
+          SELECT 1 FROM mikro_personel_stage s
+          WHERE s.per_guid = u.mikro_personel_guid
+             OR s.per_kod = u.mikro_personel_kod
+      )
+""")
+
+
+def deactivation_blocked(fetched: int, linked: int, missing: int, force: bool) -> Optional[str]:
+    """
+    Mikro boş / eksik liste döndüyse (yetki, filtre, yarım cevap) bağlı
+    kullanıcıların toplu pasife alınmasını engeller. Sebep yoksa None.
+    """
+    if force or missing == 0:
+        return None
+
+    if fetched == 0:
+        return "Mikro boş personel listesi döndü"
+
+    limit = max(1, int(linked * settings.MIKRO_SYNC_MAX_DEACTIVATE_RATIO))
+    if missing > limit:
+        return (
+            f"{missing}/{linked} bağlı kullanıcı listede yok "
+            f"(sınır {limit}); force=true ile zorlanabilir"
+        )
+
+    return None
+
+
+def next_watermark(
+    rows: List[Dict],
+    previous: Optional[datetime],
+    applied_rows: set,
+) -> Tuple[Optional[datetime], List[Dict]]:
+    """
+    (yeni watermark, atlanan satırlar) döner.
+    Atlanan: aktif, kodlu ama ne eşleşen ne eklenebilen satır (kullanıcı adı /
+    email / kod çakışması). Watermark bunların en eskisini geçmez, böylece
+    sonraki incremental sync'te tekrar denenirler. Eşleşmeyen pasif / kodsuz
+    satırlar hiçbir zaman kullanıcı oluşturmaz, watermark'ı tutmaz.
+    """
+    skipped = [
+        row for row in rows
+        if row["row_no"] not in applied_rows and not row["pasif"] and row["per_kod"]
+    ]
+
+    skipped_nos = {row["row_no"] for row in skipped}
+
+    done = [
+        row["lastup"] for row in rows
+        if row["lastup"] and row["row_no"] not in skipped_nos
+    ]
+    watermark = max(done + ([previous] if previous else []), default=None)
+
+    if skipped:
+        if any(row["lastup"] is None for row in skipped):
+            return previous, skipped
+
+        oldest = min(row["lastup"] for row in skipped)
+        watermark = oldest if watermark is None else min(watermark, oldest)
+
+    return watermark, skipped
+
+
+def get_state(tenant_db, dataset: str = DATASET) -> MikroSyncState:
+    state = tenant_db.get(MikroSyncState, dataset)
+
+    if state is None:
+        state = MikroSyncState(dataset=dataset)
+        tenant_db.add(state)
+
+    return state
+
+
+def load_watermark(db_name: str, dataset: str = DATASET) -> Optional[datetime]:
+    tenant_db = connect_tenant_by_vergiNo(db_name)
+
+    try:
+        return tenant_db.execute(
+            select(MikroSyncState.last_watermark).where(MikroSyncState.dataset == dataset)
+        ).scalar_one_or_none()
+    finally:
+        tenant_db.close()
+
+
+def apply_personel_rows(
+    db_name: str,
+    fetched: Dict,
+    *,
+    full: bool,
+    force: bool = False,
+    started_at: datetime,
+    started: float,
+) -> Dict:
+    rows = fetched["rows"]
+    now = datetime.now()
+    tenant_db = connect_tenant_by_vergiNo(db_name)
+
+    try:
+        # başka worker'daki eş zamanlı sync'i bekletmeden reddet
+        locked = tenant_db.execute(
+            text("SELECT pg_try_advisory_xact_lock(hashtext('mikro_personel_sync'))")
+        ).scalar()
+
+        if not locked:
+            raise HTTPException(
+                status_code=409,
+                detail="Personel senkronu zaten çalışıyor"
+            )
+
+        firm = tenant_db.execute(
+            select(Firm).where(Firm.firma_kilitli != True)
+        ).scalars().first()
+
+        if not firm:
+            raise HTTPException(
+                status_code=404,
+                detail="Bu firma bulunamadı."
+            )
+
+        _stage.create(tenant_db.connection())
+
+        if rows:
+            tenant_db.execute(insert(_stage), rows)
+
+        matched, matched_rows, updated, deactivated = tenant_db.execute(
+            UPDATE_MATCHED_SQL, {"now": now}
+        ).one()
+
+        inserted_users = tenant_db.execute(
+            INSERT_NEW_SQL,
+            {
+                "now": now,
+                "firma_sirano": firm.firma_sirano,
+                "unusable_pw": UNUSABLE_PASSWORD,
+                "email_domain": PLACEHOLDER_EMAIL_DOMAIN,
+            },
+        ).all()
+
+        deactivation_skipped = None
+        if full:
+            linked, missing = tenant_db.execute(DEACTIVATE_CHECK_SQL).one()
+            deactivation_skipped = deactivation_blocked(fetched["fetched"], linked, missing, force)
+
+            if deactivation_skipped:
+                logger.warning(
+                    f"MIKRO PERSONEL DEACTIVATION SKIPPED | tenant={db_name} | {deactivation_skipped}"
+                )
+            else:
+                deactivated += tenant_db.execute(DEACTIVATE_MISSING_SQL, {"now": now}).rowcount
+
+        inserted_kods = {user.mikro_personel_kod for user in inserted_users}
+        applied_rows = set(matched_rows) | {
+            row["row_no"] for row in rows if row["per_kod"] in inserted_kods
+        }
+
+        state = get_state(tenant_db)
+        watermark, skipped_rows = next_watermark(rows, state.last_watermark, applied_rows)
+
+        # hiçbir kullanıcıya yansımayan, eşleşmeyen pasif / kodsuz satırlar (beklenen)
+        ignored = len(rows) - len(applied_rows) - len(skipped_rows)
+        skipped = len(skipped_rows)
+
+        duration_ms = int((time.perf_counter() - started) * 1000)
+
+        state.last_watermark = watermark
+        state.last_started_at = started_at
+        state.last_finished_at = datetime.now()
+        state.last_success_at = state.last_finished_at
+        state.last_status = "SUCCESS"
+        state.last_error = None
+        state.last_duration_ms = duration_ms
+        state.rows_fetched = fetched["fetched"]
+        state.rows_inserted = len(inserted_users)
+        state.rows_updated = updated
+        state.rows_deactivated = deactivated
+        state.rows_skipped = skipped + fetched["skipped"]
+
+        tenant_db.commit()
+
+        report = {
+            "dataset": DATASET,
+            "mode": "full" if full else "incremental",
+            "watermark": watermark,
+            "duration_ms": duration_ms,
+            "fetched": fetched["fetched"],
+            "inserted": len(inserted_users),
+            "updated": updated,
+            "deactivated": deactivated,
+            "deactivation_skipped": deactivation_skipped,
+            # kullanıcı adı / email / kod çakışması: sonraki sync'te tekrar denenir
+            "skipped": skipped,
+            "skipped_keys": [
+                row["per_kod"] for row in skipped_rows[:MAX_REPORTED_SKIPPED_KEYS]
+            ],
+            "ignored": ignored,
+            # guid ve kodu olmayan, okunamayan satırlar
+            "invalid": fetched["skipped"],
+        }
+
+    except Exception:
+        tenant_db.rollback()
+        raise
+
+    finally:
+        tenant_db.close()
+
+    # yeni kullanıcılar login index'e (tenant commit'inden sonra)
+    if inserted_users:
+        master_db = SessionLocal()
+        try:
+            index_new_users(
+                master_db,
+                tenant_db_name=db_name,
+                users=[
+                    (user.kullanici_Guid, user.kullanici_EMail, user.kullanici_name)
+                    for user in inserted_users
+                ],
+            )
+            master_db.commit()
+        # sadece DB hataları: kod hatası uyarı gibi yutulmasın
+        except SQLAlchemyError as e:
+            master_db.rollback()
+            logger.warning(f"LOGIN INDEX UPDATE FAILED | tenant={db_name} | mikro personel sync | {e}")
+        finally:
+            master_db.close()
+
+    return report
+
+
+def record_failure(
+    db_name: str,
+    started_at: datetime,
+    started: float,
+    error: Exception,
+    dataset: str = DATASET,
+) -> None:
+    tenant_db = connect_tenant_by_vergiNo(db_name)
+
+    try:
+        state = get_state(tenant_db, dataset)
+        state.last_started_at = started_at
+        state.last_finished_at = datetime.now()
+        state.last_status = "FAILED"
+        state.last_error = str(getattr(error, "detail", None) or error)[:500]
+        state.last_duration_ms = int((time.perf_counter() - started) * 1000)
+        tenant_db.commit()
+    except Exception as e:
+        tenant_db.rollback()
+        logger.warning(f"MIKRO SYNC STATE WRITE FAILED | tenant={db_name} | {e}")
+    finally:
+        tenant_db.close()
+
+
+# =====================================================
+# SYNC
+# =====================================================
+
+async def sync_mikro_personel(db_name: str, *, full: bool = False, force: bool = False) -> Dict:
+    """
+    Mikro personel listesini tenant users tablosuna yansıtır.
+    - incremental: sadece son watermark'tan sonra değişen personel istenir
+    - full: tüm liste; listede olmayan bağlı kullanıcılar pasife alınır
+      (liste boşsa / bağlı kullanıcıların çoğu eksikse force olmadan yapılmaz)
+    Mikro'dan okuma DB transaction'ı dışında, yazma tek transaction'da.
+    """
+    lock = _sync_locks.setdefault(db_name, asyncio.Lock())
+
+    if lock.locked():
+        raise HTTPException(
+            status_code=409,
+            detail="Personel senkronu zaten çalışıyor"
+        )
+
+    async with lock:
+        started_at = datetime.now()
+        started = time.perf_counter()
+
+        try:
+            watermark = None if full else await run_in_threadpool(load_watermark, db_name)
+            mikro_settings = await resolve_tenant_mikro_settings(db_name)
+            fetched = await fetch_personel(mikro_settings, watermark)
+
+            return await run_in_threadpool(
+                apply_personel_rows,
+                db_name,
+                fetched,
+                full=full,
+                force=force,
+                started_at=started_at,
+                started=started,
+            )
+
+        except Exception as e:
+            if not (isinstance(e, HTTPException) and e.status_code == 409):
+                await run_in_threadpool(record_failure, db_name, started_at, started, e)
+            raise
+
+
+def get_sync_states(db_name: str) -> List[MikroSyncState]:
+    tenant_db = connect_tenant_by_vergiNo(db_name)
+
+    try:
+        return list(tenant_db.execute(select(MikroSyncState)).scalars())
+    finally:
+        tenant_db.close()
@@ -0,0 +1,396 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Boolean, Column, DateTime, MetaData, String, Table, func, select, text
+from sqlalchemy.dialects.postgresql import JSONB, insert
+
+from app.core.config import settings
+from app.models.tenant.tenant import MikroReplicaItem, MikroSyncState
+from app.routers.mikro_api import call_mikro_api_async
+from app.services.mikro_async import LANE_BACKGROUND
+from app.services.mikro_personel_sync import (
+    extract_mikro_rows,
+    get_state,
+    load_watermark,
+    mikro_page_body,
+    record_failure,
+)
+from app.services.mikro_settings_cache import MikroSettingsSnapshot, resolve_tenant_mikro_settings
+from app.services.tenant_service import connect_tenant_by_vergiNo
+from app.utils.mikro_main_file import clean_mikro_str, parse_mikro_datetime
+
+logger = logging.getLogger("uvicorn.error")
+
+_replica_locks: Dict[str, asyncio.Lock] = {}
+
+
+def dataset_config(dataset: str) -> Dict[str, str]:
+    config = settings.MIKRO_REPLICA_DATASETS.get(dataset)
+
+    if not config:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Tanımsız replika dataset'i: {dataset}"
+        )
+
+    return config
+
+
+def state_key(dataset: str) -> str:
+    # mikro_sync_state'te personel sync ile aynı tabloda
+    return f"replica:{dataset}"
+
+
+# =====================================================
+# MIKRO -> SATIRLAR
+# =====================================================
+
+def parse_replica_row(config: Dict[str, str], row: Dict) -> Optional[Dict]:
+    """
+    Guid ve kod ikisi de yoksa None (satır anahtarsız).
+    """
+    row_key = None
+    raw_guid = row.get(config["guid"])
+
+    if raw_guid:
+        try:
+            row_key = str(uuid.UUID(str(raw_guid)))
+        except ValueError:
+            row_key = None
+
+    kod = clean_mikro_str(row.get(config["kod"]), 50)
+    row_key = row_key or kod
+
+    if not row_key:
+        return None
+
+    return {
+        "row_key": row_key,
+        "kod": kod,
+        "ad": clean_mikro_str(row.get(config["ad"]), 200),
+        "iptal": bool(row.get(config["iptal"])),
+        "lastup": parse_mikro_datetime(row.get(config["lastup"])),
+        "data": row,
+    }
+
+
+async def fetch_replica(
+    config: Dict[str, str],
+    mikro_settings: MikroSettingsSnapshot,
+    watermark: Optional[datetime],
+) -> Dict:
+    by_key: Dict[str, Dict] = {}
+    fetched = 0
+    skipped = 0
+    page = 0
+
+    while True:
+        data = await call_mikro_api_async(
+            settings=mikro_settings,
+            endpoint=config["endpoint"],
+            body=mikro_page_body(page, config["lastup"], watermark),
+            lane=LANE_BACKGROUND,
+        )
+        rows = extract_mikro_rows(data)
+        fetched += len(rows)
+
+        for row in rows:
+            parsed = parse_replica_row(config, row) if isinstance(row, dict) else None
+
+            if parsed is None:
+                skipped += 1
+                continue
+
+            by_key[parsed["row_key"]] = parsed
+
+        if len(rows) < settings.MIKRO_SYNC_PAGE_SIZE:
+            break
+
+        page += 1
+
+    return {"rows": list(by_key.values()), "fetched": fetched, "skipped": skipped}
+
+
+# =====================================================
+# SET-BASED APPLY (tek transaction)
+# =====================================================
+
+_stage = Table(
+    "mikro_replica_stage",
+    MetaData(),
+    Column("row_key", String(64), primary_key=True),
+    Column("kod", String(50)),
+    Column("ad", String(200)),
+    Column("iptal", Boolean, nullable=False),
+    Column("lastup", DateTime),
+    Column("data", JSONB, nullable=False),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+
+# değişmeyen satıra yazılmaz; (xmax = 0) yeni eklenen satırdır
+UPSERT_SQL = text("""
+    INSERT INTO mikro_replica_items AS i (dataset, row_key, kod, ad, iptal, lastup, data, synced_at)
+    SELECT :dataset, s.row_key, s.kod, s.ad, s.iptal, s.lastup, s.data, :now
+    FROM mikro_replica_stage s
+    ON CONFLICT (dataset, row_key) DO UPDATE SET
+        kod = EXCLUDED.kod,
+        ad = EXCLUDED.ad,
+        iptal = EXCLUDED.iptal,
+        lastup = EXCLUDED.lastup,
+        data = EXCLUDED.data,
+        synced_at = EXCLUDED.synced_at
+    WHERE i.data IS DISTINCT FROM EXCLUDED.data
+       OR i.iptal IS DISTINCT FROM EXCLUDED.iptal
+    RETURNING (xmax = 0) AS inserted
+""")
+
+# tam snapshot: Mikro listesinde artık olmayan satırlar silinir
+DELETE_MISSING_SQL = text("""
+    DELETE FROM mikro_replica_items i
+    WHERE i.dataset = :dataset
+      AND NOT EXISTS (SELECT 1 FROM mikro_replica_stage s WHERE s.row_key = i.row_key)
+""")
+
+
+def apply_replica_rows(
+    db_name: str,
+    dataset: str,
+    fetched: Dict,
+    *,
+    full: bool,
+    started_at: datetime,
+    started: float,
+) -> Dict:
+    rows = fetched["rows"]
+    now = datetime.now()
+    tenant_db = connect_tenant_by_vergiNo(db_name)
+
+    try:
+        locked = tenant_db.execute(
+            text("SELECT pg_try_advisory_xact_lock(hashtext(:name))"),
+            {"name": f"mikro_replica:{dataset}"},
+        ).scalar()
+
+        if not locked:
+            raise HTTPException(
+                status_code=409,
+                detail="Replika yenilemesi zaten çalışıyor"
+            )
+
+        _stage.create(tenant_db.connection())
+
+        if rows:
+            tenant_db.execute(insert(_stage), rows)
+
+        changes = tenant_db.execute(UPSERT_SQL, {"dataset": dataset, "now": now}).scalars().all()
+        inserted = sum(1 for change in changes if change)
+        updated = len(changes) - inserted
+
+        deleted = 0
+        if full:
+            # boş cevap (yetki / filtre hatası) replikayı silmesin
+            if fetched["fetched"] == 0:
+                logger.warning(f"MIKRO REPLICA DELETE SKIPPED | tenant={db_name} | dataset={dataset} | boş liste")
+            else:
+                deleted = tenant_db.execute(DELETE_MISSING_SQL, {"dataset": dataset}).rowcount
+
+        state = get_state(tenant_db, state_key(dataset))
+        watermark = max(
+            [row["lastup"] for row in rows if row["lastup"]]
+            + ([state.last_watermark] if state.last_watermark else []),
+            default=None,
+        )
+
+        duration_ms = int((time.perf_counter() - started) * 1000)
+
+        state.last_watermark = watermark
+        state.last_started_at = started_at
+        state.last_finished_at = datetime.now()
+        state.last_success_at = state.last_finished_at
+        state.last_status = "SUCCESS"
+        state.last_error = None
+        state.last_duration_ms = duration_ms
+        state.rows_fetched = fetched["fetched"]
+        state.rows_inserted = inserted
+        state.rows_updated = updated
+        state.rows_deactivated = deleted
+        state.rows_skipped = fetched["skipped"]
+
+        tenant_db.commit()
+
+        return {
+            "dataset": dataset,
+            "mode": "full" if full else "incremental",
+            "watermark": watermark,
+            "duration_ms": duration_ms,
+            "fetched": fetched["fetched"],
+            "inserted": inserted,
+            "updated": updated,
+            "deleted": deleted,
+            "skipped": fetched["skipped"],
+        }
+
+    except Exception:
+        tenant_db.rollback()
+        raise
+
+    finally:
+        tenant_db.close()
+
+
+# =====================================================
+# REFRESH
+# =====================================================
+
+async def refresh_mikro_replica(db_name: str, dataset: str, *, full: bool = False) -> Dict:
+    """
+    Mikro listesini yerel replikaya yansıtır.
+    - ilk yükleme (henüz watermark yoksa) ve full: tüm liste, listede olmayanlar silinir
+    - incremental: sadece son watermark'tan sonra değişenler
+    """
+    config = dataset_config(dataset)
+    lock = _replica_locks.setdefault(f"{db_name}:{dataset}", asyncio.Lock())
+
+    if lock.locked():
+        raise HTTPException(
+            status_code=409,
+            detail="Replika yenilemesi zaten çalışıyor"
+        )
+
+    async with lock:
+        started_at = datetime.now()
+        started = time.perf_counter()
+
+        try:
+            watermark = None if full else await run_in_threadpool(
+                load_watermark, db_name, state_key(dataset)
+            )
+            mikro_settings = await resolve_tenant_mikro_settings(db_name)
+            fetched = await fetch_replica(config, mikro_settings, watermark)
+
+            return await run_in_threadpool(
+                apply_replica_rows,
+                db_name,
+                dataset,
+                fetched,
+                full=full or watermark is None,
+                started_at=started_at,
+                started=started,
+            )
+
+        except Exception as e:
+            if not (isinstance(e, HTTPException) and e.status_code == 409):
+                await run_in_threadpool(
+                    record_failure, db_name, started_at, started, e, state_key(dataset)
+                )
+            raise
+
+
+# =====================================================
+# OKUMA
+# =====================================================
+
+def get_replica_states(db_name: str) -> List[Dict]:
+    """
+    Dataset başına son yenileme, gecikme (lag_seconds) ve satır sayısı.
+    """
+    tenant_db = connect_tenant_by_vergiNo(db_name)
+
+    try:
+        states = {
+            state.dataset: state
+            for state in tenant_db.execute(
+                select(MikroSyncState).where(MikroSyncState.dataset.like("replica:%"))
+            ).scalars()
+        }
+        counts = dict(
+            tenant_db.execute(
+                select(MikroReplicaItem.dataset, func.count())
+                .group_by(MikroReplicaItem.dataset)
+            ).all()
+        )
+    finally:
+        tenant_db.close()
+
+    now = datetime.now()
+    result = []
+
+    for dataset in settings.MIKRO_REPLICA_DATASETS:
+        state = states.get(state_key(dataset))
+        last_success = state.last_success_at if state else None
+
+        result.append({
+            "dataset": dataset,
+            "rows": counts.get(dataset, 0),
+            "last_success_at": last_success,
+            "lag_seconds": int((now - last_success).total_seconds()) if last_success else None,
+            "last_watermark": state.last_watermark if state else None,
+            "last_status": state.last_status if state else None,
+            "last_error": state.last_error if state else None,
+            "last_duration_ms": state.last_duration_ms if state else None,
+        })
+
+    return result
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_replica(
+    tenant_db,
+    dataset: str,
+    *,
+    q: Optional[str],
+    limit: int,
+    include_iptal: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    kod / ad içinde geçen (büyük-küçük harf duyarsız) kayıtlar, pg_trgm index'i ile.
+    """
+    dataset_config(dataset)
+
+    query = (
+        select(MikroReplicaItem.kod, MikroReplicaItem.ad, MikroReplicaItem.iptal, MikroReplicaItem.data)
+        .where(MikroReplicaItem.dataset == dataset)
+        .order_by(MikroReplicaItem.kod)
+        .limit(limit)
+    )
+
+    if not include_iptal:
+        query = query.where(MikroReplicaItem.iptal == False)
+
+    if q:
+        pattern = f"%{_escape_like(q.strip())}%"
+        query = query.where(
+            MikroReplicaItem.kod.ilike(pattern, escape="\\")
+            | MikroReplicaItem.ad.ilike(pattern, escape="\\")
+        )
+
+    return [row.data for row in tenant_db.execute(query)]
+
+
+def lookup_replica(tenant_db, dataset: str, kod: str) -> Dict[str, Any]:
+    dataset_config(dataset)
+
+    data = tenant_db.execute(
+        select(MikroReplicaItem.data).where(
+            MikroReplicaItem.dataset == dataset,
+            MikroReplicaItem.kod == kod,
+        ).limit(1)
+    ).scalar_one_or_none()
+
+    if data is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Kayıt replikada bulunamadı"
+        )
+
+    return data
@@ -0,0 +1,190 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models.tenant.tenant import Firm, MikroApiSettings
+from app.routers.mikro_api import get_mikro_settings
+from app.services.tenant_service import connect_tenant_by_vergiNo
+
+
+# =====================================================
+# SNAPSHOT
+# =====================================================
+
+@dataclass(frozen=True)
+class MikroSettingsSnapshot:
+    """
+    MikroApiSettings satırının session'dan bağımsız kopyası.
+    Alan adları ORM ile aynı: build_mikro_request / prepare_mikro_call
+    ikisini de aynı şekilde kullanır.
+    """
+    firma_Guid: UUID
+    sube_no: Optional[int]
+    api_protocol: Optional[str]
+    api_ip: str
+    api_port: int
+    api_firmakodu: str
+    api_calismayili: str
+    api_kullanici: Optional[str]
+    api_pw: Optional[str]
+    api_pw_non_hash: Optional[str]
+    api_key: Optional[str]
+
+    @classmethod
+    def from_model(cls, row: MikroApiSettings) -> "MikroSettingsSnapshot":
+        return cls(
+            firma_Guid=row.firma_Guid,
+            sube_no=row.sube_no,
+            api_protocol=row.api_protocol,
+            api_ip=row.api_ip,
+            api_port=row.api_port,
+            api_firmakodu=row.api_firmakodu,
+            api_calismayili=row.api_calismayili,
+            api_kullanici=row.api_kullanici,
+            api_pw=row.api_pw,
+            api_pw_non_hash=row.api_pw_non_hash,
+            api_key=row.api_key,
+        )
+
+
+# =====================================================
+# TENANT SETTINGS CACHE
+# =====================================================
+
+class MikroSettingsCache:
+    """
+    Tenant başına çözümlenmiş firma + Mikro ayarları.
+    - hit: tenant DB'ye hiç gidilmez
+    - miss: loader (sync, threadpool'da) çağrılır, sonucu saklanır
+    - invalidate: post/put-mikro-info sonrası; o sırada yüklenmekte olan
+      eski değer generation kontrolü ile cache'e yazılmaz
+    Thread-safe (sync endpointler threadpool'dan da çağırır).
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[MikroSettingsSnapshot, float]] = {}
+        self._generations: Dict[str, int] = {}
+
+        self.stats_by_tenant: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, tenant: str, name: str) -> None:
+        tenant_stats = self.stats_by_tenant.setdefault(
+            tenant, {"hits": 0, "misses": 0, "invalidations": 0}
+        )
+        tenant_stats[name] += 1
+
+    def peek(self, tenant: str) -> Optional[MikroSettingsSnapshot]:
+        """
+        Sadece cache'e bakar, DB'ye gitmez (event loop'tan çağrılabilir).
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(tenant)
+
+            if entry is not None and now < entry[1]:
+                self._count(tenant, "hits")
+                return entry[0]
+
+        return None
+
+    def get(
+        self,
+        tenant: str,
+        loader: Callable[[], MikroApiSettings],
+    ) -> MikroSettingsSnapshot:
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(tenant)
+
+            if entry is not None and now < entry[1]:
+                self._count(tenant, "hits")
+                return entry[0]
+
+            self._count(tenant, "misses")
+            generation = self._generations.get(tenant, 0)
+
+        # DB sorgusu lock dışında
+        snapshot = MikroSettingsSnapshot.from_model(loader())
+
+        with self._lock:
+            if self._generations.get(tenant, 0) == generation:
+                self._entries[tenant] = (snapshot, time.monotonic() + self.ttl)
+
+        return snapshot
+
+    def invalidate(self, tenant: str) -> None:
+        with self._lock:
+            self._entries.pop(tenant, None)
+            self._generations[tenant] = self._generations.get(tenant, 0) + 1
+            self._count(tenant, "invalidations")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "ttl_s": self.ttl,
+                "tenants": {tenant: dict(values) for tenant, values in self.stats_by_tenant.items()},
+            }
+
+
+mikro_settings_cache = MikroSettingsCache(ttl=settings.MIKRO_SETTINGS_CACHE_TTL)
+
+
+# =====================================================
+# TENANT -> AYARLAR
+# =====================================================
+
+def load_tenant_mikro_settings(db_name: str) -> MikroApiSettings:
+    """
+    Tenant DB'den firma + Mikro ayarlarını okur (sync, cache miss'te threadpool'da çalışır).
+    """
+    tenant_db = connect_tenant_by_vergiNo(db_name)
+
+    try:
+        # --------------------------------------------------
+        # Tenant DB'den firma_guid al
+        # boş veri olabileceği için Kilitli olmayanı aldık.
+        # --------------------------------------------------
+        firm = tenant_db.execute(
+            select(Firm).where(Firm.firma_kilitli != True)
+        ).scalar_one_or_none()
+
+        if not firm:
+            raise HTTPException(
+                status_code=500,
+                detail="Tenant DB içinde firma kaydı bulunamadı"
+            )
+
+        firma_guid = str(firm.firma_Guid)
+
+        return get_mikro_settings(tenant_db, firma_guid)
+
+    finally:
+        tenant_db.close()
+
+
+async def resolve_tenant_mikro_settings(db_name: str) -> MikroSettingsSnapshot:
+    """
+    Cache'te varsa tenant DB'ye hiç bağlanılmaz, threadpool'a da geçilmez.
+    """
+    snapshot = mikro_settings_cache.peek(db_name)
+    if snapshot is not None:
+        return snapshot
+
+    return await run_in_threadpool(
+        mikro_settings_cache.get,
+        db_name,
+        lambda: load_tenant_mikro_settings(db_name),
+    )
@@ -0,0 +1,63 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+# =====================================================
+# SINGLE-FLIGHT (istek birleştirme)
+# =====================================================
+
+class SingleFlight:
+    """
+    Aynı key ile eş zamanlı gelen çağrılar tek upstream isteği paylaşır.
+    Upstream çağrı ayrı bir task'ta çalışır; ilk isteği yapan client
+    bağlantıyı koparsa (cancel) bekleyen diğerleri etkilenmez.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.stats_by_tenant: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, tenant: str, name: str) -> None:
+        tenant_stats = self.stats_by_tenant.setdefault(
+            tenant, {"upstream_calls": 0, "coalesced": 0}
+        )
+        tenant_stats[name] += 1
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+        # kimse beklemiyorsa "exception was never retrieved" uyarısı çıkmasın
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, tenant: str, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+
+        if task is None:
+            self._count(tenant, "upstream_calls")
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._done(key, done))
+        else:
+            self._count(tenant, "coalesced")
+
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict:
+        tenants = {}
+
+        for tenant, values in self.stats_by_tenant.items():
+            total = values["upstream_calls"] + values["coalesced"]
+            tenants[tenant] = {
+                **values,
+                "coalescing_ratio": round(values["coalesced"] / total, 4) if total else None,
+            }
+
+        return {
+            "in_flight": len(self._inflight),
+            "tenants": tenants,
+        }
+
+
+mikro_singleflight = SingleFlight()
@@ -0,0 +1,168 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Iterable, Tuple
+
+from app.core.config import settings
+
+
+@dataclass
+class _QueryEntry:
+    value: Any
+    size: int
+    # yüklendiği andaki tablo generation'ları
+    generations: Tuple[int, ...]
+    expires_at: float
+
+
+# =====================================================
+# TENANT QUERY RESULT CACHE
+# =====================================================
+
+class TenantQueryCache:
+    """
+    (tenant, sorgu adı, parametreler) başına sorgu sonucu (roller vb. neredeyse statik veri).
+    - her entry bağlı olduğu tabloların generation'larıyla saklanır; yazan endpoint
+      invalidate(tenant, tablo) çağırınca generation artar, eski entry'ler geçersiz olur
+    - başka worker / Mikro sync / elle SQL yazışları için ttl üst sınırdır
+    - max_entries / max_bytes aşılınca en eski kullanılan (LRU) silinir
+    - yüklenirken invalidate gelirse sonuç cache'e yazılmaz
+    Thread-safe (sync endpointler threadpool'dan çağırır).
+    """
+
+    def __init__(self, *, ttl: int, max_entries: int, max_bytes: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str, Hashable], _QueryEntry]" = OrderedDict()
+        self._generations: Dict[Tuple[str, str], int] = {}
+        self._bytes = 0
+
+        self.stats_by_tenant: Dict[str, Dict[str, int]] = {}
+        self.evictions = 0
+
+    def _count(self, tenant: str, name: str, amount: int = 1) -> None:
+        tenant_stats = self.stats_by_tenant.setdefault(
+            tenant,
+            {"hits": 0, "misses": 0, "invalidations": 0, "entries": 0, "bytes": 0},
+        )
+        tenant_stats[name] += amount
+
+    def _current(self, tenant: str, tables: Iterable[str]) -> Tuple[int, ...]:
+        return tuple(self._generations.get((tenant, table), 0) for table in tables)
+
+    def _remove(self, key) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        self._count(key[0], "entries", -1)
+        self._count(key[0], "bytes", -entry.size)
+
+    @staticmethod
+    def _size(value: Any) -> int:
+        # yaklaşık: JSON boyutu
+        return len(json.dumps(value, default=str))
+
+    def get_or_load(
+        self,
+        tenant: str,
+        name: str,
+        params: Hashable,
+        tables: Tuple[str, ...],
+        loader: Callable[[], Any],
+    ) -> Any:
+        """
+        loader DB'yi okur (lock dışında). Dönen değer paylaşılır, değiştirilmemeli.
+        """
+        key = (tenant, name, params)
+        now = time.monotonic()
+
+        with self._lock:
+            generations = self._current(tenant, tables)
+            entry = self._entries.get(key)
+
+            if entry is not None:
+                if entry.generations == generations and now < entry.expires_at:
+                    self._entries.move_to_end(key)
+                    self._count(tenant, "hits")
+                    return entry.value
+
+                self._remove(key)
+
+            self._count(tenant, "misses")
+
+        value = loader()
+        size = self._size(value)
+
+        with self._lock:
+            # yüklenirken yazış olduysa eski sonuç saklanmaz
+            if self._current(tenant, tables) != generations or size > self.max_bytes:
+                return value
+
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = _QueryEntry(
+                value=value,
+                size=size,
+                generations=generations,
+                expires_at=time.monotonic() + self.ttl,
+            )
+            self._bytes += size
+            self._count(tenant, "entries")
+            self._count(tenant, "bytes", size)
+
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+        return value
+
+    def invalidate(self, tenant: str, *tables: str) -> None:
+        """
+        Tabloya yazan endpoint commit'ten sonra çağırır.
+        """
+        with self._lock:
+            for table in tables:
+                self._generations[(tenant, table)] = self._generations.get((tenant, table), 0) + 1
+            self._count(tenant, "invalidations")
+
+    def invalidate_tenant(self, tenant: str) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == tenant]:
+                self._remove(key)
+            for generation_key in [key for key in self._generations if key[0] == tenant]:
+                self._generations[generation_key] += 1
+            self._count(tenant, "invalidations")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            tenants = {}
+            for tenant, values in self.stats_by_tenant.items():
+                lookups = values["hits"] + values["misses"]
+                tenants[tenant] = {
+                    **values,
+                    "hit_ratio": round(values["hits"] / lookups, 3) if lookups else None,
+                }
+
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_s": self.ttl,
+                "evictions": self.evictions,
+                "tenants": tenants,
+            }
+
+
+tenant_query_cache = TenantQueryCache(
+    ttl=settings.QUERY_CACHE_TTL,
+    max_entries=settings.QUERY_CACHE_MAX_ENTRIES,
+    max_bytes=settings.QUERY_CACHE_MAX_MB * 1024 * 1024,
+)
@@ -0,0 +1,163 @@
+import csv
+import io
+import logging
+import time
+import zlib
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+import orjson
+from fastapi import HTTPException
+from sqlalchemy import Select, select
+
+from app.core.config import settings
+from app.models.tenant.tenant import AttendanceLog, AuditLog, User
+from app.services.tenant_service import connect_tenant_by_vergiNo
+
+logger = logging.getLogger("uvicorn.error")
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+}
+
+
+# =====================================================
+# EXPORT TANIMLARI
+# =====================================================
+# columns: dışarı verilen kolonlar (kullanici_pw asla), time: since/until filtresi,
+# order_by: unique + index'li sıralama (export tekrarlanabilir olsun)
+
+EXPORTS: Dict[str, Dict] = {
+    "users": {
+        "columns": [column for column in User.__table__.columns if column.key != "kullanici_pw"],
+        "time": User.__table__.c.kullanici_create_date,
+        "order_by": [User.__table__.c.kullanici_name],
+    },
+    "attendance_logs": {
+        "columns": list(AttendanceLog.__table__.columns),
+        "time": AttendanceLog.__table__.c.created_at,
+        "order_by": [AttendanceLog.__table__.c.created_at, AttendanceLog.__table__.c.id],
+    },
+    "audit_logs": {
+        "columns": list(AuditLog.__table__.columns),
+        "time": AuditLog.__table__.c.created_at,
+        "order_by": [AuditLog.__table__.c.created_at, AuditLog.__table__.c.id],
+    },
+}
+
+
+def build_export_query(
+    table: str,
+    *,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Select:
+    export = EXPORTS.get(table)
+
+    if not export:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Export edilemeyen tablo: {table}"
+        )
+
+    query = select(*export["columns"]).order_by(*export["order_by"])
+
+    if since:
+        query = query.where(export["time"] >= since)
+    if until:
+        query = query.where(export["time"] < until)
+
+    return query
+
+
+# =====================================================
+# ENCODER'LAR (parti başına bytes)
+# =====================================================
+
+def _ndjson_chunks(keys: List[str], partitions) -> Iterator[bytes]:
+    # orjson UUID / datetime'ı kendisi yazar
+    for rows in partitions:
+        yield b"".join(orjson.dumps(dict(zip(keys, row))) + b"\n" for row in rows)
+
+
+def _csv_chunks(keys: List[str], partitions) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    # Excel Türkçe karakterleri BOM ile tanır
+    buffer.write("\ufeff")
+    writer.writerow(keys)
+
+    for rows in partitions:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _gzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+
+    yield compressor.flush()
+
+
+# =====================================================
+# STREAM
+# =====================================================
+
+def stream_export(
+    db_name: str,
+    table: str,
+    query: Select,
+    *,
+    fmt: str,
+    gzip: bool = False,
+) -> Iterator[bytes]:
+    """
+    Satırlar server-side cursor'dan (stream_results) EXPORT_BATCH_SIZE'lık
+    partiler halinde okunup kodlanır; bellekte aynı anda tek parti bulunur.
+    StreamingResponse sync generator'ı threadpool'da ilerletir.
+    """
+    started = time.perf_counter()
+    keys = [column.key for column in EXPORTS[table]["columns"]]
+    row_count = 0
+    tenant_db = connect_tenant_by_vergiNo(db_name)
+
+    try:
+        result = tenant_db.execute(
+            query.execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+        )
+
+        def partitions():
+            nonlocal row_count
+            for rows in result.partitions():
+                row_count += len(rows)
+                yield rows
+
+        encode = _csv_chunks if fmt == "csv" else _ndjson_chunks
+        chunks = encode(keys, partitions())
+
+        yield from (_gzip(chunks) if gzip else chunks)
+
+        logger.info(
+            f"TENANT EXPORT | tenant={db_name} | table={table} | format={fmt} | "
+            f"gzip={gzip} | rows={row_count} | {int((time.perf_counter() - started) * 1000)}ms"
+        )
+
+    except Exception as e:
+        # header'lar gitti; client kesik dosya alır
+        logger.error(f"TENANT EXPORT FAILED | tenant={db_name} | table={table} | rows={row_count} | {e}")
+        raise
+
+    finally:
+        tenant_db.rollback()
+        tenant_db.close()
@@ -1,13 +1,25 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import create_engine, select
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from app.core.config import settings
+from app.db.master import SessionLocal
+from app.models.master.master import TenantDB
 
-# vergiNo is also the name of the tenant databases
-def connect_tenant_by_vergiNo(vergi_no: str):
+# tenant DB başına tek engine / pool (her istekte yeni engine açılmasın).
+# sadece master'daki tenant_dbs kaydı olan adlar cache'lenir; LRU + boşta
+# kalma süresiyle sınırlı, böylece açık bağlantı sayısı tenant sayısıyla büyümez
+_tenant_sessionmakers: "OrderedDict[str, Tuple[sessionmaker, float]]" = OrderedDict()
+_tenant_lock = threading.Lock()
+_last_sweep = 0.0
 
-    tenant_db_name = vergi_no
 
-    DATABASE_URL = (
+def _tenant_url(tenant_db_name: str) -> str:
+    return (
         f"postgresql://{settings.POSTGRES_USER}:"
         f"{settings.POSTGRES_PASSWORD}@"
         f"{settings.POSTGRES_HOST}:"
@@ -15,18 +27,137 @@ def connect_tenant_by_vergiNo(vergi_no: str):
         f"{tenant_db_name}"
     )
 
-    engine = create_engine(
-        DATABASE_URL,
-        pool_pre_ping=True
-    )
 
-    SessionLocal = sessionmaker(
-        autocommit=False,
-        autoflush=False,
-        bind=engine
-    )
+def _is_known_tenant(tenant_db_name: str) -> bool:
+    master_db = SessionLocal()
+    try:
+        return master_db.execute(
+            select(TenantDB.id)
+            .where(TenantDB.db_name == tenant_db_name, TenantDB.is_active.is_(True))
+            .limit(1)
+        ).first() is not None
+    finally:
+        master_db.close()
+
+
+def _evict_idle(now: float) -> list:
+    """
+    Lock altında çağrılır; süresi dolan / LRU sınırını aşan engine'leri
+    listeden çıkarır, dispose çağıran tarafa bırakılır.
+    """
+    global _last_sweep
+    evicted = []
+
+    if now - _last_sweep >= 60:
+        _last_sweep = now
+        idle_limit = settings.TENANT_DB_ENGINE_IDLE_SECONDS
+        for name, (factory, last_used) in list(_tenant_sessionmakers.items()):
+            if now - last_used > idle_limit:
+                evicted.append(_tenant_sessionmakers.pop(name)[0])
+
+    while len(_tenant_sessionmakers) > settings.TENANT_DB_ENGINE_CACHE_SIZE:
+        evicted.append(_tenant_sessionmakers.popitem(last=False)[1][0])
+
+    return evicted
+
+
+def _dispose(factories: list) -> None:
+    # checkout'taki bağlantılar etkilenmez, kapatıldıklarında pool'la birlikte düşer
+    for factory in factories:
+        factory.kw["bind"].dispose()
+
+
+def _tenant_sessionmaker(tenant_db_name: str) -> sessionmaker:
+    now = time.monotonic()
+
+    with _tenant_lock:
+        entry = _tenant_sessionmakers.get(tenant_db_name)
+        if entry is not None:
+            _tenant_sessionmakers[tenant_db_name] = (entry[0], now)
+            _tenant_sessionmakers.move_to_end(tenant_db_name)
+            evicted = _evict_idle(now)
+        else:
+            evicted = None
+
+    if entry is not None:
+        _dispose(evicted)
+        return entry[0]
+
+    if not _is_known_tenant(tenant_db_name):
+        # bilinmeyen ad (doğrulanmamış token / kayıt öncesi): cache'lenmez,
+        # bağlantı oturum kapanınca kapanır
+        return sessionmaker(
+            autocommit=False,
+            autoflush=False,
+            bind=create_engine(_tenant_url(tenant_db_name), poolclass=NullPool),
+        )
+
+    with _tenant_lock:
+        entry = _tenant_sessionmakers.get(tenant_db_name)
+        if entry is None:
+            engine = create_engine(
+                _tenant_url(tenant_db_name),
+                pool_pre_ping=True,
+                pool_size=settings.TENANT_DB_POOL_SIZE,
+                max_overflow=settings.TENANT_DB_MAX_OVERFLOW,
+                pool_recycle=settings.TENANT_DB_POOL_RECYCLE,
+            )
+            factory = sessionmaker(
+                autocommit=False,
+                autoflush=False,
+                bind=engine
+            )
+        else:
+            factory = entry[0]
+
+        _tenant_sessionmakers[tenant_db_name] = (factory, now)
+        _tenant_sessionmakers.move_to_end(tenant_db_name)
+        evicted = _evict_idle(now)
+
+    _dispose(evicted)
+    return factory
+
+
+# vergiNo is also the name of the tenant databases
+def connect_tenant_by_vergiNo(vergi_no: str):
+
+    tenant_db_name = vergi_no
+
+    return _tenant_sessionmaker(tenant_db_name)()
+
 
-    return SessionLocal()
+def dispose_tenant_engine(tenant_db_name: str) -> None:
+    with _tenant_lock:
+        entry = _tenant_sessionmakers.pop(tenant_db_name, None)
+
+    if entry is not None:
+        _dispose([entry[0]])
+
+
+def dispose_tenant_engines() -> None:
+    with _tenant_lock:
+        factories = [factory for factory, _ in _tenant_sessionmakers.values()]
+        _tenant_sessionmakers.clear()
+
+    _dispose(factories)
+
+
+def tenant_engine_stats() -> dict:
+    with _tenant_lock:
+        entries = list(_tenant_sessionmakers.items())
+
+    now = time.monotonic()
+    return {
+        "cached_engines": len(entries),
+        "max_engines": settings.TENANT_DB_ENGINE_CACHE_SIZE,
+        "engines": {
+            name: {
+                "idle_s": round(now - last_used, 1),
+                "checked_out": factory.kw["bind"].pool.checkedout(),
+            }
+            for name, (factory, last_used) in entries
+        },
+    }
 
 # TC Kimlik No validation 
 # String olarak gelen 11 nolu tc kimlik no'da her hane rakam mı?
@@ -65,6 +196,20 @@ def validate_vergi_no(vergi_no: str) -> bool:
     return check_digit == digits[9]
 
 
+# toplu import: kolonun tamamı tek seferde; tekrar eden değerler bir kez hesaplanır
+def _validate_column(values: Sequence[Optional[str]], check: Callable[[str], bool]) -> List[bool]:
+    results = {value: check(value) for value in set(values) if value}
+    return [results.get(value, False) for value in values]
+
+
+def validate_tc_kimlik_column(values: Sequence[Optional[str]]) -> List[bool]:
+    return _validate_column(values, validate_tc_kimlik)
+
+
+def validate_vergi_no_column(values: Sequence[Optional[str]]) -> List[bool]:
+    return _validate_column(values, validate_vergi_no)
+
+
 """
 def validate_firm_identity(tc: str | None, vergi_no: str | None):
     if not tc and not vergi_no:
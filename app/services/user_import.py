@@ -0,0 +1,447 @@
+import csv
+import io
+import logging
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import orjson
+from fastapi import HTTPException, Request
+from sqlalchemy import Column, Integer, MetaData, String, Table, select, text
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.core.config import settings
+from app.core.security import hash_password
+from app.db.session import SessionLocal
+from app.models.tenant.tenant import USER_NO_SEQUENCE, Firm, Role, User
+from app.services.login_index import index_new_users
+from app.services.tenant_service import (
+    connect_tenant_by_vergiNo,
+    validate_tc_kimlik_column,
+    validate_vergi_no_column,
+)
+from app.utils.db_helpers import allocate_sequence_block
+
+logger = logging.getLogger("uvicorn.error")
+
+# dosya kolonları (user-register-to-firmby-vergino parametreleriyle aynı adlar);
+# role: rol adı veya id, kimlik_no: kullanıcının bağlanacağı firmanın vergi no / TC'si
+IMPORT_FIELDS = ("username", "password", "longName", "email", "cepTel", "role", "kimlik_no")
+
+REQUIRED_FIELDS = ("username", "password", "email")
+
+# users kolon uzunlukları
+MAX_LENGTHS = {
+    "username": User.__table__.c.kullanici_name.type.length,
+    "email": User.__table__.c.kullanici_EMail.type.length,
+    "longName": User.__table__.c.kullanici_LongName.type.length,
+    "cepTel": User.__table__.c.kullanici_Ceptel.type.length,
+}
+
+
+# =====================================================
+# BODY / PARSE
+# =====================================================
+
+async def read_import_body(request: Request) -> bytes:
+    """
+    Ham request body (multipart değil); USER_IMPORT_MAX_MB aşılırsa 413.
+    """
+    limit = settings.USER_IMPORT_MAX_MB * 1024 * 1024
+    body = bytearray()
+
+    async for chunk in request.stream():
+        body.extend(chunk)
+
+        if len(body) > limit:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Dosya en fazla {settings.USER_IMPORT_MAX_MB} MB olabilir"
+            )
+
+    return bytes(body)
+
+
+def _clean(value) -> Optional[str]:
+    if value is None:
+        return None
+
+    value = str(value).strip()
+    return value or None
+
+
+def parse_import_rows(body: bytes, fmt: str) -> Tuple[List[Dict], List[Dict]]:
+    """
+    (satırlar, okunamayan satır hataları). Satır numarası 1'den başlar
+    (CSV'de başlık hariç).
+    """
+    rows: List[Dict] = []
+    errors: List[Dict] = []
+
+    try:
+        content = body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Dosya UTF-8 olmalı")
+
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(content))
+        header = {(name or "").strip() for name in reader.fieldnames or []}
+        missing = [field for field in REQUIRED_FIELDS if field not in header]
+
+        if missing:
+            raise HTTPException(
+                status_code=400,
+                detail=f"CSV başlığında eksik kolon: {', '.join(missing)}"
+            )
+
+        records = (
+            (row_no, {(key or "").strip(): value for key, value in record.items()})
+            for row_no, record in enumerate(reader, start=1)
+        )
+    else:
+        records = []
+        for row_no, line in enumerate((line for line in content.splitlines() if line.strip()), start=1):
+            try:
+                record = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                errors.append({"row": row_no, "field": None, "error": "Geçersiz JSON"})
+                continue
+
+            if not isinstance(record, dict):
+                errors.append({"row": row_no, "field": None, "error": "Satır JSON nesnesi olmalı"})
+                continue
+
+            records.append((row_no, record))
+
+    for row_no, record in records:
+        if row_no > settings.USER_IMPORT_MAX_ROWS:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Dosya en fazla {settings.USER_IMPORT_MAX_ROWS} satır olabilir"
+            )
+
+        row = {field: _clean(record.get(field)) for field in IMPORT_FIELDS}
+        row["row"] = row_no
+        rows.append(row)
+
+    return rows, errors
+
+
+# =====================================================
+# KOLON BAZLI DOĞRULAMA
+# =====================================================
+
+def validate_import_rows(
+    rows: List[Dict],
+    *,
+    roles: Dict[str, uuid.UUID],
+    firms_by_kimlik: Dict[str, int],
+    default_firma: int,
+) -> Dict[int, List[Dict]]:
+    """
+    satır no -> hatalar. Her kontrol kolonun tamamı üzerinde bir kez yapılır;
+    role_id / firma_sirano geçerli satırlara yazılır.
+    """
+    errors: Dict[int, List[Dict]] = {}
+
+    def fail(row: Dict, field: str, message: str) -> None:
+        errors.setdefault(row["row"], []).append({"row": row["row"], "field": field, "error": message})
+
+    for field in REQUIRED_FIELDS:
+        for row in rows:
+            if not row[field]:
+                fail(row, field, "zorunlu")
+
+    for field, length in MAX_LENGTHS.items():
+        for row in rows:
+            if row[field] and len(row[field]) > length:
+                fail(row, field, f"en fazla {length} karakter")
+
+    for row in rows:
+        if row["email"] and "@" not in row["email"]:
+            fail(row, "email", "geçersiz email")
+        if row["cepTel"] and not row["cepTel"].isdigit():
+            fail(row, "cepTel", "sadece rakam")
+
+    # dosya içi tekrar (login index gibi büyük-küçük harf duyarsız)
+    for field in ("username", "email"):
+        seen = set()
+        for row in rows:
+            key = row[field].casefold() if row[field] else None
+            if key in seen:
+                fail(row, field, "dosyada tekrar ediyor")
+            elif key:
+                seen.add(key)
+
+    # kimlik_no: 10 hane vergi no, 11 hane TC kimlik
+    kimlik = [row["kimlik_no"] for row in rows]
+    vergi_valid = validate_vergi_no_column([value if value and len(value) == 10 else None for value in kimlik])
+    tc_valid = validate_tc_kimlik_column([value if value and len(value) == 11 else None for value in kimlik])
+
+    for row, is_vergi, is_tc in zip(rows, vergi_valid, tc_valid):
+        value = row["kimlik_no"]
+
+        if not value:
+            row["firma_sirano"] = default_firma
+        elif not (is_vergi or is_tc):
+            fail(row, "kimlik_no", "geçersiz vergi / TC kimlik numarası")
+        elif value not in firms_by_kimlik:
+            fail(row, "kimlik_no", "bu numaraya ait firma yok")
+        else:
+            row["firma_sirano"] = firms_by_kimlik[value]
+
+    for row in rows:
+        role = row["role"]
+
+        if not role:
+            row["role_id"] = None
+        elif role.upper() in roles:
+            row["role_id"] = roles[role.upper()]
+        else:
+            fail(row, "role", "tanımsız rol")
+
+    return errors
+
+
+# =====================================================
+# STAGE (COPY) + MERGE
+# =====================================================
+
+_stage = Table(
+    "user_import_stage",
+    MetaData(),
+    Column("row_no", Integer, primary_key=True, autoincrement=False),
+    Column("user_id", UUID(as_uuid=True), nullable=False),
+    Column("kullanici_no", Integer, nullable=False),
+    Column("firma_sirano", Integer, nullable=False),
+    Column("username", String(20), nullable=False),
+    Column("pw_hash", String(127), nullable=False),
+    Column("long_name", String(50)),
+    Column("email", String(50), nullable=False),
+    Column("ceptel", String(11)),
+    Column("role_id", UUID(as_uuid=True)),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+
+STAGE_COLUMNS = [column.name for column in _stage.columns]
+
+COPY_SQL = f"COPY user_import_stage ({', '.join(STAGE_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+
+# mevcut kullanıcılarla çakışan (büyük-küçük harf duyarsız) kullanıcı adı / email
+EXISTING_SQL = text("""
+    SELECT lower(kullanici_name), lower("kullanici_EMail")
+    FROM users
+    WHERE lower(kullanici_name) = ANY(:names)
+       OR lower("kullanici_EMail") = ANY(:emails)
+""")
+
+MERGE_SQL = text("""
+    INSERT INTO users (
+        "kullanici_Guid", "firma_siraNo", kullanici_no, kullanici_name, kullanici_pw,
+        "kullanici_LongName", "kullanici_EMail", "kullanici_Ceptel", kullanici_pasif,
+        role_id, kullanici_create_user, kullanici_create_date
+    )
+    SELECT
+        s.user_id,
+        s.firma_sirano,
+        s.kullanici_no,
+        s.username,
+        s.pw_hash,
+        s.long_name,
+        s.email,
+        s.ceptel,
+        false,
+        s.role_id,
+        :created_user,
+        :now
+    FROM user_import_stage s
+    ORDER BY s.row_no
+    ON CONFLICT DO NOTHING
+    RETURNING "kullanici_Guid"
+""")
+
+
+def _copy_stage(tenant_db, rows: List[Dict]) -> None:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    # None -> boş alan -> COPY csv'de NULL
+    writer.writerows(
+        (
+            row["row"], row["user_id"], row["kullanici_no"], row["firma_sirano"], row["username"], row["pw_hash"],
+            row["longName"], row["email"], row["cepTel"], row["role_id"],
+        )
+        for row in rows
+    )
+    buffer.seek(0)
+
+    raw = tenant_db.connection().connection
+    with raw.cursor() as cursor:
+        cursor.copy_expert(COPY_SQL, buffer)
+
+
+def _hash_passwords(rows: List[Dict]) -> None:
+    # bcrypt GIL'i bırakır; thread'ler gerçekten paralel çalışır
+    with ThreadPoolExecutor(max_workers=settings.USER_IMPORT_HASH_WORKERS) as pool:
+        hashes = pool.map(hash_password, [row["password"] for row in rows])
+
+        for row, pw_hash in zip(rows, hashes):
+            row["pw_hash"] = pw_hash
+
+
+# =====================================================
+# IMPORT
+# =====================================================
+
+def import_users(
+    db_name: str,
+    body: bytes,
+    *,
+    fmt: str,
+    dry_run: bool = False,
+    created_user: Optional[uuid.UUID] = None,
+) -> Dict:
+    """
+    Geçerli satırlar tek transaction'da eklenir, hatalı satırlar raporlanır.
+    dry_run: sadece doğrulama (şifre hashlenmez, yazılmaz).
+    """
+    started = time.perf_counter()
+    rows, parse_errors = parse_import_rows(body, fmt)
+
+    tenant_db = connect_tenant_by_vergiNo(db_name)
+    inserted_users: List[Tuple] = []
+
+    try:
+        roles = {}
+        for role_id, name in tenant_db.execute(select(Role.id, Role.name)):
+            roles[str(role_id).upper()] = role_id
+            roles[name.upper()] = role_id
+
+        firms_by_kimlik = {}
+        for sirano, vergi_no, tc in tenant_db.execute(
+            select(Firm.firma_sirano, Firm.firma_FVergiNo, Firm.firma_TCkimlik)
+        ):
+            firms_by_kimlik[vergi_no] = sirano
+            if tc:
+                firms_by_kimlik[tc] = sirano
+
+        # kimlik_no verilmezse tenant'ın kendi firması (register ile aynı)
+        default_firma = firms_by_kimlik.get(db_name)
+
+        if default_firma is None:
+            raise HTTPException(
+                status_code=404,
+                detail="Bu vergi numarasına ait firma bulunamadı."
+            )
+
+        errors = validate_import_rows(
+            rows,
+            roles=roles,
+            firms_by_kimlik=firms_by_kimlik,
+            default_firma=default_firma,
+        )
+
+        valid = [row for row in rows if row["row"] not in errors]
+
+        if valid:
+            existing = tenant_db.execute(
+                EXISTING_SQL,
+                {
+                    "names": [row["username"].lower() for row in valid],
+                    "emails": [row["email"].lower() for row in valid],
+                },
+            ).all()
+            taken_names = {name for name, _ in existing}
+            taken_emails = {email for _, email in existing}
+
+            for row in valid:
+                if row["username"].lower() in taken_names:
+                    errors.setdefault(row["row"], []).append(
+                        {"row": row["row"], "field": "username", "error": "kullanıcı adı zaten var"}
+                    )
+                if row["email"].lower() in taken_emails:
+                    errors.setdefault(row["row"], []).append(
+                        {"row": row["row"], "field": "email", "error": "email zaten var"}
+                    )
+
+            valid = [row for row in valid if row["row"] not in errors]
+
+        hash_ms = 0
+        if valid and not dry_run:
+            hash_started = time.perf_counter()
+            _hash_passwords(valid)
+            hash_ms = int((time.perf_counter() - hash_started) * 1000)
+
+            # kullanici_no bloğu tek seferde; eş zamanlı kayıtları bekletmez
+            numbers = allocate_sequence_block(tenant_db, USER_NO_SEQUENCE.name, len(valid))
+
+            for row, number in zip(valid, numbers):
+                row["user_id"] = uuid.uuid4()
+                row["kullanici_no"] = number
+
+            _stage.create(tenant_db.connection())
+            _copy_stage(tenant_db, valid)
+
+            inserted_ids = set(
+                tenant_db.execute(
+                    MERGE_SQL, {"created_user": created_user, "now": datetime.now()}
+                ).scalars()
+            )
+
+            for row in valid:
+                if row["user_id"] in inserted_ids:
+                    inserted_users.append((row["user_id"], row["email"], row["username"]))
+                else:
+                    # kontrol ile merge arasında başka bir istekle eklenen
+                    errors.setdefault(row["row"], []).append(
+                        {"row": row["row"], "field": None, "error": "kullanıcı adı / email çakışması"}
+                    )
+
+            tenant_db.commit()
+        else:
+            tenant_db.rollback()
+
+    except Exception:
+        tenant_db.rollback()
+        raise
+
+    finally:
+        tenant_db.close()
+
+    # yeni kullanıcılar login index'e (tenant commit'inden sonra)
+    if inserted_users:
+        master_db = SessionLocal()
+        try:
+            index_new_users(master_db, tenant_db_name=db_name, users=inserted_users)
+            master_db.commit()
+        except Exception as e:
+            master_db.rollback()
+            logger.warning(f"LOGIN INDEX UPDATE FAILED | tenant={db_name} | user import | {e}")
+        finally:
+            master_db.close()
+
+    report_errors = parse_errors + [
+        error for row_no in sorted(errors) for error in errors[row_no]
+    ]
+    duration_ms = int((time.perf_counter() - started) * 1000)
+
+    logger.info(
+        f"USER IMPORT | tenant={db_name} | rows={len(rows) + len(parse_errors)} | "
+        f"inserted={len(inserted_users)} | failed={len(errors) + len(parse_errors)} | "
+        f"dry_run={dry_run} | {duration_ms}ms"
+    )
+
+    return {
+        "format": fmt,
+        "dry_run": dry_run,
+        "rows": len(rows) + len(parse_errors),
+        "valid": len(valid),
+        "inserted": len(inserted_users),
+        "failed": len(errors) + len(parse_errors),
+        "duration_ms": duration_ms,
+        "hash_ms": hash_ms,
+        "errors": report_errors,
+    }
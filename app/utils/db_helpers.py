@@ -0,0 +1,189 @@
+import base64
+import json
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Type
+
+from fastapi import HTTPException, Query, Response
+from pydantic import BaseModel
+from sqlalchemy import Select, select, text, tuple_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+# =====================================================
+# KEYSET PAGINATION
+# =====================================================
+# Liste endpointleri OFFSET yerine son satırın sıralama anahtarından devam eder;
+# sayfa süresi tablo büyüklüğünden bağımsız kalır. Sıralama kolonları birlikte
+# unique + NOT NULL olmalı ve (aynı sırayla) bir index'le karşılanmalı.
+# Gövde eskisi gibi liste; sonraki sayfa varsa cursor X-Next-Cursor header'ında.
+
+@dataclass
+class PageParams:
+    cursor: Optional[str]
+    limit: int
+
+
+def page_params(
+    cursor: Optional[str] = Query(None, description="önceki cevabın X-Next-Cursor header'ı"),
+    limit: int = Query(settings.LIST_PAGE_DEFAULT_LIMIT, ge=1, le=settings.LIST_PAGE_MAX_LIMIT),
+) -> PageParams:
+    return PageParams(cursor=cursor, limit=limit)
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _from_json(column, value: Any) -> Any:
+    if value is None:
+        raise ValueError("boş anahtar")
+
+    python_type = column.type.python_type
+
+    if python_type is uuid.UUID:
+        return uuid.UUID(value)
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type in (int, str) and not isinstance(value, python_type):
+        raise ValueError("tip uyuşmuyor")
+
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([_to_json(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("anahtar sayısı uyuşmuyor")
+
+        return [_from_json(column, value) for column, value in zip(columns, values)]
+
+    except (ValueError, TypeError, AttributeError):
+        raise HTTPException(
+            status_code=400,
+            detail="Geçersiz cursor"
+        )
+
+
+def keyset_page(
+    db: Session,
+    query: Select,
+    order_by: Sequence,
+    page: PageParams,
+    response: Response,
+    *,
+    scalars: bool = True,
+) -> list:
+    """
+    query'nin bir sayfasını döner; devamı varsa X-Next-Cursor header'ını yazar.
+    Tek entity seçen query'lerde satırlar entity'dir (scalars); kolon seçen
+    query'lerde (select_fields) scalars=False verilir, sıralama kolonları seçili olmalı.
+    """
+    if page.cursor:
+        values = decode_cursor(page.cursor, order_by)
+        query = query.where(tuple_(*order_by) > tuple_(*values))
+
+    result = db.execute(
+        query.order_by(*order_by).limit(page.limit + 1)
+    )
+    rows = result.scalars().all() if scalars else result.all()
+
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            [getattr(last, column.key) for column in order_by]
+        )
+
+    return rows
+
+
+# =====================================================
+# SPARSE FIELDSET (?fields=)
+# =====================================================
+# İstenen kolonlar SELECT'e indirilir; cevap şeması partial_schema ile
+# opsiyonel, endpoint response_model_exclude_unset=True ile sadece gelen alanları yazar.
+
+def field_selector(schema: Type[BaseModel]) -> Callable:
+    """
+    Dependency factory: ?fields=a,b -> ["a", "b"], yoksa None (tüm alanlar).
+    Şemada olmayan alan 400.
+    """
+    allowed = set(schema.model_fields)
+
+    def dependency(
+        fields: Optional[str] = Query(None, description="virgülle ayrılmış alan listesi"),
+    ) -> Optional[List[str]]:
+        if not fields:
+            return None
+
+        names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+        unknown = [name for name in names if name not in allowed]
+
+        if unknown or not names:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Geçersiz alan: {', '.join(unknown) or fields}"
+            )
+
+        return names
+
+    return dependency
+
+
+def select_fields(model, fields: Optional[List[str]], order_by: Sequence = ()) -> Select:
+    """
+    fields yoksa select(model); varsa sadece o kolonlar + sayfalama anahtarları.
+    """
+    if fields is None:
+        return select(model)
+
+    keys = fields + [column.key for column in order_by if column.key not in fields]
+    return select(*(getattr(model, key) for key in keys))
+
+
+def project_rows(rows: list, fields: Optional[List[str]]) -> list:
+    """
+    select_fields satırları -> sadece istenen alanlar (sayfalama anahtarları çıkar).
+    """
+    if fields is None:
+        return rows
+
+    return [{name: getattr(row, name) for name in fields} for row in rows]
+
+
+# =====================================================
+# SEQUENCE BLOK AYIRMA
+# =====================================================
+
+def allocate_sequence_block(db: Session, sequence_name: str, count: int) -> List[int]:
+    """
+    Toplu insert için `count` adet numara (tek round trip). Numaralar artan
+    sıradadır ama eş zamanlı ayırmalarla araya girilebilir; rollback'te boşluk kalır.
+    """
+    if count <= 0:
+        return []
+
+    return list(
+        db.execute(
+            text("SELECT nextval(CAST(:sequence AS regclass)) FROM generate_series(1, :count)"),
+            {"sequence": sequence_name, "count": count},
+        ).scalars()
+    )
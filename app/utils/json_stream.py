@@ -0,0 +1,162 @@
+import codecs
+import json
+from typing import Any, List
+
+_WHITESPACE = " \t\r\n"
+
+_SEARCH = 0
+_ARRAY = 1
+_DONE = 2
+
+
+class JsonArrayItemStream:
+    """
+    Parça parça gelen JSON içinde `array_key` anahtarının altındaki ilk dizinin
+    elemanlarını tek tek çıkarır. Bellekte aynı anda sadece bir eleman tutulur.
+
+    stream = JsonArrayItemStream("Data")
+    for chunk in chunks:
+        for item in stream.feed(chunk):
+            ...
+    """
+
+    def __init__(self, array_key: str):
+        self.array_key = array_key
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._phase = _SEARCH
+
+        # string takibi (her iki fazda)
+        self._in_string = False
+        self._escape = False
+
+        # SEARCH fazı
+        self._string_chars: List[str] = []
+        self._string_too_long = False
+        self._last_string_is_key = False
+        self._expect_colon = False
+        self._expect_array = False
+
+        # ARRAY fazı
+        self._depth = 0
+        self._item: List[str] = []
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        text = self._decoder.decode(chunk)
+
+        if self._phase == _SEARCH:
+            return self._search(text, 0)
+
+        if self._phase == _ARRAY:
+            return self._read_array(text, 0)
+
+        return []
+
+    # ---------------------------------------------
+    # dizinin başını bul: "array_key" : [
+    # ---------------------------------------------
+    def _search(self, text: str, start: int) -> List[Any]:
+        key_length = len(self.array_key)
+
+        for index in range(start, len(text)):
+            char = text[index]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string_is_key = (
+                        not self._string_too_long
+                        and "".join(self._string_chars) == self.array_key
+                    )
+                    self._expect_colon = self._last_string_is_key
+                    continue
+
+                # anahtardan uzun stringleri biriktirmeye gerek yok
+                if not self._string_too_long:
+                    self._string_chars.append(char)
+                    if len(self._string_chars) > key_length + 1:
+                        self._string_too_long = True
+                        self._string_chars = []
+                continue
+
+            if char in _WHITESPACE:
+                continue
+
+            if self._expect_array:
+                self._expect_array = False
+                if char == "[":
+                    self._phase = _ARRAY
+                    return self._read_array(text, index + 1)
+
+            if char == ":" and self._expect_colon:
+                self._expect_colon = False
+                self._expect_array = True
+                continue
+
+            self._expect_colon = False
+
+            if char == '"':
+                self._in_string = True
+                self._string_chars = []
+                self._string_too_long = False
+
+        return []
+
+    # ---------------------------------------------
+    # dizi elemanlarını ayır
+    # ---------------------------------------------
+    def _read_array(self, text: str, start: int) -> List[Any]:
+        items = []
+        item_start = start if self._item or self._depth else None
+
+        for index in range(start, len(text)):
+            char = text[index]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if item_start is None:
+                if char in _WHITESPACE or char == ",":
+                    continue
+                if char == "]":
+                    self._phase = _DONE
+                    return items
+                item_start = index
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._item.append(text[item_start:index + 1])
+                    items.append(self._pop_item())
+                    item_start = None
+            elif self._depth == 0 and char in ",]":
+                # sayı / true / null gibi düz eleman
+                self._item.append(text[item_start:index])
+                items.append(self._pop_item())
+                item_start = None
+                if char == "]":
+                    self._phase = _DONE
+                    return items
+
+        if item_start is not None:
+            self._item.append(text[item_start:])
+
+        return items
+
+    def _pop_item(self) -> Any:
+        raw = "".join(self._item)
+        self._item = []
+        return json.loads(raw)
@@ -1,9 +1,44 @@
+import hashlib
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Optional
+from zoneinfo import ZoneInfo
+
+from app.core.config import settings as app_settings
 from app.models.tenant.tenant import MikroApiSettings
 
 
+# =====================================================
+# MIKRO GÜNLÜK ŞİFRE
+# =====================================================
+
+def mikro_today() -> str:
+    """
+    Mikro sunucusu şifreyi kendi gününe göre doğrular (UTC değil).
+    """
+    return datetime.now(ZoneInfo(app_settings.MIKRO_TIMEZONE)).strftime("%Y-%m-%d")
+
+
+@lru_cache(maxsize=1024)
+def _mikro_md5(day: str, password: str) -> str:
+    raw = f"{day} {password}"
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+
+def generate_mikro_md5(password: str, day: Optional[str] = None) -> str:
+    """
+    Node.js karşılığı:
+    CryptoJS.MD5(`${YYYY-MM-DD} ${password}`)
+    Gün + şifre başına bir kez hesaplanır, DB'ye yazılmasına gerek yok.
+    """
+    return _mikro_md5(day or mikro_today(), password)
+
+
 def build_mikro_request(settings: MikroApiSettings):
+    protocol = settings.api_protocol or "http"
+
     base_url = (
-        f"http://{settings.api_ip}:{settings.api_port}"
+        f"{protocol}://{settings.api_ip}:{settings.api_port}"
         "/Api/APIMethods"
     )
 
@@ -11,13 +46,60 @@ def build_mikro_request(settings: MikroApiSettings):
         "FirmaKodu": settings.api_firmakodu,
         "CalismaYili": settings.api_calismayili,
         "KullaniciKodu": settings.api_kullanici,
-        "Sifre": settings.api_pw,
+        # günlük hash ihtiyaç anında üretilir; eski kayıtlarda sadece api_pw olabilir
+        "Sifre": (
+            generate_mikro_md5(settings.api_pw_non_hash)
+            if settings.api_pw_non_hash
+            else settings.api_pw
+        ),
         "ApiKey": settings.api_key
     }
 
     return base_url, mikro_auth
 
 
+def mikro_response_error(data: Any) -> Optional[str]:
+    """
+    Mikro iş hatalarını HTTP 200 ile döner: {"result": [{"IsError": true, ...}]}
+    Hata varsa mesajı, yoksa None döner.
+    """
+    if isinstance(data, dict) and isinstance(data.get("result"), list) and data["result"]:
+        data = data["result"][0]
+
+    if isinstance(data, dict) and data.get("IsError"):
+        return str(data.get("ErrorMessage") or data.get("StatusCode") or "Mikro hata döndü")
+
+    return None
+
+
+# =====================================================
+# MIKRO DEĞERLERİ
+# =====================================================
+
+def parse_mikro_datetime(value: Any) -> Optional[datetime]:
+    # Mikro boş tarihleri 1899-12-30 olarak döner
+    if not value:
+        return None
+
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", ""))
+    except ValueError:
+        return None
+
+    return parsed if parsed.year > 1900 else None
+
+
+def clean_mikro_str(value: Any, length: int) -> Optional[str]:
+    """
+    Mikro metin alanı: kırpılır, kolon uzunluğuna kesilir, boşsa None.
+    """
+    if value is None:
+        return None
+
+    value = str(value).strip()
+    return value[:length] or None
+
+
 """
 MIKRO_BASE_URL = "http://85.95.242.148:8094/Api/APIMethods"
 